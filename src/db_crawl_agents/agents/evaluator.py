@@ -1,76 +1,143 @@
 # agents/evaluator.py
 from __future__ import annotations
-from typing import List, Dict
-import math
+from typing import Any, List, Dict, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
 from contracts import FeatureDefinitionSpec, SingleCTEResult, CandidateAssessment
-def _looks_boolean(rows: List[Dict[str, object]]) -> bool:
-    vals = set()
-    for r in rows:
-        for v in r.values():
-            vals.add(str(v).strip().lower())
-    return vals.issubset({"true","false","t","f","1","0","yes","no","y","n"}) or vals <= {"true","false"} or vals <= {"1","0"}
 
+BOOLEAN_TOKENS = pa.array(["true","false","t","f","1","0","yes","no","y","n"])
 
-def _values_subset(rows: List[Dict[str, object]], valid: List[str]) -> bool:
-    valid_l = {v.strip().lower() for v in valid}
-    seen = set()
-    for r in rows:
-        for v in r.values():
-            seen.add(str(v).strip().lower())
-    return seen.issubset(valid_l)
+
+def preview_table(result: SingleCTEResult) -> pa.Table:
+    """The preview as an Arrow table: the executor's table when carried, else built from preview_rows."""
+    table = getattr(result, "preview_table", None)
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    if isinstance(table, pa.Table):
+        return table
+    rows = result.preview_rows or []
+    try:
+        return pa.Table.from_pylist(rows)
+    except (pa.ArrowInvalid, pa.ArrowTypeError): # mixed-type columns: compare as text
+        return pa.Table.from_pylist([{k: None if v is None else str(v) for k, v in r.items()} for r in rows])
+
+
+def _value_columns(table: pa.Table, feature: FeatureDefinitionSpec) -> List[str]:
+    """The feature's value column(s): the column named after the feature, else every non-grain column."""
+    names = table.column_names
+    by_upper = {n.upper(): n for n in names}
+    if feature.name and feature.name.upper() in by_upper:
+        return [by_upper[feature.name.upper()]]
+    grain = (feature.target_grain or "").upper()
+    return [n for n in names if n.upper() != grain] or names
+
+
+def _grain_column(table: pa.Table, feature: FeatureDefinitionSpec) -> Optional[str]:
+    grain = (feature.target_grain or "").upper()
+    return next((n for n in table.column_names if n.upper() == grain), None) if grain else None
+
+
+def _normalized(column) -> Optional[pa.ChunkedArray]:
+    """Non-null values as trimmed lower-case strings (the vectorized str(v).strip().lower())."""
+    try:
+        text = pc.cast(column.drop_null(), pa.string())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError): # nested types have no text form
+        return None
+    return pc.utf8_lower(pc.utf8_trim_whitespace(text))
+
+
+def _all_in(table: pa.Table, columns: List[str], values: pa.Array) -> bool:
+    for name in columns:
+        norm = _normalized(table.column(name))
+        if norm is None or pc.all(pc.is_in(norm, value_set=values)).as_py() is False:
+            return False
+    return True
+
+
+def _looks_boolean(table: pa.Table, columns: List[str]) -> bool:
+    return all(pa.types.is_boolean(table.schema.field(c).type) for c in columns) or _all_in(table, columns, BOOLEAN_TOKENS)
+
+
+def _values_subset(table: pa.Table, columns: List[str], valid: List[str]) -> bool:
+    valid_l = pa.array(sorted({v.strip().lower() for v in valid}), type=pa.string())
+    return _all_in(table, columns, valid_l)
+
+
+def preview_metrics(table: pa.Table, feature: FeatureDefinitionSpec) -> Dict[str, Any]:
+    """
+    Quality metrics computed on the preview with Arrow compute kernels.
+
+    Returns:
+        dict: rowcount_sample, and when the preview has rows: null_rate of the value column(s),
+        value_min/value_max of a numeric value column and distinct_grain_sample.
+    """
+    m: Dict[str, Any] = {"rowcount_sample": table.num_rows}
+    if table.num_rows == 0:
+        return m
+    cols = _value_columns(table, feature)
+    m["null_rate"] = sum(table.column(c).null_count for c in cols) / (table.num_rows * len(cols))
+    value = table.column(cols[0])
+    if pa.types.is_integer(value.type) or pa.types.is_floating(value.type) or pa.types.is_decimal(value.type):
+        mm = pc.min_max(value).as_py()
+        if mm["min"] is not None:
+            m["value_min"], m["value_max"] = float(mm["min"]), float(mm["max"])
+    grain = _grain_column(table, feature)
+    if grain is not None:
+        m["distinct_grain_sample"] = pc.count_distinct(table.column(grain)).as_py()
+    return m
 
 
 def assess_candidate(feature: FeatureDefinitionSpec, result: SingleCTEResult) -> CandidateAssessment:
     rel = 0.0; qual = 0.0; gaps: List[str] = []
     sql_l = (result.sql or "").lower()
     text = (feature.name + " " + (feature.description or "")).lower()
+    table = preview_table(result)
+    value_cols = _value_columns(table, feature)
     # Relevance (name/desc tokens present)
     toks = [t for t in feature.name.lower().split("_") if t]
-    
-    if any(t in sql_l for t in toks): 
+
+    if any(t in sql_l for t in toks):
         rel += 0.15
     # Grain mention (weak proxy)
-    
-    if feature.target_grain and feature.target_grain.lower() in sql_l: 
+
+    if feature.target_grain and feature.target_grain.lower() in sql_l:
         rel += 0.20
         # Temporal scope (presence of time filter/window)
-    
-    if feature.temporal_scope and any(k in sql_l for k in ["date","time","window","last","interval","range"]): 
+
+    if feature.temporal_scope and any(k in sql_l for k in ["date","time","window","last","interval","range"]):
         rel += 0.10
     # Value type checks
-    
+
     vt = feature.value_type.lower()
-    
-    if vt in {"boolean","bool"} and _looks_boolean(result.preview_rows): 
+
+    if vt in {"boolean","bool"} and _looks_boolean(table, value_cols):
         rel += 0.15
-    
-    if feature.valid_values and not _values_subset(result.preview_rows, feature.valid_values):
+
+    if feature.valid_values and not _values_subset(table, value_cols, feature.valid_values):
         gaps.append("Observed values outside valid_values")
-    # Quality (metrics from executor)
-    
-    m = result.metrics or {}
-    
-    if result.status == "ok" and m.get("rowcount_sample", 0) > 0: 
+    # Quality (metrics measured on the preview; executor-reported metrics take precedence)
+
+    m = {**preview_metrics(table, feature), **(result.metrics or {})}
+
+    if result.status == "ok" and m.get("rowcount_sample", 0) > 0:
         qual += 0.20
     nr = m.get("null_rate")
-    
+
     if isinstance(nr, (int, float)):
         qual += 0.20 if nr < 0.3 else 0.05
-        jm = m.get("join_multiplier_est")
-    
+    jm = m.get("join_multiplier_est")
+
     if isinstance(jm, (int, float)):
         qual += 0.15 if jm <= 1.5 else 0.05
-    
-    if vt in {"decimal","integer","numeric"}:
-        vmin, vmax = m.get("value_min"), m.get("value_max")
-    
-    if isinstance(vmin, (int,float)) and isinstance(vmax, (int,float)) and vmax >= vmin:
+    vmin, vmax = m.get("value_min"), m.get("value_max")
+
+    if vt in {"decimal","integer","numeric"} and isinstance(vmin, (int,float)) and isinstance(vmax, (int,float)) and vmax >= vmin:
         qual += 0.15
-    
+
     if feature.target_grain and m.get("distinct_grain_sample") == m.get("rowcount_sample"):
         qual += 0.15
-        confidence = round(0.6*min(1.0, rel) + 0.4*min(1.0, qual), 3)
-    
+    confidence = round(0.6*min(1.0, rel) + 0.4*min(1.0, qual), 3)
+
     return CandidateAssessment(
     task_id=result.task_id,
     feature_name=result.feature_name,
@@ -78,4 +145,4 @@ def assess_candidate(feature: FeatureDefinitionSpec, result: SingleCTEResult) ->
     quality_score=round(qual,3),
     confidence=confidence,
     gaps=gaps or []
-    )
\ No newline at end of file
+    )
@@ -2,16 +2,28 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from contracts.single_cte_task import SingleCTETask
 from .rag import SchemaEmbedder
+from ..tools.context_packer import pack_columns
+from ..tools.catalog_store import CatalogStore
 from src.contracts.single_cte.single_cte_output import SingleCTEOutput
-from single_cte.validator import static_validate
-from single_cte.preview import run_preview
+from ..tools.database_executor import static_validate
+from ..tools.sql_validator import get_catalog_index
+from ..tools.cost_guard import CostBudget, guard_sql
+from ..contracts.single_cte.execution_results import ExecutionResult
+from ..tools.database_executor import run_preview
+from ..tools.preview_sampling import SampleSpec, sample_sql, sample_tables_from_catalog
 # from single_cte.prompt_loader import load_single_cte_system_prompt
 from llms.langraph_wrapper_gpt import your_llm
 import json
+from dataclasses import replace
 from typing import List, Dict, Any, Optional, Union
 import os
 # import all the data lineage for snowflake and other data sources
 
+# multi-vector retrieval (name, table-qualified name, examples) keeps recall at small k
+RAG_TOP_K = 10
+# token budget of the packed columns_lineage_table_json sent to the LLM
+CONTEXT_TOKEN_BUDGET = 2000
+
 class singleCTE:
   def __init__(self):
     """
@@ -48,6 +60,7 @@ class singleCTE:
     }
     self._chain = None
     self.rag = SchemaEmbedder()
+    self.cost_budget = CostBudget.from_env()
 
   def build_chain(self):
     """
@@ -117,50 +130,53 @@ Return a single JSON object with keys:
 
     return prompt | llm | parser
 
-  def _load_columns_lineage_table(self, columns_lineage_table_json: Union[List[Dict[str, Any]], str]) -> List[Dict[str, Any]]:
+  def _load_columns_lineage_table(self, columns_lineage_table_json: Union[List[Dict[str, Any]], CatalogStore, str]) -> Union[List[Dict[str, Any]], CatalogStore]:
     """
     Loads the columns_lineage_table_json field, handling both list of dictionaries and file paths.
 
     Args:
-      columns_lineage_table_json (Union[List[Dict[str, Any]], str]): The input data or file path.
+      columns_lineage_table_json (Union[List[Dict[str, Any]], str]): The input data or file path
+        (.json array, .jsonl/.ndjson or .parquet).
 
     Returns:
-      List[Dict[str, Any]]: The loaded list of dictionaries.
+      Union[List[Dict[str, Any]], CatalogStore]: The given rows, or for a file a CatalogStore
+        whose rows are read-only dict-like views.
     """
     print(type(columns_lineage_table_json))
-    if isinstance(columns_lineage_table_json, list):
+    if isinstance(columns_lineage_table_json, (list, CatalogStore)):
       return columns_lineage_table_json
    # elif isinstance(columns_lineage_table_json, str):
     else:
+     # JSON array, JSON Lines or Parquet, parsed incrementally straight into a compact CatalogStore
       root_path = os.path.join(os.getcwd(), columns_lineage_table_json)
       print(root_path)
-      if os.path.isfile(root_path):
-        try:
-          with open(root_path, "r") as file:
-            data = json.load(file)
-            if isinstance(data, list) and all(isinstance(item, dict) for item in data):
-              return data
-            else:
-              raise ValueError("The file must contain a JSON array of dictionaries.")
-        except Exception as e:
-          raise ValueError(f"Error reading JSON file: {e}")
-      else:
-        raise ValueError("The provided string is not a valid file path.")
-
-  def run_single_cte(self, task: SingleCTETask, data_asset: str, config_dict):
+      return CatalogStore.from_source(root_path)
+
+  def run_single_cte(
+    self,
+    task: SingleCTETask,
+    data_asset: str,
+    config_dict,
+    seed: Optional[int] = None,
+    sample: Optional[SampleSpec] = None,
+  ):
     """
     Executes a single CTE task.
 
     Steps:
     1) Generate plan+SQL via LLM (structured JSON).
     2) Static-validate against catalog + grain.
-    3) Execute a LIMIT 3 preview; attach ExecutionResult.
-    4) Adjust status if preview fails.
+    3) Estimate preview cost; when over budget, cap the unfiltered driving table or reject it.
+    4) Execute a LIMIT 3 preview; attach ExecutionResult.
+    5) Adjust status if preview fails.
 
     Args:
       task (SingleCTETask): The task to process.
       engine (str): The engine to use for execution.
       conn_or_spark: Connection or Spark session.
+      seed (Optional[int]): Preview sampling seed (e.g. from execute_cte_task_spark(..., seed=42));
+        enables deterministic sampled previews.
+      sample (Optional[SampleSpec]): Explicit sampling settings; overrides `seed` and the env config.
 
     Returns:
       SingleCTEOutput: The result of the task execution.
@@ -172,25 +188,51 @@ Return a single JSON object with keys:
     columns_lineage_table = self._load_columns_lineage_table(task['columns_lineage_table_json'])
 
     self.rag.embed_column_names(columns_lineage_table)
-    relevant_columns = self.rag.query_faiss_index( task['user_snippet'], k=50)
+    relevant_columns = self.rag.query_faiss_index( task['user_snippet'], k=RAG_TOP_K)
     print(relevant_columns)
     result: SingleCTEOutput = self._chain.invoke({
       "user_request_text": task['user_snippet'],
-      "columns_lineage_table_json": relevant_columns
+      "columns_lineage_table_json": pack_columns(relevant_columns, token_budget=CONTEXT_TOKEN_BUDGET)
     })
     print("result",result)
     result.task_id = task['task_id']
 
-   # Static validation
-    ok, errs = static_validate(result.sql, columns_lineage_table, result.chosen_grain)
+   # Static validation (the index is built or looked up once and shared with the cost guard)
+    index = get_catalog_index(columns_lineage_table)
+    ok, errs = static_validate(result.sql, columns_lineage_table, result.chosen_grain, index.version)
     if not ok:
       if result.status == "ok":
         result.status = "partial"
       result.assumptions.append("Static validation warnings:")
       result.assumptions.extend(errs[:3])
+   # Cost guard: never start a preview whose estimated scan or join fan-out exceeds the budget
+    sample = sample or SampleSpec.from_env(seed)
+    if sample is not None and not sample.sample_tables:
+      sample = replace(sample, sample_tables=sample_tables_from_catalog(columns_lineage_table))
+    # sampling is applied once, here, so the guard estimates (and caps) the query that actually runs;
+    # the executor then gets no SampleSpec and does not sample the guarded SQL a second time, it only
+    # renders the TABLESAMPLE clauses in the engine's dialect (run_preview_spark / render_sampled)
+    guarded_sql = result.sql
+    if sample is not None:
+      try:
+        guarded_sql = sample_sql(result.sql, sample, index)
+      except Exception: # unparsable SQL was already reported by static validation
+        sample = None
+    decision = guard_sql(guarded_sql, index, self.cost_budget)
+    if decision.action == "reject":
+      result.status = "partial" if result.status == "ok" else result.status
+      result.assumptions.append("Preview skipped by cost guard: " + "; ".join(decision.reasons[:3]))
+      result.execution_result = ExecutionResult(engine="spark", success=False, rowcount=0,
+                                                error="Rejected by cost guard.", warnings=decision.reasons)
+      return result
+    if decision.action == "rewrite":
+      result.assumptions.append("Preview ran on a capped read of the unfiltered driving table.")
    # Execute preview
     print("running preview query")
-    result.execution_result = run_preview(result.sql,data_asset,config_dict)
+    result.execution_result = run_preview(decision.sql,data_asset,config_dict, sample=None, index=index)
+    result.preview_table = result.execution_result.arrow_table
+    if sample is not None and result.execution_result.success:
+      result.execution_result.warnings.append(f"Sampled preview: {sample.percent:g}% per table, seed {sample.seed}.")
     if not result.execution_result.success and result.status == "ok":
       result.status = "partial"
       result.assumptions.append("Preview failed; see error.")
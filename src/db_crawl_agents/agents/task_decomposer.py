@@ -1,18 +1,24 @@
 from __future__ import annotations
 import json
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import ValidationError
 from ..contracts.planner import DecomposerPlan, CatalogRow
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate,SystemMessagePromptTemplate
 from ...contracts.feature_orchestrator.feature_orchestrator import FeatureDefinitionSpec
 from ..llms.langraph_wrapper_gpt import CustomChatOpenAI
 from single_cte.rag import SchemaEmbedder
+from ..tools.catalog_store import CatalogStore
+from ..tools.index_store import catalog_fingerprint
+from ..tools.plan_store import PlanStore
+from ..tools.join_graph import JOIN_TOOL_SPEC, JoinGraph, get_join_graph
 from langchain_core.tools import tool, Tool
 
 import os
 
+MAX_TOOL_ROUNDS = 5
+
 class taskDecomposer:
-  def __init__(self):
+  def __init__(self, plan_store: Optional[PlanStore] = None):
     self.rag_params = {
       "gpt_config_params": {
         "OPENAI_API_KEY":"",
@@ -42,6 +48,10 @@ class taskDecomposer:
     }
     self._chain = None
     self.rag = SchemaEmbedder()
+   # memoized plans; a repeat feature on an unchanged catalog skips the LLM stage entirely
+    self.plan_store = plan_store
+   # join-candidate graph of the current catalog (cached per catalog version), answers join_path_tool
+    self.join_graph: Optional[JoinGraph] = None
 
   def build_task_decomposer_chain(self):
     system_text = """
@@ -69,36 +79,53 @@ TOOL SPECIFICATION
 Tool name: task_decomposer_rag_tool
 Input format (always JSON):
 {{
-"query": "<short intent text, describing what to search for>",
+"query": "<short intent text, describing what to search for>" | ["<intent 1>", "<intent 2>", ...],
 }}
+Prefer one call with a list of queries (or parallel calls in the same turn) over sequential calls.
 Example queries:
 {{ "query": "order amount last 90 days per customer" }}
 {{ "query": "policy number key column" }}
 {{ "query": "claims notes text field" }}
-Output from tool:
+Output from tool (compact JSON, columns grouped by table, best matches first; use a table's
+database_type as the task's database_type):
 [
+ {{
+  "table": "DB_NAME.SCHEMA_NAME.TABLE_NAME",
+  "database_type": "snowflake|atlas|cbd",
+  "columns": [
+   {{
+    "column": "COLUMN_NAME",
+    "type": "STRING|DECIMAL|DATE",
+    "pk": "Y|N",
+    "unique": "Y|N",
+    "comment": "doc/comment",
+    "examples": ["...", "..."]
+   }}
+  ]
+ }}
+]
+Fields that are null in the catalog are omitted.
+
+Tool name: join_path_tool
+Input format (always JSON):
 {{
- "database_type": "snowflake|atlas|cbd",
- "catalog": "CATALOG_NAME",
- "db": "DB_NAME",
- "schema": "SCHEMA_NAME",
- "table": "TABLE_NAME",
- "column": "COLUMN_NAME",
- "data_type": "STRING|DECIMAL|DATE",
- "object_type": "TABLE|VIEW|COLLECTION",
- "score": 0.0-1.0,
- "description": "doc/comment",
- "sample_values": ["...", "..."]
+"tables": ["DB.TABLE", "DB.SCHEMA.TABLE", ...],
+"k": 3
 }}
-]
+Returns ranked join paths between the given tables (or the best join candidates of a single table),
+precomputed from normalized column names, data types, PK/UNIQUE flags and sample-value overlap:
+[{{"tables": [...], "score": 0.88, "join_plan": [<JoinEdge>, ...], "cardinality": ["1:N"], "evidence": [["by_name","by_samples"]]}}]
+Copy join_plan edges from here instead of inferring keys from samples yourself.
 ---------------------------------------------------
 MERGE KEY IDENTIFICATION
 ---------------------------------------------------
 When sub-features span multiple databases:
-1. Compare column names (CUSTOMER_ID, POLICY_NUMBER).
-2. Compare sample_values for format/type/length.
-3. Use PK/FK metadata to detect joinability.
-4. If two or more agree, confidence is higher. If none match, record in gaps.
+1. Start from join_candidates (given with the feature) and join_path_tool; they already compare
+ names, types, PK/UNIQUE flags and sample overlap, and carry the evidence flags and samples for key_inference.
+2. Otherwise compare column names (CUSTOMER_ID, POLICY_NUMBER).
+3. Compare sample_values for format/type/length.
+4. Use PK/FK metadata to detect joinability.
+5. If two or more agree, confidence is higher. If none match, record in gaps.
 Always add "downstream merge required via <KEY>" in notes when splitting across databases.
 ---------------------------------------------------
 OUTPUT JSON SCHEMA
@@ -297,11 +324,11 @@ Output:
   func=self.rag.query_faiss_index,
   description="A tool to query the FAISS index for identifying the actual columns present the databases to query.")
 
-    tool = [self.rag.query_faiss_index]
+    tool = [self.rag.query_faiss_index, JOIN_TOOL_SPEC]
 
     messages = [
         SystemMessagePromptTemplate.from_template(system_text),
-        HumanMessagePromptTemplate.from_template("feature_json:\n{feature_json}\n\nReturn JSON only.")
+        HumanMessagePromptTemplate.from_template("feature_json:\n{feature_json}\n\njoin_candidates:\n{join_candidates}\n\nReturn JSON only.")
           ]
     prompt = ChatPromptTemplate.from_messages(messages)
    # .bind(tools = [task_decomposer_rag_tool])
@@ -310,18 +337,19 @@ Output:
     return prompt | llm
  # | parser
 
-  def _load_columns_lineage_table(self, columns_lineage_table_json: Union[List[Dict[str, Any]], str]) -> List[Dict[str, Any]]:
+  def _load_columns_lineage_table(self, columns_lineage_table_json: Union[List[Dict[str, Any]], CatalogStore, str]) -> Union[List[Dict[str, Any]], CatalogStore]:
     """
     Loads the columns_lineage_table_json field, handling both list of dictionaries and file paths.
 
     Args:
-      columns_lineage_table_json (Union[List[Dict[str, Any]], str]): The input data or file path.
+      columns_lineage_table_json (Union[List[Dict[str, Any]], CatalogStore, str]): The input data
+        (rows or a columnar CatalogStore of row views) or file path.
 
     Returns:
-      List[Dict[str, Any]]: The loaded list of dictionaries.
+      Union[List[Dict[str, Any]], CatalogStore]: The loaded rows.
     """
     print(type(columns_lineage_table_json))
-    if isinstance(columns_lineage_table_json, list):
+    if isinstance(columns_lineage_table_json, (list, CatalogStore)):
       return columns_lineage_table_json
    # elif isinstance(columns_lineage_table_json, str):
    # need to handle this to file upload
@@ -348,18 +376,34 @@ Output:
     columns_lineage_data # this should be a list of json file paths at the moment
    # system_prompt_path: str = "prompts/task_decomposer_single_feature.md" # need to inject in this file for testing
     ) :
-    chain = self.build_task_decomposer_chain()
     columns_lineage_table = self._load_columns_lineage_table(columns_lineage_data)
+    catalog_version = catalog_fingerprint(columns_lineage_table)
+    if self.plan_store is not None:
+      cached = self.plan_store.get(feature, catalog_version, catalog_rows=columns_lineage_table)
+      if cached is not None:
+        return cached
+    chain = self.build_task_decomposer_chain()
     self.rag.embed_column_names(columns_lineage_table)
+    self.join_graph = get_join_graph(columns_lineage_table, catalog_version)
    # user_text = (
    # f"feature_json:\n{feature.model_dump_json()}\n\n"
    # "Return JSON only."
    # )
-    result = chain.invoke({
-      "feature_json":feature})
+    prompt, llm = chain.first, chain.last
+    messages = prompt.format_messages(feature_json=feature, join_candidates=self.join_graph.to_context())
+    result = llm.invoke(messages)
+   # all rag tool calls of one turn are answered by a single batched FAISS search
+    for _ in range(MAX_TOOL_ROUNDS):
+      if not result.tool_calls:
+        break
+      messages.extend([result, *self.rag.answer_tool_calls(result.tool_calls), *self.join_graph.answer_tool_calls(result.tool_calls)])
+      result = llm.invoke(messages)
     print(result)
     try:
-      return DecomposerPlan.model_validate_json(result)
+      plan = DecomposerPlan.model_validate_json(result.content)
     except ValidationError as e:
    # optional: attempt a repair pass via an output-fixer
-      raise
\ No newline at end of file
+      raise
+    if self.plan_store is not None:
+      self.plan_store.put(feature, catalog_version, plan)
+    return plan
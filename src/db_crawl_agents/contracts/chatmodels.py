@@ -1,11 +1,17 @@
 from __future__ import annotations
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterable, List, Optional, Dict, Any
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Any
 from ..utils.types import ChatMessage, ChatResponse, ToolCall
 
 
 class ChatModel(ABC):
-    """Interface for chat LLMs (sync)."""
+    """
+    Interface for chat LLMs.
+
+    `chat`/`stream` are required. `achat`/`astream` default to running the sync
+    methods in a worker thread; providers with a native async client override them.
+    """
 
     @abstractmethod
     def chat(
@@ -38,4 +44,62 @@ class ChatModel(ABC):
         metadata: Optional[Dict[str, Any]] = None,
     ) -> Iterable[ChatResponse]:
         """Yield partial deltas; the final yielded item should contain full aggregated response."""
-        ...
\ No newline at end of file
+        ...
+
+    async def achat(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ChatResponse:
+        return await asyncio.to_thread(
+            self.chat,
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stop=stop,
+            tools=tools,
+            tool_choice=tool_choice,
+            response_format=response_format,
+            metadata=metadata,
+        )
+
+    async def astream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[ChatResponse]:
+        """Async counterpart of `stream`; the default buffers the sync stream in a worker thread."""
+        chunks = await asyncio.to_thread(
+            lambda: list(
+                self.stream(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    stop=stop,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    response_format=response_format,
+                    metadata=metadata,
+                )
+            )
+        )
+        for chunk in chunks:
+            yield chunk
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, TypedDict, Literal
+from typing import Dict, Optional, TypedDict, Literal
 from .feature_orchestrator import UserQuery, Feedback, Feature, FinalizedFeatures
 
 class OrchestratorState(TypedDict, total=False):
@@ -14,4 +14,9 @@ class OrchestratorState(TypedDict, total=False):
 
     # output
     stage: Literal["draft", "final"]
-    finalized: FinalizedFeatures
\ No newline at end of file
+    finalized: FinalizedFeatures
+
+    # decision-graph bookkeeping (set only when the orchestrator has a DecisionGraphStore)
+    run_id: Optional[str]
+    graph_node: Optional[str]
+    feature_nodes: Dict[str, str]  # feature name -> FEATURE node id
\ No newline at end of file
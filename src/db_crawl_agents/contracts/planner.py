@@ -1,7 +1,7 @@
 # agents/contracts_runtime.py
 from __future__ import annotations
-from typing import List, Optional, Dict, Literal, Tuple
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Any, List, Optional, Dict, Literal, Tuple
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
 from contracts.single_cte_task import SingleCTETask
 DatabaseType = Literal["snowflake", "atlas", "cbd"]
 Grain = Literal["CUSTOMER_ID","USER_ID","ACCOUNT_ID","ORDER_ID","CLAIM_ID","POLICY_NUMBER","DATE"]
@@ -43,7 +43,7 @@ class SourceTableProfile(BaseModel):
 class JoinEdge(BaseModel):
     left_table: str
     right_table: str
-    on: List[str]
+    on: List[str]  # "COL" when both sides share the name, else "LEFT_COL=RIGHT_COL"
     join_type: Literal["left","inner","right","full"] = "left"
 
 
@@ -99,6 +99,12 @@ class SingleCTEResult(BaseModel):
     assumptions: List[str] = Field(default_factory=list)
     clarifying_questions: List[str] = Field(default_factory=list)
     unresolved_inputs: List[str] = []
+    # preview rows as a pyarrow.Table / RecordBatch for the evaluator; kept in Python dumps, dropped from JSON
+    preview_table: Optional[Any] = None
+
+    @field_serializer("preview_table", when_used="json")
+    def _preview_table_json(self, value: Any) -> None:
+        return None
 # error: Optional[str] = None
 # elapsed_ms: Optional[int] = None
 # class RetrySpec(BaseModel):
@@ -1,12 +1,25 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer
 from typing import List, Dict, Any, Optional
 #  which execution result is this?
 class ExecutionResult(BaseModel):
     engine: str
     success: bool
     rowcount: int
+    # left empty by the executors; filled from arrow_table only when the result is serialized
     sample_rows: List[Dict[str, Any]] = []
     schema_field: List[Dict[str, str]] = []
     elapsed_ms: int = 0
     warnings: List[str] = []
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    # the preview as a pyarrow.Table / RecordBatch; kept in Python dumps, dropped from JSON
+    arrow_table: Optional[Any] = None
+
+    @field_serializer("arrow_table", when_used="json")
+    def _arrow_table_json(self, value: Any) -> None:
+        return None
+
+    @field_serializer("sample_rows")
+    def _sample_rows(self, value: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if value or self.arrow_table is None:
+            return value
+        return self.arrow_table.to_pylist()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from .execution_result import ExecutionResult
+from pydantic import BaseModel, Field, field_serializer
+from typing import Any, List, Optional
+from .execution_results import ExecutionResult
 class SingleCTEOutput(BaseModel):
     task_id: str = Field(default="feat.UNKNOWN")
     status: str = Field(description="ok | partial | clarify | fail")
@@ -10,4 +10,10 @@ class SingleCTEOutput(BaseModel):
     clarifying_questions: List[str] = []
     unresolved_inputs: List[str] = []
     sql: str = Field(description="WITH ... SELECT <grain>, <feature> ...")
-    execution_result: Optional[ExecutionResult] = None
\ No newline at end of file
+    execution_result: Optional[ExecutionResult] = None
+    # the preview as a pyarrow.Table for the evaluator; kept in Python dumps, dropped from JSON
+    preview_table: Optional[Any] = None
+
+    @field_serializer("preview_table", when_used="json")
+    def _preview_table_json(self, value: Any) -> None:
+        return None
@@ -0,0 +1,381 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from ..contracts.chatmodels import ChatModel
+from ..utils.env import get_env
+from ..utils.types import ChatMessage, ChatResponse, ToolCall
+
+
+def _canonical(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def request_key(model: str, messages: List[ChatMessage], **params: Any) -> str:
+    """
+    Content address of a chat request.
+
+    Args:
+        model: Model name the request is sent to.
+        messages: Conversation history.
+        **params: Generation parameters that change the output
+            (temperature, max_tokens, top_p, stop, tools, tool_choice, response_format).
+
+    Returns:
+        sha256 hex digest of the canonical JSON of (model, messages, params).
+    """
+    payload = {
+        "model": model,
+        "messages": [asdict(m) for m in messages],
+        "params": {k: v for k, v in params.items() if v is not None},
+    }
+    return hashlib.sha256(_canonical(payload).encode("utf-8")).hexdigest()
+
+
+def _dump_response(resp: ChatResponse) -> str:
+    return _canonical(asdict(resp))
+
+
+def _load_response(blob: str) -> ChatResponse:
+    data = json.loads(blob)
+    tool_calls = data.get("tool_calls")
+    if tool_calls:
+        data["tool_calls"] = [ToolCall(**tc) for tc in tool_calls]
+    return ChatResponse(**data)
+
+
+# ---- backends ----
+class CacheBackend(ABC):
+    """Key/value store for serialized ChatResponses. Expired entries read as misses."""
+
+    def __init__(self, ttl_s: Optional[float] = None):
+        self.ttl_s = ttl_s
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_s is not None and time.time() - created > self.ttl_s
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU with optional TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_s: Optional[float] = None):
+        super().__init__(ttl_s)
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self._expired(created):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Single-file SQLite cache, shareable between notebook sessions and CI runs."""
+
+    def __init__(self, path: str, ttl_s: Optional[float] = None):
+        super().__init__(ttl_s)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1]):
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class DiskCacheBackend(CacheBackend):
+    """One JSON file per entry under `root_dir/<key[:2]>/`; entry age is the file mtime."""
+
+    def __init__(self, root_dir: str, ttl_s: Optional[float] = None):
+        super().__init__(ttl_s)
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, path)
+
+    def clear(self) -> None:
+        for dirpath, _, files in os.walk(self.root_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    os.remove(os.path.join(dirpath, name))
+
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """
+    Build a backend from DBCRAWL_LLM_CACHE ("memory", "sqlite:<path>" or "disk:<dir>")
+    and DBCRAWL_LLM_CACHE_TTL (seconds). Returns None when caching is not configured.
+    """
+    spec = get_env("DBCRAWL_LLM_CACHE")
+    if not spec:
+        return None
+    ttl = get_env("DBCRAWL_LLM_CACHE_TTL")
+    ttl_s = float(ttl) if ttl else None
+    kind, _, target = spec.partition(":")
+    if kind == "memory":
+        return MemoryCacheBackend(ttl_s=ttl_s)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(target or ".cache/llm_cache.sqlite", ttl_s=ttl_s)
+    if kind == "disk":
+        return DiskCacheBackend(target or ".cache/llm_cache", ttl_s=ttl_s)
+    raise ValueError(f"Unsupported DBCRAWL_LLM_CACHE backend: {spec}")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0  # requests not eligible for caching (sampling temperature)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "skipped": self.skipped, "hit_rate": self.hit_rate}
+
+
+class CachedChatModel(ChatModel):
+    """
+    ChatModel wrapper that replays responses for identical requests.
+
+    Requests are keyed on (model, messages, temperature, max_tokens, top_p, stop, tools,
+    tool_choice, response_format); `metadata` is tracing-only and not part of the key.
+    Sampled requests (temperature > 0) are passed through uncached unless `force=True`,
+    since replaying one sample would hide the variance the caller asked for.
+    """
+
+    def __init__(
+        self,
+        inner: ChatModel,
+        backend: Optional[CacheBackend] = None,
+        *,
+        force: bool = False,
+        model_name: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            inner: The ChatModel that serves misses.
+            backend: Where responses are stored; defaults to `backend_from_env()`, else an in-memory LRU.
+            force: Cache sampled (temperature > 0) requests too.
+            model_name: Model name used in the key; defaults to the inner model's configured model.
+        """
+        self.inner = inner
+        self.backend = backend or backend_from_env() or MemoryCacheBackend()
+        self.force = force
+        self.model_name = model_name or getattr(inner, "_model", None) or getattr(inner, "model", None) or type(inner).__name__
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def _key(self, messages: List[ChatMessage], temperature: float, **params: Any) -> Optional[str]:
+        if temperature and temperature > 0 and not self.force:
+            with self._stats_lock:
+                self.stats.skipped += 1
+            return None
+        return request_key(self.model_name, messages, temperature=temperature, **params)
+
+    def _lookup(self, key: Optional[str]) -> Optional[ChatResponse]:
+        if key is None:
+            return None
+        blob = self.backend.get(key)
+        with self._stats_lock:
+            if blob is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return _load_response(blob) if blob is not None else None
+
+    def _store(self, key: Optional[str], resp: ChatResponse) -> None:
+        if key is not None:
+            self.backend.set(key, _dump_response(resp))
+
+    def chat(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ChatResponse:
+        params = dict(max_tokens=max_tokens, top_p=top_p, stop=stop, tools=tools,
+                      tool_choice=tool_choice, response_format=response_format)
+        key = self._key(messages, temperature, **params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        resp = self.inner.chat(messages, temperature=temperature, metadata=metadata, **params)
+        self._store(key, resp)
+        return resp
+
+    def stream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Iterable[ChatResponse]:
+        """On a hit, yields the cached aggregated response once; on a miss, caches the final item."""
+        params = dict(max_tokens=max_tokens, top_p=top_p, stop=stop, tools=tools,
+                      tool_choice=tool_choice, response_format=response_format)
+        key = self._key(messages, temperature, **params)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        last: Optional[ChatResponse] = None
+        for chunk in self.inner.stream(messages, temperature=temperature, metadata=metadata, **params):
+            last = chunk
+            yield chunk
+        if last is not None:
+            self._store(key, last)
+
+    async def achat(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ChatResponse:
+        params = dict(max_tokens=max_tokens, top_p=top_p, stop=stop, tools=tools,
+                      tool_choice=tool_choice, response_format=response_format)
+        key = self._key(messages, temperature, **params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        resp = await self.inner.achat(messages, temperature=temperature, metadata=metadata, **params)
+        self._store(key, resp)
+        return resp
+
+    async def astream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[ChatResponse]:
+        params = dict(max_tokens=max_tokens, top_p=top_p, stop=stop, tools=tools,
+                      tool_choice=tool_choice, response_format=response_format)
+        key = self._key(messages, temperature, **params)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        last: Optional[ChatResponse] = None
+        async for chunk in self.inner.astream(messages, temperature=temperature, metadata=metadata, **params):
+            last = chunk
+            yield chunk
+        if last is not None:
+            self._store(key, last)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/skip counters and hit rate since construction."""
+        with self._stats_lock:
+            return self.stats.as_dict()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..utils.env import get_env
+
+# Backends that run the same sentence-transformer on CPU with cheaper arithmetic.
+#   torch       - the fp32 model (reference)
+#   torch-int8  - dynamic int8 quantization of the Linear layers
+#   onnx        - ONNX Runtime export of the fp32 model
+#   onnx-int8   - ONNX Runtime export with dynamic int8 quantization
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+_ONNX_QUANT_CONFIG = "avx2"
+
+
+class EncoderHandle:
+    """
+    Uniform handle over an encoder: `handle.model.encode(sentences)` works for every
+    backend, matching how SBERTModel is used by SchemaEmbedder.
+    """
+
+    def __init__(self, model: Any, backend: str, model_path: str) -> None:
+        self.model = model
+        self.backend = backend
+        self.model_path = model_path
+
+
+class SBERTModel(EncoderHandle):
+    """
+    The fp32 sentence-transformer, the reference every other backend is compared against.
+
+    Args:
+        model_path: Path (or hub id) of the sentence-transformer model.
+        device: Torch device; defaults to DBCRAWL_SBERT_DEVICE, else sentence-transformers' choice.
+    """
+
+    def __init__(self, model_path: str, device: Optional[str] = None) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_path, device=device or get_env("DBCRAWL_SBERT_DEVICE"))
+        super().__init__(model, "torch", model_path)
+
+
+def load_encoder(model_path: str, backend: str = "torch") -> Any:
+    """
+    Load `model_path` with the requested backend.
+
+    Args:
+        model_path: Path of the sentence-transformer model.
+        backend: One of BACKENDS.
+
+    Returns:
+        An object exposing `.model.encode(...)`.
+    """
+    if backend == "torch":
+        return SBERTModel(model_path)
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_path, device="cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return EncoderHandle(model, backend, model_path)
+
+    if backend == "onnx":
+        model = SentenceTransformer(model_path, device="cpu", backend="onnx")
+        return EncoderHandle(model, backend, model_path)
+
+    if backend == "onnx-int8":
+        file_name = f"model_qint8_{_ONNX_QUANT_CONFIG}.onnx"
+        if not os.path.isfile(os.path.join(model_path, "onnx", file_name)):
+            # export once next to the model; later loads reuse the quantized file
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+
+            fp32 = SentenceTransformer(model_path, device="cpu", backend="onnx")
+            export_dynamic_quantized_onnx_model(fp32, _ONNX_QUANT_CONFIG, model_path)
+        model = SentenceTransformer(
+            model_path,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": f"onnx/{file_name}"},
+        )
+        return EncoderHandle(model, backend, model_path)
+
+    raise ValueError(f"Unsupported embedding backend: {backend} (expected one of {BACKENDS})")
+
+
+def _normalized(handle: Any, sentences: List[str]) -> np.ndarray:
+    vectors = np.asarray(handle.model.encode(sentences), dtype="float32")
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+def _top_k(vectors: np.ndarray, k: int) -> np.ndarray:
+    # nearest neighbours of every probe among the other probes, by cosine similarity
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1, kind="stable")[:, :k]
+
+
+def encoder_parity(reference: Any, candidate: Any, sentences: List[str], k: int = 10) -> Dict[str, float]:
+    """
+    Compare two encoders on the same sentences.
+
+    Args:
+        reference: Handle of the fp32 model (`.model.encode`).
+        candidate: Handle of the quantized/ONNX model.
+        sentences: Probe sentences, e.g. a sample of catalog column names.
+        k: Neighbourhood size for the top-k agreement.
+
+    Returns:
+        {"min_cosine", "mean_cosine", "max_drift", "topk_agreement"}. Drift is 1 - cosine
+        similarity between the two embeddings of the same sentence. Top-k agreement is the
+        mean overlap of each probe's k nearest probes under both encoders, which is what
+        retrieval over the catalog actually sees.
+    """
+    a = _normalized(reference, sentences)
+    b = _normalized(candidate, sentences)
+    cos = (a * b).sum(axis=1)
+    k = max(1, min(k, len(sentences) - 1))
+    top_a, top_b = _top_k(a, k), _top_k(b, k)
+    overlap = [len(set(x) & set(y)) / k for x, y in zip(top_a.tolist(), top_b.tolist())]
+    return {
+        "min_cosine": float(cos.min()),
+        "mean_cosine": float(cos.mean()),
+        "max_drift": float(1.0 - cos.min()),
+        "topk_agreement": float(np.mean(overlap)),
+    }
+
+
+def check_encoder_parity(
+    reference: Any,
+    candidate: Any,
+    sentences: List[str],
+    max_drift: float = 0.02,
+    min_topk_agreement: float = 0.9,
+    k: int = 10,
+) -> Dict[str, float]:
+    """
+    Raise if the candidate encoder drifts further than `max_drift` from the reference, or if
+    fewer than `min_topk_agreement` of the top-k neighbours agree.
+
+    Returns:
+        The parity report from `encoder_parity`.
+    """
+    report = encoder_parity(reference, candidate, sentences, k=k)
+    if report["max_drift"] > max_drift:
+        raise ValueError(
+            f"Encoder drift {report['max_drift']:.4f} exceeds {max_drift} "
+            f"(mean cosine {report['mean_cosine']:.4f})"
+        )
+    if report["topk_agreement"] < min_topk_agreement:
+        raise ValueError(
+            f"Top-{k} agreement {report['topk_agreement']:.3f} is below {min_topk_agreement}"
+        )
+    return report
+
+
+def _catalog_probes(path: str, limit: int) -> List[str]:
+    """Qualified column names (TABLE_NAME.COLUMN_NAME) from a catalog JSON array or JSON Lines file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = json.load(f)
+    probes: List[str] = []
+    for row in rows:
+        if row.get("COLUMN_NAME"):
+            probes.append(f"{row.get('TABLE_NAME') or ''}.{row['COLUMN_NAME']}".lstrip("."))
+        if len(probes) >= limit:
+            break
+    return probes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parity benchmark of one backend against fp32 torch on catalog column probes:
+
+        python -m db_crawl_agents.llms.embedding_backends catalog.json --backend onnx-int8
+
+    Exits non-zero when the candidate fails `check_encoder_parity`.
+    """
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the fp32 model.")
+    parser.add_argument("catalog", help="Catalog JSON / JSON Lines file to draw probe sentences from")
+    parser.add_argument("--model", default=None, help="Model path; defaults to DBCRAWL_SBERT_MODEL_PATH")
+    parser.add_argument("--backend", default="onnx-int8", choices=BACKENDS[1:])
+    parser.add_argument("--probes", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--max-drift", type=float, default=0.02)
+    parser.add_argument("--min-topk", type=float, default=0.9)
+    args = parser.parse_args(argv)
+
+    from .embedding_registry import default_model_path
+
+    model_path = args.model or default_model_path()
+    sentences = _catalog_probes(args.catalog, args.probes)
+    if len(sentences) < 2:
+        parser.error(f"{args.catalog} has fewer than two column probes")
+    reference = load_encoder(model_path, "torch")
+    candidate = load_encoder(model_path, args.backend)
+    try:
+        report = check_encoder_parity(
+            reference, candidate, sentences, args.max_drift, args.min_topk, args.k
+        )
+    except ValueError as e:
+        print(f"FAIL {args.backend}: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps({"backend": args.backend, "probes": len(sentences), **report}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
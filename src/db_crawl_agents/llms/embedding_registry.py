@@ -0,0 +1,101 @@
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .embedding_backends import load_encoder
+from ..utils.env import get_env
+
+# One loaded model per distinct (model path, backend), shared by every SchemaEmbedder in the process.
+_models: Dict[Tuple[str, str], Any] = {}
+_load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def default_model_path() -> str:
+    """
+    Resolve the default sentence-transformer path.
+
+    Returns:
+        DBCRAWL_SBERT_MODEL_PATH if set, otherwise the packaged all-mpnet-base-v2 under the cwd.
+    """
+    return get_env("DBCRAWL_SBERT_MODEL_PATH") or (
+        f"{os.getcwd()}/sbert_package-0.0.1/sentence_transformer_package/models/all-mpnet-base-v2"
+    )
+
+
+def default_backend() -> str:
+    """DBCRAWL_SBERT_BACKEND if set (torch | torch-int8 | onnx | onnx-int8), otherwise fp32 torch."""
+    return get_env("DBCRAWL_SBERT_BACKEND") or "torch"
+
+
+def get_sbert_model(model_path: Optional[str] = None, backend: Optional[str] = None) -> Any:
+    """
+    Return the shared SBERT model for `model_path` and `backend`, loading it on first use.
+
+    Loading is guarded by a per-model lock, so concurrent callers wait for a single
+    load instead of each reading the weights, and loads of different models do not
+    block each other.
+
+    Args:
+        model_path: Path of the sentence-transformer model; defaults to `default_model_path()`.
+        backend: Encoder backend; defaults to `default_backend()`.
+
+    Returns:
+        The loaded encoder, exposing `.model.encode(...)`.
+    """
+    key = (model_path or default_model_path(), backend or default_backend())
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _load_locks.setdefault(key, threading.Lock())
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            model = load_encoder(*key)
+            _models[key] = model
+    return model
+
+
+def warm_up(
+    model_paths: Optional[Iterable[str]] = None,
+    background: bool = False,
+    backend: Optional[str] = None,
+) -> Optional[threading.Thread]:
+    """
+    Pre-load models at process start so the first request does not pay the load.
+
+    Args:
+        model_paths: Models to load; defaults to the default model.
+        background: Load in a daemon thread and return it instead of blocking.
+        backend: Encoder backend to load.
+
+    Returns:
+        The loader thread when `background` is True, otherwise None.
+    """
+    paths = list(model_paths) if model_paths is not None else [default_model_path()]
+
+    def _load() -> None:
+        for p in paths:
+            get_sbert_model(p, backend)
+
+    if not background:
+        _load()
+        return None
+    t = threading.Thread(target=_load, name="sbert-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def loaded_models() -> List[Tuple[str, str]]:
+    """(model path, backend) pairs currently held in memory."""
+    return list(_models.keys())
+
+
+def release(model_path: Optional[str] = None) -> None:
+    """Drop one model (all of its backends), or every model when `model_path` is None."""
+    with _registry_lock:
+        for key in list(_models.keys()):
+            if model_path is None or key[0] == model_path:
+                _models.pop(key, None)
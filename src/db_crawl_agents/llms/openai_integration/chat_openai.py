@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
 # from ...contracts.
 from  ...contracts.chatmodels import ChatModel
@@ -8,7 +8,7 @@ from ...utils.env import get_env
 from ...utils.errors import LLMError, RateLimitError, AuthError
 
 # OpenAI Python SDK (>=1.0 style)
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from openai import APIStatusError, APIConnectionError, RateLimitError as OpenAIRateLimitError
 
 
@@ -64,6 +64,23 @@ def _convert_tool_calls(raw_tool_calls: Any) -> Optional[List[ToolCall]]:
 
 
 
+def _to_chat_response(resp: Any) -> ChatResponse:
+    """Convert a (non-streaming) chat completion into a ChatResponse."""
+    choice = resp.choices[0]
+    msg = choice.message
+    content = msg.content or ""
+    tool_calls = _convert_tool_calls(getattr(msg, "tool_calls", None))
+
+    return ChatResponse(
+        content=content,
+        model=resp.model,
+        finish_reason=choice.finish_reason,
+        usage=(resp.usage.model_dump() if getattr(resp, "usage", None) else None),
+        tool_calls=tool_calls,
+        raw=resp.model_dump(exclude_none=True),
+    )
+
+
 # I need to use the chat completion api in order to make it compatiple with the the open ai package, once this is stable we will work on the integration of the newest resposne format
 class OpenAIChat(ChatModel):
     """
@@ -94,6 +111,7 @@ class OpenAIChat(ChatModel):
         org = organization or get_env("OPENAI_ORG")
         client = OpenAI(api_key=api_key, organization=org) if org else OpenAI(api_key=api_key)
         self._client = client
+        self._aclient = AsyncOpenAI(api_key=api_key, organization=org) if org else AsyncOpenAI(api_key=api_key)
         self._model = model
         self._timeout = timeout
 
@@ -151,19 +169,7 @@ class OpenAIChat(ChatModel):
         except APIConnectionError as e:
             raise LLMError(f"Network error: {e}") from e
 
-        choice = resp.choices[0]
-        msg = choice.message
-        content = msg.content or ""
-        tool_calls = _convert_tool_calls(getattr(msg, "tool_calls", None))
-
-        return ChatResponse(
-            content=content,
-            model=resp.model,
-            finish_reason=choice.finish_reason,
-            usage=(resp.usage.model_dump() if getattr(resp, "usage", None) else None),
-            tool_calls=tool_calls,
-            raw=resp.model_dump(exclude_none=True),
-        )
+        return _to_chat_response(resp)
 
 # I need to work on this streaming response 
     def stream(
@@ -249,4 +255,132 @@ class OpenAIChat(ChatModel):
             usage=None,
             tool_calls=None,
             raw=final_raw,
-        )
\ No newline at end of file
+        )
+
+    async def achat(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ChatResponse:
+        """
+        Async chat completion on AsyncOpenAI; same arguments and result as `chat`.
+        """
+        try:
+            resp = await self._aclient.chat.completions.create(
+                model=self._model,
+                messages=_convert_messages(messages),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stop=stop,
+                tools=tools,
+                tool_choice=tool_choice,
+                response_format=response_format,
+                timeout=self._timeout,
+                extra_headers={"X-Client-Meta": "db_crawl_agents/openai_chat"},
+                metadata=metadata,
+            )
+        except OpenAIRateLimitError as e:
+            raise RateLimitError(str(e)) from e
+        except APIStatusError as e:
+            if e.status_code == 401:
+                raise AuthError(str(e)) from e
+            raise LLMError(str(e)) from e
+        except APIConnectionError as e:
+            raise LLMError(f"Network error: {e}") from e
+
+        return _to_chat_response(resp)
+
+    async def astream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[ChatResponse]:
+        """
+        Async streaming chat completion.
+
+        Yields:
+            - ChatResponse for each content delta as it arrives.
+            - A final ChatResponse with the aggregated content and tool calls.
+        """
+        accumulated: List[str] = []
+        partial_tools: Dict[int, Dict[str, Any]] = {}
+        finish_reason = None
+        model_name = self._model
+
+        try:
+            stream = await self._aclient.chat.completions.create(
+                model=self._model,
+                messages=_convert_messages(messages),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stop=stop,
+                tools=tools,
+                tool_choice=tool_choice,
+                response_format=response_format,
+                timeout=self._timeout,
+                extra_headers={"X-Client-Meta": "db_crawl_agents/openai_chat"},
+                metadata=metadata,
+                stream=True,
+            )
+            async for chunk in stream:
+                model_name = getattr(chunk, "model", None) or model_name
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                delta = choice.delta
+                # tool call arguments arrive in pieces keyed by index
+                for tc in getattr(delta, "tool_calls", None) or []:
+                    slot = partial_tools.setdefault(tc.index, {"id": None, "name": None, "arguments": []})
+                    slot["id"] = tc.id or slot["id"]
+                    if tc.function is not None:
+                        slot["name"] = tc.function.name or slot["name"]
+                        if tc.function.arguments:
+                            slot["arguments"].append(tc.function.arguments)
+                if delta.content:
+                    accumulated.append(delta.content)
+                    yield ChatResponse(content=delta.content, model=model_name)
+        except OpenAIRateLimitError as e:
+            raise RateLimitError(str(e)) from e
+        except APIStatusError as e:
+            if e.status_code == 401:
+                raise AuthError(str(e)) from e
+            raise LLMError(str(e)) from e
+        except APIConnectionError as e:
+            raise LLMError(f"Network error: {e}") from e
+
+        tool_calls = [
+            ToolCall(
+                id=slot["id"],
+                type="function",
+                function_name=slot["name"],
+                arguments_json="".join(slot["arguments"]),
+            )
+            for _, slot in sorted(partial_tools.items())
+        ]
+        yield ChatResponse(
+            content="".join(accumulated),
+            model=model_name,
+            finish_reason=finish_reason,
+            usage=None,
+            tool_calls=tool_calls or None,
+            raw=None,
+        )
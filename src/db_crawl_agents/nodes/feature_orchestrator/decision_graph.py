@@ -0,0 +1,203 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from ...utils.env import get_env
+
+# node kinds, in dependency order
+INTENT = "intent"
+DRAFT = "draft"
+REFINED = "refined"
+FINAL = "final"
+FEATURE = "feature"
+PLAN = "plan"
+TASK = "task"
+SQL = "sql"
+RESULT = "result"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", (text or "").strip().lower())
+
+
+def stage_key(*parts: Any) -> str:
+    """Content key of a reasoning step: hash of the canonical JSON of everything it depends on."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class DecisionGraphStore:
+    """
+    Property graph of orchestrator runs, persisted in SQLite.
+
+    Nodes are content-addressed reasoning artifacts (intents, drafts, finalized feature sets,
+    features, plans, tasks, SQL, results); edges point from an artifact to the artifacts it
+    was derived from. Because a node's key hashes its inputs, a new run that reaches a step
+    with identical inputs finds the existing node and reuses its payload, so only the stages
+    after the first changed input are recomputed (longest reusable prefix).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file. Defaults to DBCRAWL_DECISION_GRAPH, else ".cache/decision_graph.sqlite".
+        """
+        self.path = path or get_env("DBCRAWL_DECISION_GRAPH") or ".cache/decision_graph.sqlite"
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS nodes (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS edges (
+                src TEXT NOT NULL,
+                dst TEXT NOT NULL,
+                PRIMARY KEY (src, dst)
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                query TEXT,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS run_nodes (
+                run_id TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                reused INTEGER NOT NULL,
+                PRIMARY KEY (run_id, node_id)
+            );
+            CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def node_id(kind: str, key: str) -> str:
+        return f"{kind}:{key}"
+
+    def start_run(self, query_text: str = "") -> str:
+        run_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("INSERT INTO runs VALUES (?, ?, ?)", (run_id, query_text, time.time()))
+            self._conn.commit()
+        return run_id
+
+    def lookup(self, kind: str, key: str, run_id: Optional[str] = None) -> Optional[Any]:
+        """
+        Returns the payload of a previously recorded step, or None.
+        When `run_id` is given, the hit is attached to that run as a reused node.
+        """
+        nid = self.node_id(kind, key)
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM nodes WHERE id = ?", (nid,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE nodes SET hits = hits + 1 WHERE id = ?", (nid,))
+            if run_id:
+                self._conn.execute("INSERT OR IGNORE INTO run_nodes VALUES (?, ?, 1)", (run_id, nid))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def record(
+        self,
+        kind: str,
+        key: str,
+        payload: Any,
+        parents: Iterable[Optional[str]] = (),
+        run_id: Optional[str] = None,
+    ) -> str:
+        """Upserts a node with its dependency edges and returns its id."""
+        nid = self.node_id(kind, key)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO nodes (id, kind, payload, created) VALUES (?, ?, ?, ?)",
+                (nid, kind, json.dumps(payload, default=str), time.time()),
+            )
+            for parent in parents:
+                if parent:
+                    self._conn.execute("INSERT OR IGNORE INTO edges VALUES (?, ?)", (nid, parent))
+            if run_id:
+                self._conn.execute("INSERT OR IGNORE INTO run_nodes VALUES (?, ?, 0)", (run_id, nid))
+            self._conn.commit()
+        return nid
+
+    # ---- downstream artifacts (decomposition and execution) ----
+    def record_plan(self, feature_node: str, plan: Any, run_id: Optional[str] = None) -> str:
+        """Records a DecomposerPlan under a feature node, with one task node per task."""
+        data = plan.model_dump() if hasattr(plan, "model_dump") else plan
+        plan_node = self.record(PLAN, stage_key(feature_node, data), data, [feature_node], run_id)
+        for task in data.get("tasks", []):
+            self.record(TASK, stage_key(plan_node, task), task, [plan_node], run_id)
+        return plan_node
+
+    def record_result(self, plan_node: str, result: Any, run_id: Optional[str] = None) -> str:
+        """Records a SingleCTEResult as SQL and result nodes under the task it executed."""
+        # JSON mode drops the Arrow preview table
+        data = result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+        task_nodes = [
+            n["id"] for n in self.children(plan_node, TASK)
+            if n["payload"].get("task_id") == data.get("task_id")
+        ]
+        task_node = task_nodes[0] if task_nodes else plan_node
+        sql_node = self.record(SQL, stage_key(task_node, data.get("sql", "")), {"sql": data.get("sql", "")}, [task_node], run_id)
+        return self.record(RESULT, stage_key(sql_node, data), data, [sql_node], run_id)
+
+    # ---- inspection ----
+    def children(self, node_id: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT n.id, n.kind, n.payload FROM edges e JOIN nodes n ON n.id = e.src WHERE e.dst = ?",
+                (node_id,),
+            ).fetchall()
+        return [
+            {"id": i, "kind": k, "payload": json.loads(p)}
+            for i, k, p in rows if kind is None or k == kind
+        ]
+
+    def run_summary(self, run_id: str) -> Dict[str, List[str]]:
+        """Node ids of a run split into reused and computed."""
+        with self._lock:
+            rows = self._conn.execute("SELECT node_id, reused FROM run_nodes WHERE run_id = ?", (run_id,)).fetchall()
+        return {
+            "reused": [n for n, r in rows if r],
+            "computed": [n for n, r in rows if not r],
+        }
+
+    def to_networkx(self, run_id: Optional[str] = None):
+        """
+        Exports the graph (or one run's subgraph) as a networkx.DiGraph; edges point from
+        an artifact to its dependencies. Requires networkx.
+        """
+        import networkx as nx
+
+        g = nx.DiGraph()
+        with self._lock:
+            if run_id is None:
+                nodes = self._conn.execute("SELECT id, kind, payload, hits FROM nodes").fetchall()
+            else:
+                nodes = self._conn.execute(
+                    "SELECT n.id, n.kind, n.payload, n.hits FROM nodes n JOIN run_nodes r ON r.node_id = n.id WHERE r.run_id = ?",
+                    (run_id,),
+                ).fetchall()
+            edges = self._conn.execute("SELECT src, dst FROM edges").fetchall()
+        for nid, kind, payload, hits in nodes:
+            g.add_node(nid, kind=kind, payload=json.loads(payload), hits=hits)
+        for src, dst in edges:
+            if src in g and dst in g:
+                g.add_edge(src, dst)
+        return g
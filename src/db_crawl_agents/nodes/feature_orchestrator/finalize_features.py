@@ -8,12 +8,24 @@ from ...utils.feature_orchestrator.LLMAdapter import RunnableLLMAdapter
 
 
 def finalize_node(llm:RunnableLLMAdapter, draft: FeatureDraft, max_features: int) -> FinalizedFeatures:
+    system = llm.render_system("finalize", max_features=max_features)
+    raw = llm.generate(system=system, prompt=_finalize_prompt(draft, max_features), json_expected=True)
+    return _finalized_from_raw(raw)
+
+
+async def afinalize_node(llm:RunnableLLMAdapter, draft: FeatureDraft, max_features: int) -> FinalizedFeatures:
+    """Async variant of `finalize_node`."""
+    system = llm.render_system("finalize", max_features=max_features)
+    raw = await llm.agenerate(system=system, prompt=_finalize_prompt(draft, max_features), json_expected=True)
+    return _finalized_from_raw(raw)
+
+
+def _finalize_prompt(draft: FeatureDraft, max_features: int) -> str:
     policy_applied: List[Feature] = enforce_basic_policies(
         draft.proposed_features, max_features=max_features
     )
 
-    system = llm.render_system("finalize", max_features=max_features)
-    prompt = f"""Finalize the following features (JSON list). Ensure naming and id invariants:
+    return f"""Finalize the following features (JSON list). Ensure naming and id invariants:
 - name is UPPER_SNAKE_CASE
 - id == "feat." + name
 
@@ -22,8 +34,9 @@ Return JSON with keys: features (list), rationale (string).
 Features:
 {[f.model_dump() for f in policy_applied]}
 """
-    raw = llm.generate(system=system, prompt=prompt, json_expected=True)
 
+
+def _finalized_from_raw(raw) -> FinalizedFeatures:
     feats = [Feature(**f) for f in raw.get("features", [])]
     rationale = raw.get("rationale", "Finalized.")
     return FinalizedFeatures(features=feats, rationale=rationale)
\ No newline at end of file
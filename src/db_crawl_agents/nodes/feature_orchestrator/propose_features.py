@@ -8,14 +8,24 @@ from ...contracts.feature_orchestrator.feature_orchestrator import (
 
 from ...utils.feature_orchestrator.LLMAdapter import RunnableLLMAdapter
 
-def propose_features_node(llm: RunnableLLMAdapter, intents: str, max_features: int) -> FeatureDraft:
-    system = llm.render_system("propose", max_features=max_features)
-    prompt = f"""Key intents (normalized summary expected in output too):
+def _propose_prompt(intents: str) -> str:
+    return f"""Key intents (normalized summary expected in output too):
 {intents}
 
 Return the SINGLE JSON object exactly as specified in the system message."""
-    raw = llm.generate(system=system, prompt=prompt, json_expected=True)
 
+def propose_features_node(llm: RunnableLLMAdapter, intents: str, max_features: int) -> FeatureDraft:
+    system = llm.render_system("propose", max_features=max_features)
+    raw = llm.generate(system=system, prompt=_propose_prompt(intents), json_expected=True)
+    return _draft_from_raw(raw, intents)
+
+async def apropose_features_node(llm: RunnableLLMAdapter, intents: str, max_features: int) -> FeatureDraft:
+    """Async variant of `propose_features_node`."""
+    system = llm.render_system("propose", max_features=max_features)
+    raw = await llm.agenerate(system=system, prompt=_propose_prompt(intents), json_expected=True)
+    return _draft_from_raw(raw, intents)
+
+def _draft_from_raw(raw: Dict[str, Any], intents: str) -> FeatureDraft:
     # Robust parsing / soft-coercion
     try:
         feats = [Feature(**f) for f in raw.get("proposed_features", [])]
@@ -15,6 +15,33 @@ def refine_with_feedback_node(
     feedback: Feedback,
     max_features: int,
 ) -> FeatureDraft:
+    feats = _apply_deterministic_edits(draft, feedback)
+    if feedback.accept_all:
+        return _accepted_draft(draft, feats)
+
+    # LLM semantic refinement (incl. refreshing questions/assumptions if needed)
+    system = llm.render_system("refine")
+    raw = llm.generate(system=system, prompt=_refine_prompt(draft, feats, feedback, max_features), json_expected=True)
+    return _refined_from_raw(raw, draft)
+
+
+async def arefine_with_feedback_node(
+    llm: RunnableLLMAdapter,
+    draft: FeatureDraft,
+    feedback: Feedback,
+    max_features: int,
+) -> FeatureDraft:
+    """Async variant of `refine_with_feedback_node`."""
+    feats = _apply_deterministic_edits(draft, feedback)
+    if feedback.accept_all:
+        return _accepted_draft(draft, feats)
+
+    system = llm.render_system("refine")
+    raw = await llm.agenerate(system=system, prompt=_refine_prompt(draft, feats, feedback, max_features), json_expected=True)
+    return _refined_from_raw(raw, draft)
+
+
+def _apply_deterministic_edits(draft: FeatureDraft, feedback: Feedback) -> List[Feature]:
     feats: List[Feature] = list(draft.proposed_features)
 
     # deterministic edits first
@@ -33,20 +60,22 @@ def refine_with_feedback_node(
                     setattr(f, k, v)
                 f.id = f"feat.{f.name}"  # keep invariant
         feats = list(by_name.values())
+    return feats
 
-    if feedback.accept_all:
-        return FeatureDraft(
-            normalized_user_intent=draft.normalized_user_intent,
-            proposed_features=feats,
-            questions_for_user=draft.questions_for_user,
-            needs_user_confirmation=draft.needs_user_confirmation,
-            assumptions=draft.assumptions,
-        )
 
-    # LLM semantic refinement (incl. refreshing questions/assumptions if needed)
-    system = llm.render_system("refine")
+def _accepted_draft(draft: FeatureDraft, feats: List[Feature]) -> FeatureDraft:
+    return FeatureDraft(
+        normalized_user_intent=draft.normalized_user_intent,
+        proposed_features=feats,
+        questions_for_user=draft.questions_for_user,
+        needs_user_confirmation=draft.needs_user_confirmation,
+        assumptions=draft.assumptions,
+    )
+
+
+def _refine_prompt(draft: FeatureDraft, feats: List[Feature], feedback: Feedback, max_features: int) -> str:
     feature_json = [f.model_dump() for f in feats]
-    prompt = f"""Refine these feature specs given feedback, and update questions/assumptions if needed.
+    return f"""Refine these feature specs given feedback, and update questions/assumptions if needed.
 
 Feedback:
 {feedback.text}
@@ -66,8 +95,9 @@ Constraints:
 - Keep to <= {max_features} total features.
 
 Return the FULL JSON object (same schema as draft)."""
-    raw = llm.generate(system=system, prompt=prompt, json_expected=True)
 
+
+def _refined_from_raw(raw, draft: FeatureDraft) -> FeatureDraft:
     # parse refined
     refined_feats = [Feature(**f) for f in raw.get("proposed_features", [])]
     return FeatureDraft(
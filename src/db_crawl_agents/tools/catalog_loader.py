@@ -0,0 +1,174 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# rows per batch handed to the embedder; bounds the parsed rows held at once
+DEFAULT_BATCH_SIZE = 5000
+# bytes read per chunk by the stdlib JSON array streamer
+READ_CHUNK = 1 << 20
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+CatalogSource = Union[str, os.PathLike, Iterable[Dict[str, Any]]]
+
+
+def has_examples(row: Dict[str, Any]) -> bool:
+  """Whether a catalog row carries EXAMPLES; rows without them are not embedded."""
+  return row.get("EXAMPLES") not in (None, [], "null")
+
+
+def _iter_json_array_stdlib(fh) -> Iterator[Any]:
+  """
+  Incrementally decodes the items of a top-level JSON array, holding at most one item plus
+  one read chunk in memory.
+  """
+  decoder = json.JSONDecoder()
+  buf = ""
+  pos = 0
+  started = False
+  eof = False
+  while True:
+    while pos < len(buf) and buf[pos] in " \t\r\n,":
+      pos += 1
+    if not started and pos < len(buf):
+      if buf[pos] != "[":
+        raise ValueError("The file must contain a JSON array of dictionaries.")
+      started = True
+      pos += 1
+      continue
+    if pos < len(buf) and buf[pos] == "]":
+      return
+    if pos < len(buf):
+      try:
+        item, end = decoder.raw_decode(buf, pos)
+      except json.JSONDecodeError:
+        if eof:
+          raise
+      else:
+        # an item ending exactly at the buffer edge may be a truncated scalar; only objects and
+        # arrays are self-delimiting
+        if end < len(buf) or eof or buf[end - 1] in "}]":
+          yield item
+          pos = end
+          continue
+    if eof:
+      if not started or pos < len(buf):
+        raise ValueError("Unexpected end of JSON array.")
+      raise ValueError("Unterminated JSON array.")
+    chunk = fh.read(READ_CHUNK)
+    eof = not chunk
+    buf = buf[pos:] + chunk
+    pos = 0
+
+
+def _iter_json_array(path: str) -> Iterator[Any]:
+  try:
+    import ijson # optional C-backed incremental parser
+  except ImportError:
+    with open(path, "r", encoding="utf-8") as fh:
+      yield from _iter_json_array_stdlib(fh)
+    return
+  with open(path, "rb") as fh:
+    yield from ijson.items(fh, "item", use_float=True)
+
+
+def _iter_jsonl(path: str) -> Iterator[Any]:
+  with open(path, "r", encoding="utf-8") as fh:
+    for line in fh:
+      line = line.strip()
+      if line:
+        yield json.loads(line)
+
+
+def _iter_parquet(path: str, skip_empty_examples: bool) -> Iterator[Dict[str, Any]]:
+  import pyarrow.compute as pc
+  import pyarrow.parquet as pq
+  pf = pq.ParquetFile(path)
+  for batch in pf.iter_batches(batch_size=DEFAULT_BATCH_SIZE):
+    if skip_empty_examples and "EXAMPLES" in batch.schema.names:
+      examples = batch.column("EXAMPLES")
+      keep = pc.is_valid(examples)
+      if hasattr(examples.type, "value_type"): # list<...>: also drop empty lists
+        keep = pc.and_(keep, pc.greater(pc.fill_null(pc.list_value_length(examples), 0), 0))
+      batch = batch.filter(keep)
+    yield from batch.to_pylist()
+
+
+def iter_catalog_rows(source: CatalogSource, skip_empty_examples: bool = False) -> Iterator[Dict[str, Any]]:
+  """
+  Streams catalog rows from a file or an in-memory iterable.
+
+  Files are read incrementally by extension: `.jsonl`/`.ndjson` line by line, `.parquet` by
+  record batch, anything else as a top-level JSON array (with ijson when installed, otherwise a
+  chunked stdlib decoder), so memory stays bounded by one row or batch regardless of file size.
+
+  Args:
+    source (Union[str, PathLike, Iterable[dict]]): Catalog file path or rows.
+    skip_empty_examples (bool): Drop rows without EXAMPLES while parsing.
+
+  Returns:
+    Iterator[dict]: CatalogRow-shaped dicts.
+  """
+  if isinstance(source, (str, os.PathLike)):
+    path = os.fspath(source)
+    if not os.path.isfile(path):
+      raise ValueError("The provided string is not a valid file path.")
+    lower = path.lower()
+    if lower.endswith(PARQUET_SUFFIXES):
+      rows = _iter_parquet(path, skip_empty_examples)
+    elif lower.endswith(JSONL_SUFFIXES):
+      rows = _iter_jsonl(path)
+    else:
+      rows = _iter_json_array(path)
+  else:
+    rows = iter(source)
+  for row in rows:
+    if not isinstance(row, dict):
+      raise ValueError("The file must contain a JSON array of dictionaries.")
+    if skip_empty_examples and not has_examples(row):
+      continue
+    yield row
+
+
+def iter_catalog_batches(
+  source: CatalogSource,
+  batch_size: int = DEFAULT_BATCH_SIZE,
+  skip_empty_examples: bool = True,
+  row_model: Optional[type] = None,
+) -> Iterator[List[Any]]:
+  """
+  Streams catalog rows in batches, e.g. straight into `SchemaEmbedder.embed_column_names`.
+
+  Args:
+    source (Union[str, PathLike, Iterable[dict]]): Catalog file path or rows.
+    batch_size (int): Rows per batch.
+    skip_empty_examples (bool): Drop rows without EXAMPLES while parsing (the embedder ignores them).
+    row_model (Optional[type]): Pydantic model (e.g. CatalogRow) each row is validated into;
+      rows stay plain dicts when None.
+
+  Returns:
+    Iterator[List]: Batches of at most `batch_size` rows.
+  """
+  batch: List[Any] = []
+  for row in iter_catalog_rows(source, skip_empty_examples=skip_empty_examples):
+    batch.append(row_model.model_validate(row) if row_model is not None else row)
+    if len(batch) >= batch_size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+
+def load_catalog(source: CatalogSource, skip_empty_examples: bool = False) -> List[Dict[str, Any]]:
+  """
+  Loads a whole catalog as a list of rows, parsing files incrementally (see `iter_catalog_rows`)
+  so the raw file text is never held in memory alongside the parsed rows.
+  """
+  if isinstance(source, list) and not skip_empty_examples:
+    return source
+  try:
+    return list(iter_catalog_rows(source, skip_empty_examples=skip_empty_examples))
+  except ValueError as e:
+    if isinstance(source, (str, os.PathLike)) and os.path.isfile(os.fspath(source)):
+      raise ValueError(f"Error reading catalog file: {e}")
+    raise
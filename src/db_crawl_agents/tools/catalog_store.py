@@ -0,0 +1,268 @@
+import hashlib
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .catalog_loader import CatalogSource, iter_catalog_rows
+from .sql_validator import ROW_COUNT_FIELDS, CatalogIndex, _u, get_catalog_index
+
+# CatalogRow fields held column-wise; anything else a row carries is kept in a sparse side table
+TABLE_FIELDS = ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME")
+CODED_FIELDS = (
+  "catalog", "COLUMN_NAME", "DATA_TYPE", "OBJECT_TYPE", "IS_NULLABLE",
+  "ORDINAL_POSITION", "IS_PRIMARY_KEY", "IS_UNIQUE", "comment",
+)
+FIELDS = ("catalog",) + TABLE_FIELDS + CODED_FIELDS[1:-1] + ("EXAMPLES", "comment")
+_TABLE_POS = {k: p for p, k in enumerate(TABLE_FIELDS)}
+
+# codes stored in place of a string id
+NONE, ABSENT, OTHER = -1, -2, -3 # value None, key missing, non-string value (kept in `_other`)
+
+
+class StringPool:
+  """Interns strings to dense integer ids."""
+  __slots__ = ("_ids", "values")
+
+  def __init__(self):
+    self._ids: Dict[str, int] = {}
+    self.values: List[str] = []
+
+  def intern(self, value: str) -> int:
+    i = self._ids.get(value)
+    if i is None:
+      i = self._ids[value] = len(self.values)
+      self.values.append(value)
+    return i
+
+  def id_of(self, value: str) -> Optional[int]:
+    return self._ids.get(value)
+
+  def __len__(self) -> int:
+    return len(self.values)
+
+
+class CatalogRowView(Mapping):
+  """
+  Read-only, lazily materialized catalog row. Behaves like the CatalogRow-shaped dict it was
+  built from (`row["COLUMN_NAME"]`, `row.get("EXAMPLES")`, `{**row}`, `==`), without holding one,
+  and like a CatalogRow model for attribute access (`row.COLUMN_NAME`; absent optional fields
+  such as SCHEMA_NAME read as None).
+  """
+  __slots__ = ("_store", "_i")
+
+  def __init__(self, store: "CatalogStore", i: int):
+    self._store = store
+    self._i = i
+
+  @property
+  def row_id(self) -> int:
+    return self._i
+
+  def __getitem__(self, key: str) -> Any:
+    return self._store._value(self._i, key)
+
+  def get(self, key: str, default: Any = None) -> Any:
+    try:
+      return self._store._value(self._i, key)
+    except KeyError:
+      return default
+
+  def __getattr__(self, name: str) -> Any:
+    if name.startswith("_"):
+      raise AttributeError(name)
+    try:
+      return self._store._value(self._i, name)
+    except KeyError:
+      if name in FIELDS:
+        return None
+      raise AttributeError(name) from None
+
+  def __iter__(self) -> Iterator[str]:
+    return self._store._keys(self._i)
+
+  def __len__(self) -> int:
+    return sum(1 for _ in self._store._keys(self._i))
+
+  def __repr__(self) -> str:
+    return f"CatalogRowView({self.to_dict()!r})"
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {k: self[k] for k in self}
+
+  def to_model(self, model: type):
+    """Validates the row into a pydantic model, e.g. contracts.planner.CatalogRow."""
+    return model.model_validate(self.to_dict())
+
+
+class CatalogStore:
+  """
+  Immutable columnar catalog shared by RAG, validation and planning.
+
+  Strings are interned once in a StringPool; each row is a position in integer arrays: a table
+  id (-> interned DATABASE/SCHEMA/TABLE names), one interned id per CatalogRow string field
+  (COLUMN_NAME, DATA_TYPE, key flags, ...) and a flat, offset-indexed array of interned
+  EXAMPLES. Rows are exposed as CatalogRowView mappings created on access, so code written
+  against `List[dict]` catalogs works unchanged. Values that are not
+  strings (or are extra CatalogRow fields) are kept per row in a sparse side table, so every
+  row reads back exactly as given.
+  """
+
+  def __init__(self):
+    self.strings = StringPool()
+    self._tables: List[Tuple[int, int, int]] = [] # interned (DATABASE_NAME, SCHEMA_NAME, TABLE_NAME) codes
+    self._table_ids: Dict[Tuple[int, int, int], int] = {}
+    self._table_of = array("i")
+    self._coded: Dict[str, array] = {f: array("i") for f in CODED_FIELDS}
+    self._examples_state = array("b") # 0: list of strings, NONE / ABSENT / OTHER as for codes
+    self._examples_offsets = array("I", [0])
+    self._examples = array("i")
+    self._other: Dict[int, Dict[str, Any]] = {} # row -> non-string or extra fields, in row order
+    self._version: Optional[str] = None
+    self._index: Optional[CatalogIndex] = None
+
+  # ---- construction ----
+  @classmethod
+  def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "CatalogStore":
+    """Builds a store from CatalogRow-shaped dicts (or pydantic CatalogRow objects)."""
+    store = cls()
+    for row in rows:
+      if hasattr(row, "model_dump"):
+        row = row.model_dump(exclude_unset=True)
+      store._append(row)
+    return store
+
+  @classmethod
+  def from_source(cls, source: CatalogSource, skip_empty_examples: bool = False) -> "CatalogStore":
+    """Builds a store straight from a catalog file (streamed, see `catalog_loader`) or rows."""
+    return cls.from_rows(iter_catalog_rows(source, skip_empty_examples=skip_empty_examples))
+
+  def _code(self, row: Dict[str, Any], key: str, i: int) -> int:
+    if key not in row:
+      return ABSENT
+    value = row[key]
+    if value is None:
+      return NONE
+    if isinstance(value, str):
+      return self.strings.intern(value)
+    self._other.setdefault(i, {})[key] = value
+    return OTHER
+
+  def _append(self, row: Dict[str, Any]) -> None:
+    i = len(self._table_of)
+    table = tuple(self._code(row, k, i) for k in TABLE_FIELDS)
+    tid = self._table_ids.get(table)
+    if tid is None:
+      tid = self._table_ids[table] = len(self._tables)
+      self._tables.append(table)
+    self._table_of.append(tid)
+    for f in CODED_FIELDS:
+      self._coded[f].append(self._code(row, f, i))
+    examples = row.get("EXAMPLES", ...)
+    if examples is ...:
+      self._examples_state.append(ABSENT)
+    elif examples is None:
+      self._examples_state.append(NONE)
+    elif isinstance(examples, list) and all(isinstance(v, str) for v in examples):
+      self._examples_state.append(0)
+      self._examples.extend(self.strings.intern(v) for v in examples)
+    else:
+      self._examples_state.append(OTHER)
+      self._other.setdefault(i, {})["EXAMPLES"] = examples
+    self._examples_offsets.append(len(self._examples))
+    for key, value in row.items():
+      if key not in FIELDS:
+        self._other.setdefault(i, {})[key] = value
+
+  # ---- row access ----
+  def _value(self, i: int, key: str) -> Any:
+    pos = _TABLE_POS.get(key)
+    if pos is not None:
+      code = self._tables[self._table_of[i]][pos]
+    elif key == "EXAMPLES":
+      code = self._examples_state[i]
+      if code == 0:
+        values = self.strings.values
+        return [values[c] for c in self._examples[self._examples_offsets[i]:self._examples_offsets[i + 1]]]
+    else:
+      coded = self._coded.get(key)
+      if coded is None:
+        extra = self._other.get(i)
+        if extra is not None and key in extra:
+          return extra[key]
+        raise KeyError(key)
+      code = coded[i]
+    if code >= 0:
+      return self.strings.values[code]
+    if code == NONE:
+      return None
+    if code == OTHER:
+      return self._other[i][key]
+    raise KeyError(key)
+
+  def _keys(self, i: int) -> Iterator[str]:
+    table = self._tables[self._table_of[i]]
+    for key in FIELDS:
+      if key in _TABLE_POS:
+        code = table[_TABLE_POS[key]]
+      elif key == "EXAMPLES":
+        code = self._examples_state[i]
+      else:
+        code = self._coded[key][i]
+      if code != ABSENT:
+        yield key
+    for key in self._other.get(i, ()):
+      if key not in FIELDS:
+        yield key
+
+  def __len__(self) -> int:
+    return len(self._table_of)
+
+  def __getitem__(self, i: int) -> CatalogRowView:
+    if not -len(self) <= i < len(self):
+      raise IndexError(i)
+    return CatalogRowView(self, i % len(self))
+
+  def __iter__(self) -> Iterator[CatalogRowView]:
+    return (CatalogRowView(self, i) for i in range(len(self)))
+
+  # ---- shared derived structures ----
+  @property
+  def version(self) -> str:
+    """
+    Identity version of the catalog, computed once from the arrays. Equal to
+    `sql_validator.catalog_identity_version` over the same rows, so a store and the list it was
+    built from share one cached CatalogIndex.
+    """
+    if self._version is None:
+      upper = [v.upper() for v in self.strings.values]
+      tables: Dict[int, str] = {}
+      h = hashlib.sha1()
+      for i, tid in enumerate(self._table_of):
+        ident = tables.get(tid)
+        if ident is None:
+          ident = tables[tid] = "\x1f".join(self._upper(c, i, k, upper) for c, k in zip(self._tables[tid], TABLE_FIELDS))
+        parts = [ident] + [self._upper(self._coded[k][i], i, k, upper) for k in ("COLUMN_NAME", "IS_PRIMARY_KEY", "IS_UNIQUE")]
+        extra = self._other.get(i, {})
+        parts += [_u(extra.get(k)) for k in ROW_COUNT_FIELDS]
+        h.update("\x1f".join(parts).encode("utf-8"))
+        h.update(b"\n")
+      self._version = h.hexdigest()
+    return self._version
+
+  def _upper(self, code: int, i: int, key: str, upper: List[str]) -> str:
+    if code >= 0:
+      return upper[code]
+    return _u(self._other[i][key]) if code == OTHER else ""
+
+  def index(self) -> CatalogIndex:
+    """The name-resolution index used by validation and cost estimation, built once per store."""
+    if self._index is None:
+      self._index = get_catalog_index(self, self.version)
+    return self._index
+
+
+def as_catalog_store(rows: Any) -> CatalogStore:
+  """Returns `rows` when it already is a CatalogStore, else builds one from rows or a catalog path."""
+  if isinstance(rows, CatalogStore):
+    return rows
+  return CatalogStore.from_source(rows)
@@ -0,0 +1,364 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.env import get_env
+
+# permutations per MinHash signature; the Jaccard estimate's standard error is ~1/sqrt(NUM_PERM)
+NUM_PERM = 64
+# LSH banding of a signature: LSH_BANDS bands of NUM_PERM / LSH_BANDS rows. Two columns become
+# candidates with probability 1 - (1 - J^rows)^bands; 32 x 2 puts the 50% point near J = 0.15,
+# low enough for keys whose EXAMPLES are small random samples of the same domain.
+LSH_BANDS = 32
+# HyperLogLog precision: 2^HLL_P one-byte registers per column, ~1.04 / sqrt(2^HLL_P) relative error
+HLL_P = 8
+MAX_CACHED_STORES = 4
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+# fixed permutation parameters, so signatures are comparable across processes and runs
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_value(value: Any) -> str:
+  """Canonical text of a sample value: trimmed and upper-cased, so '  pn123' and 'PN123' collide."""
+  return str(value).strip().upper()
+
+
+def value_hashes(values: Iterable[Any]) -> np.ndarray:
+  """Stable 64-bit hashes of the distinct, non-empty normalized values."""
+  distinct = {normalize_value(v) for v in values if v is not None}
+  distinct.discard("")
+  return np.fromiter(
+    (int.from_bytes(hashlib.blake2b(v.encode("utf-8"), digest_size=8).digest(), "big") for v in distinct),
+    dtype=np.uint64,
+    count=len(distinct),
+  )
+
+
+def _minhash(hv: np.ndarray) -> np.ndarray:
+  with np.errstate(over="ignore"):
+    perm = (np.outer(hv & _MAX_HASH, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+  return perm.min(axis=0).astype(np.uint32)
+
+
+def minhash_signature(values: Iterable[Any]) -> Optional[np.ndarray]:
+  """
+  MinHash signature (NUM_PERM uint32 minima) of a column's values, or None without values.
+
+  Args:
+    values (Iterable): Sample values, e.g. a catalog row's EXAMPLES.
+
+  Returns:
+    Optional[np.ndarray]: uint32 array of length NUM_PERM.
+  """
+  hv = value_hashes(values)
+  return _minhash(hv) if hv.size else None
+
+
+def estimate_jaccard(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[float]:
+  """Estimated Jaccard similarity of the value sets behind two signatures; None if either is missing."""
+  if a is None or b is None:
+    return None
+  return float(np.count_nonzero(a == b)) / len(a)
+
+
+def hll_registers(hv: np.ndarray, p: int = HLL_P) -> np.ndarray:
+  """HyperLogLog registers (2^p uint8) of 64-bit value hashes."""
+  registers = np.zeros(1 << p, dtype=np.uint8)
+  low_bits = 64 - p
+  mask = (1 << low_bits) - 1
+  for h in hv.tolist():
+    rest = h & mask
+    rank = low_bits - rest.bit_length() + 1
+    idx = h >> low_bits
+    if rank > registers[idx]:
+      registers[idx] = rank
+  return registers
+
+
+def hll_cardinality(registers: np.ndarray) -> float:
+  """HyperLogLog estimate with the small-range (linear counting) correction."""
+  m = len(registers)
+  alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+  estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int32))))
+  zeros = int(np.count_nonzero(registers == 0))
+  if estimate <= 2.5 * m and zeros:
+    return m * math.log(m / zeros)
+  return estimate
+
+
+def column_key(row: Dict[str, Any]) -> str:
+  """"DB.SCHEMA.TABLE.COLUMN" of a catalog row, upper-cased."""
+  parts = [row.get(k) for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME")]
+  return ".".join(str(p).upper() for p in parts if p)
+
+
+class SketchStore:
+  """
+  Per-column MinHash signatures and HyperLogLog registers, with a banded LSH index answering
+  "which columns likely share values with X".
+
+  Sketches are built from catalog EXAMPLES (`from_catalog`) and can be refined with values read
+  by the executor (`add_sample`); both merge losslessly (element-wise min / max). The LSH index
+  keeps, per band, the sorted band hashes of all columns, so a lookup is LSH_BANDS binary searches
+  plus a vectorized Jaccard ranking of the candidates.
+  """
+
+  def __init__(self, hll_p: int = HLL_P):
+    self.hll_p = hll_p
+    self.columns: List[str] = []
+    self.sources: List[str] = [] # "examples", "sample" or "examples+sample"
+    self._ids: Dict[str, int] = {}
+    self._sigs: List[np.ndarray] = []
+    self._hll: List[np.ndarray] = []
+    self._lock = threading.Lock()
+    self._matrix: Optional[np.ndarray] = None
+    self._bands: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+
+  def __len__(self) -> int:
+    return len(self.columns)
+
+  def __contains__(self, column: str) -> bool:
+    return column.upper() in self._ids
+
+  # ---- building ----
+  @classmethod
+  def from_catalog(cls, rows: Iterable[Dict[str, Any]], hll_p: int = HLL_P) -> "SketchStore":
+    """Sketches every catalog column that has EXAMPLES."""
+    store = cls(hll_p)
+    for r in rows:
+      examples = r.get("EXAMPLES")
+      if isinstance(examples, list) and examples:
+        store.add(column_key(r), examples)
+    return store
+
+  def add(self, column: str, values: Iterable[Any], source: str = "examples") -> bool:
+    """
+    Adds values to a column's sketch, merging with what is already there.
+
+    Returns:
+      bool: False when `values` held no usable value.
+    """
+    hv = value_hashes(values)
+    if hv.size == 0:
+      return False
+    sig, reg = _minhash(hv), hll_registers(hv, self.hll_p)
+    column = column.upper()
+    with self._lock:
+      i = self._ids.get(column)
+      if i is None:
+        self._ids[column] = len(self.columns)
+        self.columns.append(column)
+        self.sources.append(source)
+        self._sigs.append(sig)
+        self._hll.append(reg)
+      else:
+        self._sigs[i] = np.minimum(self._sigs[i], sig)
+        self._hll[i] = np.maximum(self._hll[i], reg)
+        if source not in self.sources[i].split("+"):
+          self.sources[i] = f"{self.sources[i]}+{source}"
+      self._matrix = None
+      self._bands = None
+    return True
+
+  def add_sample(self, table: str, sample: Any) -> int:
+    """
+    Refines the sketches of a table's columns with values read by the executor, e.g. a preview's
+    `ExecutionResult.arrow_table` or `sample_rows` over `SELECT * FROM table TABLESAMPLE (...)`.
+
+    Args:
+      table (str): "DB.SCHEMA.TABLE" the sample was read from.
+      sample: pyarrow.Table / RecordBatch, or a list of row dicts.
+
+    Returns:
+      int: Columns updated.
+    """
+    if hasattr(sample, "column_names"):
+      columns = {name: sample.column(name).to_pylist() for name in sample.column_names}
+    else:
+      columns: Dict[str, List[Any]] = {}
+      for row in sample or []:
+        for name, value in row.items():
+          columns.setdefault(name, []).append(value)
+    return sum(self.add(f"{table}.{name}", values, source="sample") for name, values in columns.items())
+
+  def discard_table(self, table: str) -> int:
+    """
+    Drops the sketches of a table's columns, e.g. before re-sampling a changed table (merging
+    would keep the old values). Returns the number of columns dropped.
+    """
+    prefix = table.upper() + "."
+    with self._lock:
+      keep = [i for i, c in enumerate(self.columns) if not c.startswith(prefix)]
+      dropped = len(self.columns) - len(keep)
+      if dropped:
+        self.columns = [self.columns[i] for i in keep]
+        self.sources = [self.sources[i] for i in keep]
+        self._sigs = [self._sigs[i] for i in keep]
+        self._hll = [self._hll[i] for i in keep]
+        self._ids = {c: i for i, c in enumerate(self.columns)}
+        self._matrix = None
+        self._bands = None
+    return dropped
+
+  # ---- lookups ----
+  def signature(self, column: str) -> Optional[np.ndarray]:
+    i = self._ids.get(column.upper())
+    return self._sigs[i] if i is not None else None
+
+  def cardinality(self, column: str) -> Optional[float]:
+    """Estimated distinct values seen for the column (EXAMPLES and samples, not the full table)."""
+    i = self._ids.get(column.upper())
+    return hll_cardinality(self._hll[i]) if i is not None else None
+
+  def jaccard(self, a: str, b: str) -> Optional[float]:
+    return estimate_jaccard(self.signature(a), self.signature(b))
+
+  def containment(self, a: str, b: str) -> Optional[float]:
+    """Estimated share of a's values that also occur in b, |A ∩ B| / |A| (from Jaccard and HLL sizes)."""
+    j = self.jaccard(a, b)
+    if j is None:
+      return None
+    na, nb = self.cardinality(a), self.cardinality(b)
+    if not na:
+      return 0.0
+    return min(1.0, j * (na + nb) / ((1 + j) * na))
+
+  def _index(self) -> Tuple[np.ndarray, List[Tuple[np.ndarray, np.ndarray]]]:
+    with self._lock:
+      if self._matrix is None or self._bands is None:
+        matrix = np.vstack(self._sigs) if self._sigs else np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self._matrix = matrix
+        self._bands = [(np.sort(keys), np.argsort(keys, kind="stable")) for keys in self._band_keys(matrix).T]
+      return self._matrix, self._bands
+
+  @staticmethod
+  def _band_keys(sigs: np.ndarray) -> np.ndarray:
+    rows = NUM_PERM // LSH_BANDS
+    mixed = sigs.astype(np.uint64) * _BAND_MIX
+    with np.errstate(over="ignore"):
+      return mixed.reshape(len(sigs), LSH_BANDS, rows).sum(axis=2, dtype=np.uint64)
+
+  def similar(self, column: Any, k: int = 10, min_jaccard: float = 0.0) -> List[Tuple[str, float]]:
+    """
+    Columns whose values likely overlap with `column`'s, best first.
+
+    Args:
+      column: A column key ("DB.SCHEMA.TABLE.COLUMN"), a MinHash signature, or raw values.
+      k (int): Maximum results.
+      min_jaccard (float): Minimum estimated Jaccard similarity.
+
+    Returns:
+      List[Tuple[str, float]]: (column key, estimated Jaccard) pairs; the column itself is excluded.
+    """
+    own = None
+    if isinstance(column, str):
+      own = self._ids.get(column.upper())
+      sig = self._sigs[own] if own is not None else None
+    elif isinstance(column, np.ndarray):
+      sig = column
+    else:
+      sig = minhash_signature(column)
+    if sig is None or not self.columns:
+      return []
+    matrix, bands = self._index()
+    query = self._band_keys(sig[None, :])[0]
+    hits = []
+    for b, (keys, order) in enumerate(bands):
+      lo = np.searchsorted(keys, query[b], side="left")
+      hi = np.searchsorted(keys, query[b], side="right")
+      if hi > lo:
+        hits.append(order[lo:hi])
+    if not hits:
+      return []
+    cand = np.unique(np.concatenate(hits))
+    if own is not None:
+      cand = cand[cand != own]
+    scores = np.count_nonzero(matrix[cand] == sig, axis=1) / NUM_PERM
+    keep = scores >= min_jaccard
+    cand, scores = cand[keep], scores[keep]
+    top = np.argsort(-scores, kind="stable")[:k]
+    return [(self.columns[int(cand[t])], float(scores[t])) for t in top]
+
+  # ---- persistence ----
+  def save(self, path: str) -> None:
+    """Writes the store as a compressed .npz next to the catalog (atomically)."""
+    matrix, _ = self._index()
+    hll = np.vstack(self._hll) if self._hll else np.zeros((0, 1 << self.hll_p), dtype=np.uint8)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, columns=np.array(self.columns, dtype=str), sources=np.array(self.sources, dtype=str),
+                        signatures=matrix, hll=hll, hll_p=np.array(self.hll_p))
+    os.replace(tmp, path)
+
+  @classmethod
+  def load(cls, path: str) -> "SketchStore":
+    data = np.load(path, allow_pickle=False)
+    store = cls(int(data["hll_p"]))
+    store.columns = [str(c) for c in data["columns"]]
+    store.sources = [str(s) for s in data["sources"]]
+    store._ids = {c: i for i, c in enumerate(store.columns)}
+    store._sigs = list(data["signatures"])
+    store._hll = list(data["hll"])
+    return store
+
+
+_store_cache: "OrderedDict[str, SketchStore]" = OrderedDict()
+_store_lock = threading.Lock()
+
+
+def _cache_store(catalog_version: str, store: SketchStore) -> None:
+  with _store_lock:
+    _store_cache[catalog_version] = store
+    _store_cache.move_to_end(catalog_version)
+    while len(_store_cache) > MAX_CACHED_STORES:
+      _store_cache.popitem(last=False)
+
+
+def publish_sketch_store(store: SketchStore, catalog_version: str, cache_dir: Optional[str] = None) -> Optional[str]:
+  """
+  Registers sketches built elsewhere (e.g. by the schema crawler from sampled reads) as the sketches
+  of a catalog version, so `get_sketch_store` returns them instead of rebuilding from EXAMPLES.
+
+  Returns:
+    Optional[str]: The file written under `cache_dir` (default DBCRAWL_SKETCH_DIR), if any.
+  """
+  _cache_store(catalog_version, store)
+  cache_dir = cache_dir or get_env("DBCRAWL_SKETCH_DIR")
+  if not cache_dir:
+    return None
+  os.makedirs(cache_dir, exist_ok=True)
+  path = os.path.join(cache_dir, f"{catalog_version}.sketches.npz")
+  store.save(path)
+  return path
+
+
+def get_sketch_store(rows: Iterable[Dict[str, Any]], catalog_version: str, cache_dir: Optional[str] = None) -> SketchStore:
+  """
+  Returns the sketches of a catalog version: from memory, from `<cache_dir>/<version>.sketches.npz`
+  (cache_dir defaults to DBCRAWL_SKETCH_DIR), or built from EXAMPLES and persisted there.
+  """
+  with _store_lock:
+    store = _store_cache.get(catalog_version)
+    if store is not None:
+      _store_cache.move_to_end(catalog_version)
+      return store
+  cache_dir = cache_dir or get_env("DBCRAWL_SKETCH_DIR")
+  path = os.path.join(cache_dir, f"{catalog_version}.sketches.npz") if cache_dir else None
+  if path and os.path.isfile(path):
+    store = SketchStore.load(path)
+  else:
+    store = SketchStore.from_catalog(rows)
+    if path:
+      os.makedirs(cache_dir, exist_ok=True)
+      store.save(path)
+  _cache_store(catalog_version, store)
+  return store
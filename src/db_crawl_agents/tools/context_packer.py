@@ -0,0 +1,122 @@
+from typing import Any, Dict, List
+import json
+import math
+
+try:
+  import tiktoken
+except ImportError: # optional: fall back to a character heuristic
+  tiktoken = None
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# catalog field -> packed key; anything not listed (retrieval bookkeeping, ordinal positions, ...) is dropped
+_COLUMN_FIELDS = (
+  ("COLUMN_NAME", "column"),
+  ("DATA_TYPE", "type"),
+  ("IS_PRIMARY_KEY", "pk"),
+  ("IS_UNIQUE", "unique"),
+  ("IS_NULLABLE", "nullable"),
+  ("comment", "comment"),
+)
+
+_encoders: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+  """
+  Counts tokens with the model tokenizer (tiktoken); without tiktoken, estimates ~4 characters per token.
+  """
+  if tiktoken is None:
+    return math.ceil(len(text) / 4)
+  enc = _encoders.get(encoding_name)
+  if enc is None:
+    enc = _encoders[encoding_name] = tiktoken.get_encoding(encoding_name)
+  return len(enc.encode(text))
+
+
+def _dumps(obj: Any) -> str:
+  return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _table_key(row: Dict[str, Any]) -> str:
+  return ".".join(str(row[k]) for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME") if row.get(k))
+
+
+def _database_type(row: Dict[str, Any]) -> str:
+  """The row's data asset / database type (CatalogRow `catalog`), lower-cased as in task.database_type."""
+  return str(row.get("catalog") or "").lower()
+
+
+def _compact_column(row: Dict[str, Any], max_examples: int, max_example_chars: int) -> Dict[str, Any]:
+  out: Dict[str, Any] = {}
+  for field, key in _COLUMN_FIELDS:
+    value = row.get(field)
+    if value not in (None, "", [], "null"):
+      out[key] = value
+  examples = row.get("EXAMPLES")
+  if isinstance(examples, list):
+    trimmed = [str(v)[:max_example_chars] for v in examples[:max_examples] if v is not None]
+    if trimmed:
+      out["examples"] = trimmed
+  return out
+
+
+def pack_columns(
+  rows: List[Dict[str, Any]],
+  token_budget: int = 2000,
+  max_examples: int = 3,
+  max_example_chars: int = 40,
+  encoding_name: str = DEFAULT_ENCODING,
+) -> str:
+  """
+  Packs retrieved catalog rows into a compact JSON context that fits a token budget.
+
+  Columns are grouped under a header per "DB.SCHEMA.TABLE" carrying the table's database type
+  (the CatalogRow `catalog` field), null fields are dropped and EXAMPLES are truncated. Columns
+  are admitted best-first (by `score` when present, otherwise in the given order) until the
+  budget is spent, so the highest-scoring columns always survive.
+
+  Args:
+    rows (List[dict]): Retrieved catalog rows (CatalogRow-shaped dicts).
+    token_budget (int): Maximum tokens of the returned string.
+    max_examples (int): Examples kept per column.
+    max_example_chars (int): Characters kept per example value.
+    encoding_name (str): tiktoken encoding used for counting.
+
+  Returns:
+    str: JSON array [{"table": "DB.SCHEMA.TABLE", "database_type": ..., "columns": [{"column": ...,
+    "type": ..., "examples": [...]}, ...]}, ...], tables in order of their best column.
+  """
+  ranked = list(rows)
+  if any("score" in r for r in ranked):
+    ranked.sort(key=lambda r: r.get("score", 0.0), reverse=True)
+
+  grouped: Dict[str, Dict[str, Any]] = {}
+  admitted: List[str] = [] # table of each admitted column, in admission (score) order
+  used = count_tokens("[]", encoding_name)
+  for row in ranked:
+    table = _table_key(row)
+    column = _compact_column(row, max_examples, max_example_chars)
+    # cost of the column fragment, plus the table header the first time the table appears
+    cost = count_tokens(_dumps(column), encoding_name) + 1
+    header = None
+    if table not in grouped:
+      header = {"table": table, "database_type": _database_type(row), "columns": []}
+      cost += count_tokens(_dumps(header), encoding_name) + 1
+    if used + cost > token_budget:
+      continue
+    if header is not None:
+      grouped[table] = header
+    grouped[table]["columns"].append(column)
+    admitted.append(table)
+    used += cost
+
+  # fragment counts are additive estimates; verify the exact count and drop the lowest-ranked columns if needed
+  packed = _dumps(list(grouped.values()))
+  while admitted and count_tokens(packed, encoding_name) > token_budget:
+    last_table = admitted.pop()
+    grouped[last_table]["columns"].pop()
+    if not grouped[last_table]["columns"]:
+      del grouped[last_table]
+    packed = _dumps(list(grouped.values()))
+  return packed
@@ -0,0 +1,343 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from ..utils.env import get_env
+from .sql_validator import CatalogIndex, TableKey
+
+# fraction of a table assumed to survive a pushed-down WHERE predicate
+FILTER_SELECTIVITY = 0.1
+# row multiplier assumed for a join whose keys are unique on neither side
+MANY_TO_MANY_FANOUT = 10.0
+
+
+def _env_int(name: str, default: int) -> int:
+  value = get_env(name)
+  return int(float(value)) if value else default
+
+
+@dataclass
+class CostBudget:
+  """
+  Limits a preview must stay under. Defaults can be overridden with DBCRAWL_PREVIEW_* env vars.
+
+  Attributes:
+    max_scan_rows: Estimated rows read across all source tables.
+    max_result_rows: Estimated rows produced by the largest intermediate (after join fan-out).
+    full_scan_rows: Tables above this size are flagged when read without a pushed-down filter.
+    unknown_table_rows: Row count assumed for tables without catalog row counts.
+    rewrite: When the estimate is over budget, cap unfiltered large driving (FROM) tables
+      (`(SELECT * FROM t LIMIT rewrite_rows)`) instead of rejecting. Joined tables are never
+      capped, so every capped row keeps all of its join matches.
+    rewrite_rows: Row cap used by the rewrite.
+  """
+  max_scan_rows: int = 200_000_000
+  max_result_rows: int = 50_000_000
+  full_scan_rows: int = 10_000_000
+  unknown_table_rows: int = 1_000_000
+  rewrite: bool = True
+  rewrite_rows: int = 100_000
+
+  @classmethod
+  def from_env(cls) -> "CostBudget":
+    d = cls()
+    return cls(
+      max_scan_rows=_env_int("DBCRAWL_PREVIEW_MAX_SCAN_ROWS", d.max_scan_rows),
+      max_result_rows=_env_int("DBCRAWL_PREVIEW_MAX_RESULT_ROWS", d.max_result_rows),
+      full_scan_rows=_env_int("DBCRAWL_PREVIEW_FULL_SCAN_ROWS", d.full_scan_rows),
+      unknown_table_rows=d.unknown_table_rows,
+      rewrite=(get_env("DBCRAWL_PREVIEW_REWRITE", "1") not in ("0", "false", "False")),
+      rewrite_rows=_env_int("DBCRAWL_PREVIEW_REWRITE_ROWS", d.rewrite_rows),
+    )
+
+
+@dataclass
+class CostEstimate:
+  scan_rows: float = 0.0
+  result_rows: float = 0.0
+  unfiltered_tables: List[str] = field(default_factory=list) # large tables read without a pushed-down filter
+  many_to_many_joins: List[str] = field(default_factory=list)
+  warnings: List[str] = field(default_factory=list)
+  source: str = "heuristic" # "heuristic" | "explain"
+
+  def over_budget(self, budget: CostBudget) -> List[str]:
+    reasons = []
+    if self.scan_rows > budget.max_scan_rows:
+      reasons.append(f"estimated scan {self.scan_rows:,.0f} rows > budget {budget.max_scan_rows:,}")
+    if self.result_rows > budget.max_result_rows:
+      reasons.append(f"estimated intermediate {self.result_rows:,.0f} rows > budget {budget.max_result_rows:,}")
+    return reasons
+
+
+@dataclass
+class GuardDecision:
+  action: str # "allow" | "rewrite" | "reject"
+  sql: str
+  estimate: CostEstimate
+  reasons: List[str] = field(default_factory=list)
+
+
+def _fqn(key: TableKey) -> str:
+  return ".".join(p for p in key if p)
+
+
+def _table_rows(index: CatalogIndex, keys: List[TableKey], budget: CostBudget, warnings: List[str], label: str) -> float:
+  counts = [index.row_counts[k] for k in keys if k in index.row_counts]
+  if not counts:
+    warnings.append(f"No row count for {label}; assuming {budget.unknown_table_rows:,}.")
+    return float(budget.unknown_table_rows)
+  return float(max(counts))
+
+
+def _is_unique(index: CatalogIndex, keys: List[TableKey], cols: Set[str]) -> bool:
+  return any(cols & index.unique_columns.get(k, set()) for k in keys)
+
+
+def _join_columns(on: List[str]) -> Tuple[Set[str], Set[str]]:
+  """
+  (left columns, right columns) of a JoinEdge.on list. Entries are a column shared by both sides
+  ("CUSTOMER_ID") or a "LEFT_COL=RIGHT_COL" pair for differently named keys, as emitted by
+  `join_graph.JoinCandidate.on`.
+  """
+  left: Set[str] = set()
+  right: Set[str] = set()
+  for entry in on:
+    l, _, r = entry.partition("=")
+    l = l.strip().split(".")[-1].upper()
+    left.add(l)
+    right.add(r.strip().split(".")[-1].upper() if r else l)
+  return left, right
+
+
+def _sample_fraction(table: exp.Table) -> Optional[float]:
+  """Fraction read by a `TABLESAMPLE (p PERCENT)` on the table, if any."""
+  sample = table.args.get("sample")
+  percent = sample.args.get("percent") if sample is not None else None
+  try:
+    return float(percent.name) / 100.0 if percent is not None else None
+  except ValueError:
+    return None
+
+
+def _where_aliases(scope: Scope, tables: Dict[str, List[TableKey]], index: CatalogIndex) -> Set[str]:
+  """Aliases of the scope's tables referenced by its WHERE clause (predicates the engine can push down)."""
+  where = scope.expression.args.get("where")
+  if where is None:
+    return set()
+  hit: Set[str] = set()
+  for col in where.find_all(exp.Column):
+    qualifier = col.table.upper()
+    if qualifier:
+      hit.add(qualifier)
+      continue
+    name = col.name.upper()
+    for alias, keys in tables.items():
+      if any(name in index.columns.get(k, ()) for k in keys):
+        hit.add(alias)
+  return hit
+
+
+def estimate_sql(sql: str, index: CatalogIndex, budget: CostBudget, dialect: str = "spark") -> CostEstimate:
+  """
+  Heuristic cost of a SELECT from catalog row counts and key flags.
+
+  Each table read adds its row count to the scan (x FILTER_SELECTIVITY when the scope's WHERE
+  references it, capped by a bare `SELECT * ... LIMIT n`). Each equi-join whose keys are
+  PRIMARY KEY/UNIQUE on neither side is flagged many-to-many and multiplies the scope's
+  rows by MANY_TO_MANY_FANOUT; joins without an equality condition are treated as cartesian.
+  """
+  est = CostEstimate()
+  try:
+    root = sqlglot.parse_one(sql, read=dialect)
+  except ParseError as e:
+    est.warnings.append(f"Cost estimate skipped; SQL does not parse: {e}")
+    return est
+
+  out_rows: Dict[int, float] = {} # estimated output rows per scope; children are visited first
+  for scope in traverse_scope(root):
+    select = scope.expression
+    tables: Dict[str, List[TableKey]] = {}
+    sampled: Dict[str, float] = {}
+    derived: Dict[str, float] = {}
+    for alias, (_, source) in scope.selected_sources.items():
+      if isinstance(source, exp.Table):
+        tables[alias.upper()] = index.resolve_table(source.catalog, source.db, source.name)
+        fraction = _sample_fraction(source)
+        if fraction is not None:
+          sampled[alias.upper()] = fraction
+      elif isinstance(source, Scope):
+        derived[alias.upper()] = out_rows.get(id(source.expression), 0.0)
+    if not tables and not derived:
+      continue
+    filtered = _where_aliases(scope, tables, index)
+    limit = select.args.get("limit")
+    bare_limit = None
+    if limit is not None and not select.args.get("joins") and not select.args.get("group") and not select.args.get("order"):
+      try:
+        bare_limit = int(limit.expression.name)
+      except (AttributeError, ValueError):
+        bare_limit = None
+
+    rows: Dict[str, float] = {}
+    for alias, keys in tables.items():
+      label = _fqn(keys[0]) if keys else alias
+      n = _table_rows(index, keys, budget, est.warnings, label)
+      if alias in sampled:
+        n *= sampled[alias]
+      if bare_limit is not None:
+        n = min(n, float(bare_limit))
+      elif alias in filtered:
+        n *= FILTER_SELECTIVITY
+      elif n > budget.full_scan_rows and alias not in sampled:
+        est.unfiltered_tables.append(label)
+      rows[alias] = n
+      est.scan_rows += n
+    rows.update(derived)
+
+    scope_rows = max(rows.values())
+    for join in select.args.get("joins") or []:
+      right = join.this
+      right_alias = (right.alias_or_name or "").upper()
+      on = join.args.get("on")
+      pairs = [eq for eq in (on.find_all(exp.EQ) if on is not None else [])
+               if isinstance(eq.left, exp.Column) and isinstance(eq.right, exp.Column)]
+      if not pairs:
+        if join.args.get("using"):
+          continue
+        scope_rows *= max(rows.get(right_alias, 1.0), 1.0)
+        est.many_to_many_joins.append(f"{right_alias}: no equality join condition (cartesian)")
+        continue
+      sides: Dict[str, Set[str]] = {}
+      for eq in pairs:
+        for col in (eq.left, eq.right):
+          sides.setdefault(col.table.upper(), set()).add(col.name.upper())
+      unique = [a for a, cols in sides.items() if a in tables and _is_unique(index, tables[a], cols)]
+      unresolved = [a for a in sides if a not in tables]
+      if not unique and not unresolved:
+        scope_rows *= MANY_TO_MANY_FANOUT
+        est.many_to_many_joins.append(f"{' x '.join(sorted(sides))} on {', '.join(sorted(set().union(*sides.values())))}")
+    if bare_limit is not None:
+      scope_rows = min(scope_rows, float(bare_limit))
+    out_rows[id(select)] = scope_rows
+    est.result_rows = max(est.result_rows, scope_rows)
+  return est
+
+
+def estimate_task(task: Any, index: CatalogIndex, budget: CostBudget) -> CostEstimate:
+  """
+  Pre-SQL estimate for a SingleCTETaskDefinition from its source tables and `join_plan`.
+  A task with a time window or filter hint is assumed to push a filter into every source.
+  """
+  est = CostEstimate()
+  filtered = bool(task.time_window_hint or task.filters_hint)
+  rows: Dict[str, float] = {}
+  for src in task.source_tables:
+    keys = index.resolve_fqn(src.fqn_table)
+    n = _table_rows(index, keys, budget, est.warnings, src.fqn_table)
+    if filtered:
+      n *= FILTER_SELECTIVITY
+    elif n > budget.full_scan_rows:
+      est.unfiltered_tables.append(src.fqn_table)
+    rows[src.fqn_table] = n
+    est.scan_rows += n
+  est.result_rows = max(rows.values()) if rows else 0.0
+  for edge in task.join_plan:
+    left_cols, right_cols = _join_columns(edge.on)
+    left, right = index.resolve_fqn(edge.left_table), index.resolve_fqn(edge.right_table)
+    if not left or not right:
+      continue
+    if not _is_unique(index, left, left_cols) and not _is_unique(index, right, right_cols):
+      est.result_rows *= MANY_TO_MANY_FANOUT
+      est.many_to_many_joins.append(f"{edge.left_table} x {edge.right_table} on {', '.join(edge.on)}")
+  return est
+
+
+def cap_unfiltered_tables(sql: str, index: CatalogIndex, budget: CostBudget, dialect: str = "spark") -> str:
+  """
+  Rewrites the driving (FROM) table of each query block into `(SELECT * FROM t LIMIT budget.rewrite_rows) alias`
+  when it is large and read without a filter, so the preview reads a bounded slice of the fact table.
+  Joined tables are left whole: capping them independently would drop most join matches.
+  """
+  root = sqlglot.parse_one(sql, read=dialect)
+  for scope in traverse_scope(root):
+    from_ = scope.expression.args.get("from") or scope.expression.args.get("from_")
+    table = from_.this if from_ is not None else None
+    if not isinstance(table, exp.Table) or _sample_fraction(table) is not None:
+      continue
+    if not any(source is table for _, source in scope.selected_sources.values()):
+      continue # a CTE reference
+    alias = table.alias_or_name.upper()
+    keys = index.resolve_table(table.catalog, table.db, table.name)
+    if alias in _where_aliases(scope, {alias: keys}, index):
+      continue
+    rows = max((index.row_counts.get(k, budget.unknown_table_rows) for k in keys), default=budget.unknown_table_rows)
+    if rows <= budget.full_scan_rows:
+      continue
+    bare = table.copy()
+    bare.set("alias", None)
+    table.replace(exp.select("*").from_(bare).limit(budget.rewrite_rows).subquery(table.alias_or_name))
+  return root.sql(dialect=dialect)
+
+
+def guard_sql(
+  sql: str,
+  index: CatalogIndex,
+  budget: Optional[CostBudget] = None,
+  explain: Optional[Callable[[str], Optional[float]]] = None,
+  dialect: str = "spark",
+) -> GuardDecision:
+  """
+  Decides whether a preview may run.
+
+  Args:
+    sql (str): Generated SQL.
+    index (CatalogIndex): Catalog index with row counts and key flags.
+    budget (Optional[CostBudget]): Limits; defaults to `CostBudget.from_env()`.
+    explain (Optional[Callable]): Engine estimate of rows scanned (e.g. from EXPLAIN COST); when it
+      returns a number it replaces the heuristic scan estimate.
+    dialect (str): sqlglot dialect.
+
+  Returns:
+    GuardDecision: "allow" the SQL when the estimate is within budget; otherwise "rewrite" it with
+    a capped driving table when that brings it under budget, else "reject" it.
+  """
+  budget = budget or CostBudget.from_env()
+  est = estimate_sql(sql, index, budget, dialect)
+  if explain is not None:
+    engine_rows = explain(sql)
+    if engine_rows is not None and not math.isnan(engine_rows):
+      est.scan_rows, est.source = float(engine_rows), "explain"
+  reasons = est.over_budget(budget)
+  if not reasons:
+    est.warnings.extend(f"No pushed-down filter on {t}." for t in est.unfiltered_tables)
+    return GuardDecision("allow", sql, est)
+  reasons = reasons + [f"no pushed-down filter on {t}" for t in est.unfiltered_tables]
+  if budget.rewrite and est.unfiltered_tables:
+    rewritten = cap_unfiltered_tables(sql, index, budget, dialect)
+    if rewritten != sqlglot.parse_one(sql, read=dialect).sql(dialect=dialect):
+      capped = estimate_sql(rewritten, index, budget, dialect)
+      if not capped.over_budget(budget):
+        return GuardDecision("rewrite", rewritten, capped, reasons)
+      reasons = capped.over_budget(budget)
+  return GuardDecision("reject", sql, est, reasons)
+
+
+def guard_task(task: Any, index: CatalogIndex, budget: Optional[CostBudget] = None) -> Tuple[bool, List[str]]:
+  """
+  Pre-execution check of a candidate task. When the budget allows rewrites, only join fan-out
+  rejects a task: an oversized scan is left to the SQL-level guard, which can cap the reads.
+
+  Returns:
+    Tuple[bool, List[str]]: (allowed, reasons).
+  """
+  budget = budget or CostBudget.from_env()
+  est = estimate_task(task, index, budget)
+  reasons = est.over_budget(budget)
+  if budget.rewrite:
+    reasons = [r for r in reasons if not r.startswith("estimated scan")]
+  return not reasons, reasons + [f"many-to-many join: {j}" for j in est.many_to_many_joins if reasons]
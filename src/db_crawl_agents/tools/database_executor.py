@@ -1,41 +1,47 @@
-import re
-from typing import List, Dict, Any, Tuple
-# Very light SQL guards; feel free to replace with a proper SQL parser
-_SELECT_ONLY = re.compile(r"^\s*(with\s+.*?select|select)\b", re.IGNORECASE | re.DOTALL)
-FQN = re.compile(r"\b([A-Za-z0-9]+)\.([A-Za-z0-9_]+)\.([A-Za-z0-9_]+)\.([A-Za-z0-9_]+)\b")
-def static_validate(sql: str, columns_catalog: List[Dict[str, Any]], grain: str | None) -> Tuple[bool, List[str]]:
-  print("sql",sql)
-  errs: List[str] = []
-  sql = (sql or "").strip()
-  if not sql:
-    return False, ["Empty SQL."]
-  if not _SELECT_ONLY.search(sql):
-    errs.append("SQL must be SELECT-only (CTEs ending in SELECT).")
- # Catalog check for FQNs
-  cat = set(f"{r['DATABASE_NAME']}.{r['SCHEMA_NAME']}.{r['TABLE_NAME']}.{r['COLUMN_NAME']}" for r in columns_catalog)
-  for fqn in set(m.group(0) for m in _FQN.finditer(sql)):
-    if fqn not in cat:
-      errs.append(f"Column not in catalog: {fqn}")
- # Require final SELECT to include grain (best-effort)
-  if grain:
-    if re.search(rf"\b{re.escape(grain)}\b", sql, re.IGNORECASE) is None:
-      errs.append(f"Grain '{grain}' not visible in final projection (heuristic).")
-  return (len(errs) == 0), errs
+import time, re
+from typing import List, Dict, Any, Optional, Tuple
+from ..contracts.single_cte.execution_results import ExecutionResult
+from .spark_session_manager import get_session_manager
+from .preview_sampling import ENGINE_DIALECTS, SampleSpec, render_sampled, sample_sql
+from .local_executor import LOCAL_ENGINES, get_local_engine
+from .sql_validator import get_catalog_index, validate_sql
+from ..utils.env import get_env
 
 
+def static_validate(
+  sql: str,
+  columns_catalog: List[Dict[str, Any]],
+  grain: Optional[str],
+  catalog_version: Optional[str] = None,
+) -> Tuple[bool, List[str]]:
+  """
+  Validates a generated statement against the catalog before it is previewed.
 
+  The SQL is parsed once (sqlglot); CTE names and table aliases are resolved per scope and
+  every column reference is checked against a catalog index that is built once per catalog
+  version and reused across calls.
 
-import time, re
-from contracts.execution_result import ExecutionResult
-from pyspark.sql import SparkSession
+  Args:
+    sql (str): Generated SQL.
+    columns_catalog (List[dict]): Catalog rows.
+    grain (Optional[str]): Column expected in the final projection.
+    catalog_version (Optional[str]): Version id of `columns_catalog`, when the caller has one.
 
-spark = SparkSession.builder.master("local[1]").appName("DataPuller").getOrCreate()
+  Returns:
+    Tuple[bool, List[str]]: (ok, all validation errors).
+  """
+  index = get_catalog_index(columns_catalog, catalog_version)
+  report = validate_sql(sql, index, grain)
+  return report.ok, report.errors
 
 
 def create_connection(data_asset, config_dict):
   """
   Creates a connection to the specified data asset.
 
+  Sessions and reader configurations are cached by the process-wide
+  SparkSessionManager, so repeated previews do not re-apply spark.conf settings.
+
   Args:
     data_asset (str): The type of data asset ('AIP', 'ATLAS', 'SNOWFLAKE').
     config_dict (dict): Configuration dictionary containing connection details.
@@ -43,48 +49,90 @@ def create_connection(data_asset, config_dict):
   Returns:
     Spark DataFrame reader object configured for the data asset.
   """
-  if data_asset == 'AIP':
-    for param, value in config_dict['options'].items():
-      spark.conf.set(param, value)
-    return spark.read.format("com.databricks.spark.sqldw") \
-      .option("url", config_dict['SQLDW_URL']) \
-      .option("tempDir", config_dict['POLYBASE_STORAGE_PATH']) \
-      .option("enableServicePrincipalAuth", "true") \
-      .option("useAzureMSI", "true")
-
-  elif data_asset == 'ATLAS':
-    for param, value in config_dict['options'].items():
-      spark.conf.set(param, value)
-    return spark.read.format("com.databricks.spark.sqldw") \
-      .option("url", config_dict['SQLDW_URL_ATLAS']) \
-      .option("tempDir", config_dict['POLYBASE_STORAGE_PATH_ATLAS']) \
-      .option("enableServicePrincipalAuth", "true") \
-      .option("useAzureMSI", "true")
-
-  elif data_asset == 'SNOWFLAKE':
-    return spark.read.format(config_dict['SNOWFLAKE_SOURCE_NAME']) \
-      .options(**config_dict['options'])
-
-  else:
-    raise ValueError(f"Unsupported data asset: {data_asset}")
+  return get_session_manager().reader(data_asset, config_dict)
+
+
+def _collect_arrow(df, limit: int):
+  """
+  Collects the first `limit` rows of a Spark DataFrame as a pyarrow.Table: natively on
+  pyspark >= 4 (DataFrame.toArrow), otherwise column-wise from the collected rows.
+  """
+  import pyarrow as pa
+  head = df.limit(limit)
+  if hasattr(head, "toArrow"):
+    return head.toArrow()
+  rows = head.collect()
+  return pa.Table.from_arrays([pa.array([r[i] for r in rows]) for i in range(len(df.columns))], names=df.columns)
 
 
 _SELECT_ONLY = re.compile(r"^\s*(with\s+.*?select|select)\b", re.IGNORECASE | re.DOTALL)
-def run_preview_spark(sql: str,data_asset,config_dict, limit: int = 5, timeout_s: int = 20) -> ExecutionResult:
+def run_preview_spark(
+  sql: str,
+  data_asset,
+  config_dict,
+  limit: int = 5,
+  timeout_s: int = 20,
+  sample: Optional[SampleSpec] = None,
+  index=None,
+) -> ExecutionResult:
+  """
+  Runs a LIMIT preview of a generated SELECT through the data asset's connector.
+
+  Args:
+    sql (str): Generated SQL (spark_sql dialect).
+    data_asset (str): 'AIP', 'ATLAS' or 'SNOWFLAKE'.
+    config_dict (dict): Connection details.
+    limit (int): Rows returned.
+    timeout_s (int): Preview time limit.
+    sample (Optional[SampleSpec]): When set, source tables are rewritten to deterministic samples
+      (seeded TABLESAMPLE or pre-materialized sample tables) and the query is rendered in the
+      engine's dialect, so the preview reads a bounded fraction of each table. Without it, SQL
+      that already carries TABLESAMPLE clauses is still rendered in the engine's dialect.
+    index (Optional[CatalogIndex]): Catalog index used to resolve tables and row counts when sampling.
+  """
  # data_asset = None
  # config_dict = None
   print(data_asset,config_dict)
-  connection = create_connection(data_asset, config_dict)
   if not _SELECT_ONLY.search(sql):
     return ExecutionResult(engine="spark", success=False, rowcount=0, error="Non-SELECT blocked.")
+  warnings: List[str] = []
+  dialect = ENGINE_DIALECTS.get(data_asset, "spark")
+  try:
+    if sample is not None:
+      sql = sample_sql(sql, sample, index, write=dialect)
+      warnings.append(f"Sampled preview: {sample.percent:g}% per table, seed {sample.seed}.")
+    else: # sampled by the caller (single_cte samples before the cost guard): render it for the engine
+      sql = render_sampled(sql, write=dialect)
+  except Exception as e:
+    return ExecutionResult(engine="spark", success=False, rowcount=0, error=f"Sampling rewrite failed: {e}")
+  connection = create_connection(data_asset, config_dict)
   wrapped = f"SELECT * FROM (\n{sql}\n) preview LIMIT {int(limit)}"
   t0 = time.time()
   try:
     df = connection.option("query", wrapped).load()
-    rows = df.take(limit)
-    cols = df.columns
-    sample = [dict(zip(cols, r)) for r in rows]
+    table = _collect_arrow(df, limit)
     schema = [{"name": f.name, "type": str(f.dataType)} for f in df.schema.fields]
-    return ExecutionResult(engine="spark", success=True, rowcount=len(sample), sample_rows=sample, schema_field=schema, elapsed_ms=int((time.time()-t0)*1000))
+    return ExecutionResult(engine="spark", success=True, rowcount=table.num_rows, schema_field=schema, elapsed_ms=int((time.time()-t0)*1000), warnings=warnings, arrow_table=table)
   except Exception as e:
-    return ExecutionResult(engine="spark", success=False, rowcount=0, error=str(e),elapsed_ms=int((time.time()-t0)*1000))
\ No newline at end of file
+    return ExecutionResult(engine="spark", success=False, rowcount=0, error=str(e),elapsed_ms=int((time.time()-t0)*1000))
+
+
+def run_preview(
+  sql: str,
+  data_asset,
+  config_dict,
+  limit: int = 5,
+  timeout_s: int = 20,
+  sample: Optional[SampleSpec] = None,
+  index=None,
+) -> ExecutionResult:
+  """
+  Runs a preview on the engine selected by DBCRAWL_PREVIEW_ENGINE: "spark" (default) goes through
+  the data asset's connector, "duckdb" or "sqlite" run in-process over the local extracts in
+  DBCRAWL_LOCAL_EXTRACTS_DIR (see `local_executor.LocalPreviewEngine`). Arguments as for
+  `run_preview_spark`; `data_asset` and `config_dict` are ignored by the local engines.
+  """
+  engine = (get_env("DBCRAWL_PREVIEW_ENGINE", "spark") or "spark").lower()
+  if engine in LOCAL_ENGINES:
+    return get_local_engine(engine).run_preview(sql, limit=limit, timeout_s=timeout_s, sample=sample, index=index)
+  return run_preview_spark(sql, data_asset, config_dict, limit=limit, timeout_s=timeout_s, sample=sample, index=index)
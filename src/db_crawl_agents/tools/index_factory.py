@@ -0,0 +1,199 @@
+from dataclasses import dataclass
+from typing import Optional
+import logging
+import math
+
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+# FAISS recommends ~39 training points per IVF centroid; below that k-means warns and recall suffers
+_MIN_POINTS_PER_CENTROID = 39
+# Vectors buffered to train IVF/PQ quantizers when an index is built from streamed batches
+TRAIN_VECTORS = 32768
+
+
+@dataclass
+class IndexSpec:
+  """
+  Describes which FAISS index backs the schema RAG and how it is tuned.
+
+  Attributes:
+    kind: "flat" (exact, brute force) | "ivf_flat" | "hnsw" | "ivf_pq".
+    nlist: Number of IVF cells. Defaults to ~4 * sqrt(n) when None.
+    nprobe: IVF cells visited per query (recall vs latency knob).
+    hnsw_m: HNSW graph degree.
+    ef_construction: HNSW build-time beam width.
+    ef_search: HNSW query-time beam width (recall vs latency knob).
+    pq_m: Number of PQ sub-quantizers; must divide the embedding dimension.
+    pq_nbits: Bits per PQ code.
+    recall_sample: Catalog vectors used as queries for the recall@k check after a build (0 disables it).
+    recall_k: k used by the recall@k check.
+  """
+  kind: str = "flat"
+  nlist: Optional[int] = None
+  nprobe: int = 8
+  hnsw_m: int = 32
+  ef_construction: int = 200
+  ef_search: int = 64
+  pq_m: int = 16
+  pq_nbits: int = 8
+  recall_sample: int = 0
+  recall_k: int = 50
+
+  def describe(self) -> str:
+    """Build-relevant parameters only; query-time knobs do not change the stored index."""
+    if self.kind == "flat":
+      return "flat"
+    if self.kind == "hnsw":
+      return f"hnsw:M={self.hnsw_m},efc={self.ef_construction}"
+    if self.kind == "ivf_flat":
+      return f"ivf_flat:nlist={self.nlist}"
+    if self.kind == "ivf_pq":
+      return f"ivf_pq:nlist={self.nlist},m={self.pq_m},nbits={self.pq_nbits}"
+    raise ValueError(f"Unsupported index kind: {self.kind}")
+
+
+def _factory_string(spec: IndexSpec, dimension: int, n_train: int) -> str:
+  if spec.kind == "flat":
+    return "IDMap2,Flat"
+  if spec.kind == "hnsw":
+    return f"IDMap2,HNSW{spec.hnsw_m},Flat"
+  nlist = spec.nlist or max(1, int(4 * math.sqrt(max(n_train, 1))))
+  nlist = min(nlist, max(1, n_train // _MIN_POINTS_PER_CENTROID))
+  if spec.kind == "ivf_flat":
+    return f"IDMap2,IVF{nlist},Flat"
+  if spec.kind == "ivf_pq":
+    if dimension % spec.pq_m != 0:
+      raise ValueError(f"pq_m={spec.pq_m} must divide the embedding dimension {dimension}")
+    return f"IDMap2,IVF{nlist},PQ{spec.pq_m}x{spec.pq_nbits}"
+  raise ValueError(f"Unsupported index kind: {spec.kind}")
+
+
+def _min_train_size(spec: IndexSpec) -> int:
+  if spec.kind == "ivf_flat":
+    return _MIN_POINTS_PER_CENTROID
+  if spec.kind == "ivf_pq":
+    return max(_MIN_POINTS_PER_CENTROID, 2 ** spec.pq_nbits)
+  return 0
+
+
+def training_size(spec: Optional[IndexSpec] = None) -> int:
+  """
+  Vectors to collect before calling `build_index` on a streamed catalog: 0 for backends that
+  need no training (flat, HNSW), otherwise TRAIN_VECTORS.
+  """
+  spec = spec or IndexSpec()
+  if spec.kind in ("flat", "hnsw"):
+    return 0
+  return max(TRAIN_VECTORS, _min_train_size(spec))
+
+
+def build_index(embeddings: np.ndarray, spec: Optional[IndexSpec] = None):
+  """
+  Creates an empty, trained, ID-mapped index for the given catalog embeddings.
+
+  Catalogs too small to train the requested IVF/PQ backend fall back to a flat index.
+
+  Args:
+    embeddings (np.ndarray): float32 catalog embeddings, used to train IVF/PQ quantizers.
+    spec (Optional[IndexSpec]): Backend configuration; defaults to the exact flat index.
+
+  Returns:
+    faiss.Index: An IndexIDMap2 wrapping the requested backend, ready for add_with_ids.
+  """
+  spec = spec or IndexSpec()
+  n, dimension = embeddings.shape
+  if n < _min_train_size(spec):
+    logger.warning("%d vectors are too few to train a %s index; using a flat index", n, spec.kind)
+    spec = IndexSpec(kind="flat")
+  index = faiss.index_factory(dimension, _factory_string(spec, dimension, n), faiss.METRIC_L2)
+  inner = faiss.downcast_index(index.index)
+  if spec.kind == "hnsw":
+    inner.hnsw.efConstruction = spec.ef_construction
+  if not index.is_trained:
+    index.train(embeddings)
+  tune_index(index, spec)
+  return index
+
+
+def tune_index(index, spec: Optional[IndexSpec]) -> None:
+  """
+  Applies query-time knobs (nprobe / efSearch) to an index. No-op for flat indexes.
+  """
+  if spec is None:
+    return
+  inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+  if isinstance(inner, faiss.IndexHNSW):
+    inner.hnsw.efSearch = spec.ef_search
+    return
+  try:
+    faiss.extract_index_ivf(inner).nprobe = spec.nprobe
+  except RuntimeError:
+    pass
+
+
+def supports_remove(index) -> bool:
+  """HNSW graphs cannot delete vectors, so incremental removals require a rebuild."""
+  inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+  return not isinstance(inner, faiss.IndexHNSW)
+
+
+class ExactTopK:
+  """
+  Exact (brute-force) top-k ids of fixed query vectors over vectors added in batches, so
+  recall@k can be measured after a streamed build without keeping every embedding.
+
+  Args:
+    queries (np.ndarray): float32 query vectors.
+    k (int): Neighbours kept per query.
+  """
+
+  def __init__(self, queries: np.ndarray, k: int):
+    self.queries = queries
+    self.k = k
+    self._distances = np.empty((len(queries), 0), dtype="float32")
+    self._ids = np.empty((len(queries), 0), dtype="int64")
+
+  def add(self, embeddings: np.ndarray, ids: np.ndarray) -> None:
+    if len(ids) == 0 or len(self.queries) == 0:
+      return
+    batch = faiss.IndexFlatL2(embeddings.shape[1])
+    batch.add(embeddings)
+    distances, positions = batch.search(self.queries, min(self.k, len(ids)))
+    distances = np.hstack([self._distances, distances])
+    ids = np.hstack([self._ids, ids[positions]])
+    keep = np.argsort(distances, axis=1, kind="stable")[:, :self.k]
+    self._distances = np.take_along_axis(distances, keep, axis=1)
+    self._ids = np.take_along_axis(ids, keep, axis=1)
+
+  def recall(self, index) -> float:
+    """Mean fraction of the exact top-k that `index` also returns."""
+    k = self._ids.shape[1]
+    if k == 0 or len(self.queries) == 0:
+      return 1.0
+    _, approx = index.search(self.queries, k)
+    hits = 0
+    for t_row, a_row in zip(self._ids, approx):
+      hits += len(set(t_row.tolist()) & set(a_row.tolist()))
+    return hits / float(k * len(self.queries))
+
+
+def recall_at_k(index, embeddings: np.ndarray, ids: np.ndarray, queries: np.ndarray, k: int) -> float:
+  """
+  Measures recall@k of an (approximate) index against exact brute-force search.
+
+  Args:
+    index: The index under test, already populated with `embeddings` under `ids`.
+    embeddings (np.ndarray): The vectors stored in `index`.
+    ids (np.ndarray): int64 ids matching `embeddings`.
+    queries (np.ndarray): float32 query vectors.
+    k (int): Neighbours compared per query.
+
+  Returns:
+    float: Mean fraction of the exact top-k that the index also returns.
+  """
+  truth = ExactTopK(queries, k)
+  truth.add(embeddings, ids)
+  return truth.recall(index)
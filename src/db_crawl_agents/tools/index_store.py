@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import faiss
+
+
+def _as_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+  # CatalogStore rows are read-only mappings; json needs a dict
+  return row if isinstance(row, dict) else dict(row)
+
+
+class CatalogFingerprint:
+  """
+  Incremental form of `catalog_fingerprint`: rows are hashed as they stream in, so a catalog
+  never has to be collected into a list just to compute its version.
+  """
+
+  def __init__(self, *extra: str):
+    self._hash = hashlib.sha256()
+    for part in extra:
+      self._hash.update(str(part).encode("utf-8"))
+      self._hash.update(b"\x00")
+
+  def update(self, row: Dict[str, Any]) -> None:
+    self._hash.update(json.dumps(_as_dict(row), sort_keys=True, default=str).encode("utf-8"))
+    self._hash.update(b"\n")
+
+  def hexdigest(self) -> str:
+    return self._hash.hexdigest()
+
+
+def catalog_fingerprint(rows: Iterable[Dict[str, Any]], *extra: str) -> str:
+  """
+  Computes a stable content hash for a list of catalog rows.
+
+  Args:
+    rows (Iterable[dict]): Catalog rows, hashed in the order given.
+    *extra (str): Additional strings mixed into the hash (e.g. the model path).
+
+  Returns:
+    str: Hex digest identifying this exact catalog content.
+  """
+  fingerprint = CatalogFingerprint(*extra)
+  for row in rows:
+    fingerprint.update(row)
+  return fingerprint.hexdigest()
+
+
+def catalog_row_id(row: Dict[str, Any]) -> int:
+  """
+  Derives a stable 56-bit id for a column from (DATABASE_NAME, SCHEMA_NAME, TABLE_NAME, COLUMN_NAME),
+  suitable for use as a FAISS IndexIDMap id.
+  """
+  ident = "\x1f".join(str(row.get(k) or "") for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME"))
+  return int.from_bytes(hashlib.sha1(ident.encode("utf-8")).digest()[:7], "big")
+
+
+def catalog_row_signature(row: Dict[str, Any]) -> str:
+  """
+  Hashes the parts of a catalog row that feed its embedding: the column identity plus its EXAMPLES.
+  Two rows with the same id and signature never need to be re-encoded.
+  """
+  examples = json.dumps(row.get("EXAMPLES"), sort_keys=True, default=str)
+  ident = "\x1f".join(str(row.get(k) or "") for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME"))
+  return hashlib.sha1(f"{ident}\x1f{hashlib.sha1(examples.encode('utf-8')).hexdigest()}".encode("utf-8")).hexdigest()
+
+
+def diff_catalog(
+  indexed: Dict[int, Dict[str, Any]],
+  incoming: Dict[int, Dict[str, Any]],
+) -> Tuple[List[int], List[int], List[int]]:
+  """
+  Diffs an incoming catalog against the previously indexed one.
+
+  Args:
+    indexed (dict): row id -> catalog row currently in the index.
+    incoming (dict): row id -> catalog row from the new catalog.
+
+  Returns:
+    Tuple[List[int], List[int], List[int]]: (ids to encode and add, ids to remove, ids whose
+    row changed without affecting the embedding and only need a mapping refresh).
+  """
+  to_add: List[int] = []
+  to_remove: List[int] = []
+  to_refresh: List[int] = []
+  for rid, row in incoming.items():
+    old = indexed.get(rid)
+    if old is None:
+      to_add.append(rid)
+    elif catalog_row_signature(old) != catalog_row_signature(row):
+      to_remove.append(rid)
+      to_add.append(rid)
+    elif old != row:
+      to_refresh.append(rid)
+  to_remove.extend(rid for rid in indexed if rid not in incoming)
+  return to_add, to_remove, to_refresh
+
+
+class FaissIndexStore:
+  """
+  On-disk store for FAISS indexes and their schema mappings.
+
+  Each entry lives in its own directory named after the catalog fingerprint:
+
+    <root_dir>/<key>/index.faiss
+    <root_dir>/<key>/schema_mapping.json
+
+  A small pointer file per tag (usually the model path) remembers the most
+  recently saved key, so incremental updates can start from the last index.
+  """
+
+  INDEX_FILE = "index.faiss"
+  MAPPING_FILE = "schema_mapping.json"
+
+  def __init__(self, root_dir: str):
+    """
+    Args:
+      root_dir (str): Directory under which cached indexes are written.
+    """
+    self.root_dir = root_dir
+    os.makedirs(self.root_dir, exist_ok=True)
+
+  def _entry_dir(self, key: str) -> str:
+    return os.path.join(self.root_dir, key)
+
+  def has(self, key: str) -> bool:
+    entry = self._entry_dir(key)
+    return os.path.isfile(os.path.join(entry, self.INDEX_FILE)) and os.path.isfile(os.path.join(entry, self.MAPPING_FILE))
+
+  def load(self, key: str, mmap: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Loads a cached index and its schema mapping.
+
+    Args:
+      key (str): Catalog fingerprint.
+      mmap (bool): Memory-map the index file instead of reading it into RAM.
+
+    Returns:
+      Optional[dict]: {"faiss_index", "schema_mapping"} or None when not cached.
+    """
+    if not self.has(key):
+      return None
+    entry = self._entry_dir(key)
+    index_path = os.path.join(entry, self.INDEX_FILE)
+    faiss_index = None
+    if mmap:
+      try:
+        faiss_index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+      except RuntimeError:
+        # not every index type supports mmap; fall back to a regular read
+        faiss_index = None
+    if faiss_index is None:
+      faiss_index = faiss.read_index(index_path)
+    with open(os.path.join(entry, self.MAPPING_FILE), "r") as file:
+      raw_mapping = json.load(file)
+    schema_mapping = {int(i): row for i, row in raw_mapping.items()}
+    return {"faiss_index": faiss_index, "schema_mapping": schema_mapping}
+
+  def _latest_path(self, tag: str) -> str:
+    return os.path.join(self.root_dir, f"latest-{hashlib.sha1(tag.encode('utf-8')).hexdigest()[:16]}")
+
+  def latest_key(self, tag: str) -> Optional[str]:
+    path = self._latest_path(tag)
+    if not os.path.isfile(path):
+      return None
+    with open(path, "r") as file:
+      key = file.read().strip()
+    return key if self.has(key) else None
+
+  def save(self, key: str, faiss_index, schema_mapping: Dict[int, Dict[str, Any]], tag: Optional[str] = None) -> None:
+    """
+    Writes an index and its schema mapping. Files are written to temporary
+    paths first and renamed into place so readers never see partial files.
+
+    Args:
+      key (str): Catalog fingerprint.
+      faiss_index: The FAISS index to persist.
+      schema_mapping (dict): Mapping of index id to catalog row.
+      tag (Optional[str]): When given, also records this key as the latest one for the tag.
+    """
+    entry = self._entry_dir(key)
+    os.makedirs(entry, exist_ok=True)
+    index_path = os.path.join(entry, self.INDEX_FILE)
+    mapping_path = os.path.join(entry, self.MAPPING_FILE)
+    faiss.write_index(faiss_index, index_path + ".tmp")
+    with open(mapping_path + ".tmp", "w") as file:
+      json.dump({str(i): _as_dict(row) for i, row in schema_mapping.items()}, file, default=str)
+    os.replace(mapping_path + ".tmp", mapping_path)
+    os.replace(index_path + ".tmp", index_path)
+    if tag is not None:
+      latest = self._latest_path(tag)
+      with open(latest + ".tmp", "w") as file:
+        file.write(key)
+      os.replace(latest + ".tmp", latest)
+
+  def keys(self) -> List[str]:
+    return [k for k in os.listdir(self.root_dir) if not k.startswith("latest-") and self.has(k)]
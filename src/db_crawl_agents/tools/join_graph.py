@@ -0,0 +1,438 @@
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.messages import ToolMessage
+
+from ..utils.env import get_env
+from .column_sketches import SketchStore, estimate_jaccard, get_sketch_store
+from .index_store import catalog_fingerprint
+
+JOIN_TOOL_NAME = "join_path_tool"
+# OpenAI function schema, bound next to the rag tool (llm.bind_tools accepts dict tools)
+JOIN_TOOL_SPEC = {
+  "type": "function",
+  "function": {
+    "name": JOIN_TOOL_NAME,
+    "description": (
+      "Ranked join paths between catalog tables, precomputed from column names, types, PK/UNIQUE "
+      "flags and sample-value overlap. Pass two or more tables to get the ways to join them, or one "
+      "table to get its best join candidates."
+    ),
+    "parameters": {
+      "type": "object",
+      "properties": {
+        "tables": {"type": "array", "items": {"type": "string"}, "description": "DB.TABLE or DB.SCHEMA.TABLE names"},
+        "k": {"type": "integer", "description": "Paths (or candidates) to return"},
+      },
+      "required": ["tables"],
+    },
+  },
+}
+
+# edge score weights; the sample weight is redistributed when either column has no EXAMPLES
+WEIGHTS = {"name": 0.35, "type": 0.15, "key": 0.25, "samples": 0.25}
+MIN_EDGE_SCORE = 0.5
+SAMPLE_OVERLAP_EVIDENCE = 0.1 # estimated Jaccard from which EXAMPLES count as overlapping
+MAX_BLOCK = 200 # columns compared per normalized name; larger blocks keep their key columns first
+SAMPLE_NEIGHBORS = 10 # LSH neighbors checked per key column for differently named join candidates
+# a pair without name evidence is only an edge when its values carry it on their own: a non-numeric
+# domain (integer surrogate keys 0..N overlap everywhere), high estimated Jaccard and containment
+SAMPLE_ONLY_MIN_JACCARD = 0.5
+SAMPLE_ONLY_MIN_CONTAINMENT = 0.8
+_NUMERIC = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+MAX_DEGREE = 20 # best edges kept per table for path search
+MAX_CACHED_GRAPHS = 4
+
+# abbreviations folded into one token, so POL_NBR, POLICY_NO and POLICY_NUMBER normalize alike
+TOKEN_SYNONYMS = {
+  "NUMBER": "NUM", "NBR": "NUM", "NO": "NUM", "NR": "NUM", "NMBR": "NUM",
+  "IDENTIFIER": "ID", "KEY": "ID", "SK": "ID",
+  "CODE": "CD",
+  "CUST": "CUSTOMER", "ACCT": "ACCOUNT", "POL": "POLICY", "CLM": "CLAIM",
+  "ORD": "ORDER", "TXN": "TRANSACTION", "PROD": "PRODUCT", "EMP": "EMPLOYEE",
+}
+KEY_TOKENS = {"ID", "NUM", "CD"}
+
+_TYPE_FAMILIES = (
+  ("numeric", ("INT", "NUMBER", "NUMERIC", "DECIMAL", "DOUBLE", "FLOAT", "REAL", "LONG", "SHORT", "BYTE", "MONEY")),
+  ("string", ("CHAR", "STRING", "TEXT", "VARCHAR", "NVARCHAR", "UUID", "UNIQUEIDENTIFIER")),
+  ("temporal", ("DATE", "TIME", "TIMESTAMP")),
+  ("boolean", ("BOOL",)),
+)
+_TRUE = ("Y", "YES", "TRUE", "1")
+
+
+def normalize_column_name(name: str, table: str = "") -> str:
+  """
+  Join-key form of a column name: upper-cased alphanumeric tokens with abbreviations folded
+  (POL_NBR -> POLICY_NUM). A bare ID/KEY/NUMBER column is qualified with its table name,
+  so CUSTOMER.ID matches ORDERS.CUSTOMER_ID.
+  """
+  tokens = [TOKEN_SYNONYMS.get(t, t) for t in re.split(r"[^A-Z0-9]+", str(name or "").upper()) if t]
+  if len(tokens) == 1 and tokens[0] in KEY_TOKENS and table:
+    entity = str(table).upper().rsplit(".", 1)[-1]
+    entity = entity[:-1] if entity.endswith("S") and not entity.endswith("SS") else entity
+    tokens = [TOKEN_SYNONYMS.get(t, t) for t in re.split(r"[^A-Z0-9]+", entity) if t] + tokens
+  return "_".join(tokens)
+
+
+def type_family(data_type: Optional[str]) -> Optional[str]:
+  dt = str(data_type or "").upper()
+  if not dt:
+    return None
+  for family, markers in _TYPE_FAMILIES:
+    if any(m in dt for m in markers):
+      return family
+  return "other"
+
+
+def type_compatibility(a: Optional[str], b: Optional[str]) -> float:
+  """1.0 for the same type family, 0.5 for ids stored as text on one side, 0.7 when unknown, else 0."""
+  fa, fb = type_family(a), type_family(b)
+  if fa is None or fb is None:
+    return 0.7
+  if fa == fb:
+    return 1.0
+  if {fa, fb} == {"numeric", "string"}:
+    return 0.5
+  return 0.0
+
+
+def _table_key(row: Dict[str, Any]) -> str:
+  return ".".join(str(row[k]).upper() for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME") if row.get(k))
+
+
+@dataclass
+class JoinCandidate:
+  left_table: str
+  left_column: str
+  right_table: str
+  right_column: str
+  score: float
+  cardinality: str # "1:1", "1:N", "N:1" or "N:M", from the PK/UNIQUE flags
+  evidence: Dict[str, bool] = field(default_factory=dict) # by_name, by_type, by_pk_fk, by_samples
+  overlap: Optional[float] = None # estimated Jaccard of EXAMPLES
+
+  def on(self) -> List[str]:
+    if self.left_column == self.right_column:
+      return [self.left_column]
+    return [f"{self.left_column}={self.right_column}"]
+
+  def reversed(self) -> "JoinCandidate":
+    card = {"1:N": "N:1", "N:1": "1:N"}.get(self.cardinality, self.cardinality)
+    return JoinCandidate(self.right_table, self.right_column, self.left_table, self.left_column,
+                         self.score, card, dict(self.evidence), self.overlap)
+
+  def join_edge(self) -> Dict[str, Any]:
+    """The edge as a JoinEdge dict (contracts.planner.JoinEdge)."""
+    return {"left_table": self.left_table, "right_table": self.right_table, "on": self.on(), "join_type": "left"}
+
+
+@dataclass
+class _Column:
+  table: str
+  column: str
+  norm: str
+  data_type: Optional[str]
+  unique: bool
+  signature: Any
+  samples: List[str]
+  numeric: bool = False # numeric type or all EXAMPLES numeric
+
+
+class JoinGraph:
+  """
+  Join-candidate graph over catalog tables. Nodes are "DB.SCHEMA.TABLE" keys; each edge is
+  the best-scoring column pair between two tables, scored from normalized-name equality,
+  data-type compatibility, PK/UNIQUE flags and MinHash overlap of EXAMPLES.
+  """
+
+  def __init__(self, edges: Iterable[JoinCandidate] = (), version: Optional[str] = None, samples: Optional[Dict[str, List[str]]] = None):
+    self.version = version
+    self.samples: Dict[str, List[str]] = samples or {} # "TABLE.COLUMN" -> a few EXAMPLES, for key_inference
+    self.adjacency: Dict[str, List[JoinCandidate]] = defaultdict(list)
+    self._by_suffix: Dict[str, List[str]] = defaultdict(list)
+    for edge in edges:
+      self._add(edge)
+    for table, out in self.adjacency.items():
+      out.sort(key=lambda e: -e.score)
+
+  def _add(self, edge: JoinCandidate) -> None:
+    for e in (edge, edge.reversed()):
+      if e.left_table not in self.adjacency:
+        self._index_name(e.left_table)
+      self.adjacency[e.left_table].append(e)
+
+  def _index_name(self, table: str) -> None:
+    parts = table.split(".")
+    forms = {table, parts[-1]}
+    if len(parts) == 3:
+      forms |= {f"{parts[1]}.{parts[2]}", f"{parts[0]}.{parts[2]}"}
+    for f in forms:
+      self._by_suffix[f].append(table)
+
+  def __len__(self) -> int:
+    return sum(len(v) for v in self.adjacency.values()) // 2
+
+  def resolve(self, table: str) -> List[str]:
+    """Graph nodes matching a TABLE, SCHEMA.TABLE, DB.TABLE or DB.SCHEMA.TABLE reference."""
+    ref = ".".join(p.strip('`"[]') for p in str(table).upper().split("."))
+    return list(self._by_suffix.get(ref, []))
+
+  def neighbors(self, table: str, k: int = 10) -> List[JoinCandidate]:
+    out: List[JoinCandidate] = []
+    for node in self.resolve(table):
+      out.extend(self.adjacency.get(node, []))
+    return sorted(out, key=lambda e: -e.score)[:k]
+
+  def paths(self, source: str, target: str, max_hops: int = 3, k: int = 3) -> List[Tuple[float, List[JoinCandidate]]]:
+    """
+    Best `k` simple join paths from `source` to `target`, ranked by the product of edge scores
+    (best-first search over each table's MAX_DEGREE best edges).
+    """
+    targets = set(self.resolve(target))
+    found: List[Tuple[float, List[JoinCandidate]]] = []
+    counter = itertools.count()
+    heap = [(-1.0, next(counter), s, []) for s in self.resolve(source)]
+    while heap and len(found) < k:
+      neg, _, node, path = heapq.heappop(heap)
+      if node in targets and path:
+        found.append((round(-neg, 4), path))
+        continue
+      if len(path) >= max_hops:
+        continue
+      visited = {node} | {e.left_table for e in path}
+      for edge in self.adjacency.get(node, [])[:MAX_DEGREE]:
+        if edge.right_table not in visited:
+          heapq.heappush(heap, (neg * edge.score, next(counter), edge.right_table, path + [edge]))
+    return found
+
+  def join_paths(self, tables: List[str], k: int = 3, max_hops: int = 3) -> List[Dict[str, Any]]:
+    """
+    Ranked join paths for a set of tables: for every pair, the best paths as JoinEdge lists;
+    for a single table, its best direct join candidates.
+    """
+    out: List[Dict[str, Any]] = []
+    if len(tables) == 1:
+      for edge in self.neighbors(tables[0], k):
+        out.append({"tables": [edge.left_table, edge.right_table], "score": edge.score,
+                    "join_plan": [edge.join_edge()], "cardinality": [edge.cardinality],
+                    "evidence": [sorted(n for n, v in edge.evidence.items() if v)]})
+      return out
+    for a, b in itertools.combinations(tables, 2):
+      for score, path in self.paths(a, b, max_hops=max_hops, k=k):
+        out.append({
+          "tables": [path[0].left_table] + [e.right_table for e in path],
+          "score": score,
+          "join_plan": [e.join_edge() for e in path],
+          "cardinality": [e.cardinality for e in path],
+          "evidence": [sorted(n for n, v in e.evidence.items() if v) for e in path],
+        })
+    return sorted(out, key=lambda p: -p["score"])
+
+  def common_keys(self, k: int = 10, cross_database_only: bool = True) -> List[Dict[str, Any]]:
+    """
+    Best shared keys in the `key_inference.common_keys` shape, one per normalized key name.
+    """
+    best: Dict[str, JoinCandidate] = {}
+    for table, edges in self.adjacency.items():
+      for e in edges:
+        if e.left_table > e.right_table:
+          continue
+        if cross_database_only and e.left_table.split(".")[0] == e.right_table.split(".")[0]:
+          continue
+        key = normalize_column_name(e.left_column, e.left_table)
+        if key not in best or e.score > best[key].score:
+          best[key] = e
+    out = []
+    for e in sorted(best.values(), key=lambda e: -e.score)[:k]:
+      out.append({
+        "key_name": e.left_column if e.left_column == e.right_column else f"{e.left_column}={e.right_column}",
+        "tables": [e.left_table, e.right_table],
+        "evidence": {n: e.evidence.get(n, False) for n in ("by_name", "by_samples", "by_pk_fk")},
+        "examples": {
+          "left_samples": self.samples.get(f"{e.left_table}.{e.left_column}", []),
+          "right_samples": self.samples.get(f"{e.right_table}.{e.right_column}", []),
+        },
+        "confidence": e.score,
+      })
+    return out
+
+  def to_context(self, k: int = 10) -> str:
+    """Compact JSON of the best cross-database keys, for the decomposer prompt."""
+    return json.dumps(self.common_keys(k), separators=(",", ":"), ensure_ascii=False)
+
+  def answer_tool_calls(self, tool_calls: List[Dict[str, Any]], default_k: int = 3) -> List[ToolMessage]:
+    """Answers every join_path_tool call from one LLM turn; other tools' calls are ignored."""
+    messages: List[ToolMessage] = []
+    for tc in tool_calls:
+      if tc.get("name") != JOIN_TOOL_NAME:
+        continue
+      args = tc.get("args") or {}
+      tables = args.get("tables") or []
+      tables = [tables] if isinstance(tables, str) else list(tables)
+      paths = self.join_paths(tables, k=int(args.get("k") or default_k)) if tables else []
+      content = json.dumps(paths or {"paths": [], "note": "no join candidates found for these tables"},
+                           separators=(",", ":"), ensure_ascii=False)
+      messages.append(ToolMessage(content=content, tool_call_id=tc.get("id") or ""))
+    return messages
+
+  # ---- persistence ----
+  def to_dict(self) -> Dict[str, Any]:
+    edges = [asdict(e) for t, es in self.adjacency.items() for e in es if e.left_table <= e.right_table]
+    return {"version": self.version, "edges": edges, "samples": self.samples}
+
+  @classmethod
+  def from_dict(cls, data: Dict[str, Any]) -> "JoinGraph":
+    return cls((JoinCandidate(**e) for e in data.get("edges", [])), data.get("version"), data.get("samples"))
+
+
+def _score_pair(a: _Column, b: _Column, containment: Optional[float] = None) -> Optional[JoinCandidate]:
+  type_score = type_compatibility(a.data_type, b.data_type)
+  if type_score == 0.0:
+    return None
+  name_score = 1.0 if a.column == b.column else 0.8 if a.norm == b.norm else 0.0
+  key_score = 1.0 if a.unique and b.unique else 0.8 if (a.unique or b.unique) else 0.3
+  overlap = estimate_jaccard(a.signature, b.signature)
+  if name_score == 0.0 and (
+    a.numeric or b.numeric or overlap is None or overlap < SAMPLE_ONLY_MIN_JACCARD
+    or containment is None or containment < SAMPLE_ONLY_MIN_CONTAINMENT
+  ):
+    return None # type match and key flags alone never make an edge
+  parts = {"name": name_score, "type": type_score, "key": key_score}
+  if overlap is not None:
+    parts["samples"] = min(1.0, overlap / 0.5) # half the values shared is as strong as it gets for samples
+  weight = sum(WEIGHTS[p] for p in parts)
+  score = round(sum(WEIGHTS[p] * v for p, v in parts.items()) / weight, 3)
+  cardinality = {(True, True): "1:1", (True, False): "1:N", (False, True): "N:1"}.get((a.unique, b.unique), "N:M")
+  evidence = {
+    "by_name": name_score > 0,
+    "by_type": type_score >= 1.0,
+    "by_pk_fk": a.unique or b.unique,
+    "by_samples": overlap is not None and overlap >= SAMPLE_OVERLAP_EVIDENCE,
+  }
+  return JoinCandidate(a.table, a.column, b.table, b.column, score, cardinality, evidence, overlap)
+
+
+def build_join_graph(
+  rows: Iterable[Dict[str, Any]],
+  version: Optional[str] = None,
+  min_score: float = MIN_EDGE_SCORE,
+  sketches: Optional[SketchStore] = None,
+) -> JoinGraph:
+  """
+  Catalog analysis pass: blocks columns by normalized key name (only key-like names, or columns
+  flagged PK/UNIQUE, are considered) and scores every cross-table pair in a block; differently
+  named key columns whose non-numeric values largely overlap (SAMPLE_ONLY_MIN_JACCARD and
+  SAMPLE_ONLY_MIN_CONTAINMENT) are paired through the sketches' LSH index. The best
+  pair per table pair is kept when it scores at least `min_score`.
+
+  Args:
+    rows (Iterable[dict]): Catalog rows or a CatalogStore.
+    version (Optional[str]): Catalog version recorded on the graph.
+    min_score (float): Minimum edge score.
+    sketches (Optional[SketchStore]): Column sketches; built from EXAMPLES when not given.
+
+  Returns:
+    JoinGraph: The join-candidate graph.
+  """
+  if sketches is None:
+    rows = rows if isinstance(rows, (list, tuple)) or hasattr(rows, "version") else list(rows)
+    sketches = SketchStore.from_catalog(rows)
+  blocks: Dict[str, List[_Column]] = defaultdict(list)
+  by_key: Dict[str, _Column] = {}
+  samples: Dict[str, List[str]] = {}
+  for r in rows:
+    table, column = _table_key(r), str(r.get("COLUMN_NAME") or "").upper()
+    if not table or not column:
+      continue
+    norm = normalize_column_name(column, table)
+    unique = str(r.get("IS_PRIMARY_KEY") or "").upper() in _TRUE or str(r.get("IS_UNIQUE") or "").upper() in _TRUE
+    if not unique and norm.rsplit("_", 1)[-1] not in KEY_TOKENS:
+      continue
+    examples = r.get("EXAMPLES")
+    examples = examples if isinstance(examples, list) else []
+    numeric = type_family(r.get("DATA_TYPE")) == "numeric" or bool(examples) and all(_NUMERIC.match(str(v).strip()) for v in examples)
+    col = _Column(table, column, norm, r.get("DATA_TYPE"), unique, sketches.signature(f"{table}.{column}"),
+                  [str(v) for v in examples[:3]], numeric)
+    blocks[norm].append(col)
+    by_key[f"{table}.{column}"] = col
+    if col.samples:
+      samples[f"{table}.{column}"] = col.samples
+
+  def pairs():
+    for members in blocks.values():
+      if len(members) > MAX_BLOCK:
+        members = sorted(members, key=lambda c: not c.unique)[:MAX_BLOCK]
+      for a, b in itertools.combinations(members, 2):
+        yield a, b, None
+    for key, col in by_key.items():
+      if col.signature is None or col.numeric:
+        continue
+      for other, _ in sketches.similar(key, k=SAMPLE_NEIGHBORS, min_jaccard=SAMPLE_ONLY_MIN_JACCARD):
+        match = by_key.get(other)
+        if match is not None and match.norm != col.norm and not match.numeric:
+          yield col, match, max(sketches.containment(key, other) or 0.0, sketches.containment(other, key) or 0.0)
+
+  best: Dict[Tuple[str, str], JoinCandidate] = {}
+  for a, b, containment in pairs():
+    if a.table == b.table:
+      continue
+    if a.table > b.table:
+      a, b = b, a
+    edge = _score_pair(a, b, containment)
+    if edge is None or edge.score < min_score:
+      continue
+    prev = best.get((a.table, b.table))
+    if prev is None or edge.score > prev.score:
+      best[(a.table, b.table)] = edge
+  used = {f"{e.left_table}.{e.left_column}" for e in best.values()} | {f"{e.right_table}.{e.right_column}" for e in best.values()}
+  return JoinGraph(best.values(), version, {c: s for c, s in samples.items() if c in used})
+
+
+_graph_cache: "OrderedDict[str, JoinGraph]" = OrderedDict()
+_graph_lock = threading.Lock()
+
+
+def get_join_graph(rows: Iterable[Dict[str, Any]], catalog_version: Optional[str] = None, cache_dir: Optional[str] = None) -> JoinGraph:
+  """
+  Returns the join graph for a catalog, built once per catalog version and kept in memory and,
+  when `cache_dir` (or DBCRAWL_JOIN_GRAPH_DIR) is set, on disk as `<version>.json`.
+
+  Args:
+    rows (Iterable[dict]): Catalog rows or a CatalogStore.
+    catalog_version (Optional[str]): Content version of the catalog (e.g. `catalog_fingerprint(rows)`);
+      computed when not given, since types and EXAMPLES affect the graph.
+    cache_dir (Optional[str]): Directory for persisted graphs.
+  """
+  rows = rows if isinstance(rows, (list, tuple)) or hasattr(rows, "version") else list(rows)
+  version = catalog_version or catalog_fingerprint(rows, "join-graph")
+  with _graph_lock:
+    graph = _graph_cache.get(version)
+    if graph is not None:
+      _graph_cache.move_to_end(version)
+      return graph
+  cache_dir = cache_dir or get_env("DBCRAWL_JOIN_GRAPH_DIR")
+  path = os.path.join(cache_dir, f"{version}.json") if cache_dir else None
+  if path and os.path.isfile(path):
+    with open(path, "r") as fh:
+      graph = JoinGraph.from_dict(json.load(fh))
+  else:
+    graph = build_join_graph(rows, version, sketches=get_sketch_store(rows, version))
+    if path:
+      os.makedirs(cache_dir, exist_ok=True)
+      with open(path + ".tmp", "w") as fh:
+        json.dump(graph.to_dict(), fh)
+      os.replace(path + ".tmp", path)
+  with _graph_lock:
+    _graph_cache[version] = graph
+    while len(_graph_cache) > MAX_CACHED_GRAPHS:
+      _graph_cache.popitem(last=False)
+  return graph
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Set, Tuple
+import math
+import re
+
+_NON_ALNUM = re.compile(r"[^A-Za-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9_.\-]+$")
+
+# Field weights applied to term frequencies; column names carry most of the signal
+FIELD_WEIGHTS = {"COLUMN_NAME": 3.0, "TABLE_NAME": 1.0, "EXAMPLES": 0.5}
+MAX_EXAMPLES = 10
+
+
+def tokenize(text: Any) -> List[str]:
+  """
+  Splits identifiers and free text into lowercase tokens (CUST_ID -> cust, id; PolicyNumber -> policy, number).
+  """
+  if text is None:
+    return []
+  parts = _NON_ALNUM.split(_CAMEL.sub(" ", str(text)))
+  return [p.lower() for p in parts if p]
+
+
+def identifier_key(text: Any) -> str:
+  """Normalizes an identifier for exact lookup: CUST_ID, cust-id and CustId all map to 'custid'."""
+  return "".join(tokenize(text))
+
+
+def char_ngrams(token: str, n: int = 3) -> List[str]:
+  padded = f"#{token}#"
+  if len(padded) <= n:
+    return [padded]
+  return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def _terms(text: Any, ngram: int) -> List[str]:
+  out: List[str] = []
+  for tok in tokenize(text):
+    out.append(tok)
+    if ngram:
+      out.extend(f"{ngram}:{g}" for g in char_ngrams(tok, ngram))
+  return out
+
+
+class LexicalIndex:
+  """
+  BM25 inverted index over COLUMN_NAME, TABLE_NAME and EXAMPLES, with character
+  n-grams for partial identifier matches and an exact identifier map that answers
+  queries like "POLICY_NUMBER" without scoring or embedding anything.
+  """
+
+  def __init__(self, k1: float = 1.2, b: float = 0.75, ngram: int = 3):
+    self.k1 = k1
+    self.b = b
+    self.ngram = ngram
+    self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+    self.doc_terms: Dict[int, Dict[str, float]] = {}
+    self.doc_len: Dict[int, float] = {}
+    self.exact: Dict[str, Set[int]] = defaultdict(set)
+    self._total_len = 0.0
+
+  @classmethod
+  def from_mapping(cls, schema_mapping: Dict[int, Dict[str, Any]], **kwargs) -> "LexicalIndex":
+    index = cls(**kwargs)
+    for doc_id, row in schema_mapping.items():
+      index.add(doc_id, row)
+    return index
+
+  def __len__(self) -> int:
+    return len(self.doc_terms)
+
+  def _exact_keys(self, row: Dict[str, Any]) -> List[str]:
+    column = identifier_key(row.get("COLUMN_NAME"))
+    table = identifier_key(row.get("TABLE_NAME"))
+    keys = [column]
+    if table:
+      keys.append(table + column)
+    return [k for k in keys if k]
+
+  def add(self, doc_id: int, row: Dict[str, Any]) -> None:
+    if doc_id in self.doc_terms:
+      self.remove(doc_id)
+    tf: Dict[str, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+      value = row.get(field)
+      if field == "EXAMPLES":
+        value = " ".join(str(v) for v in (value or [])[:MAX_EXAMPLES]) if isinstance(value, list) else value
+      for term in _terms(value, self.ngram):
+        tf[term] += weight
+    self.doc_terms[doc_id] = dict(tf)
+    length = sum(tf.values())
+    self.doc_len[doc_id] = length
+    self._total_len += length
+    for term, freq in tf.items():
+      self.postings[term][doc_id] = freq
+    for key in self._exact_keys(row):
+      self.exact[key].add(doc_id)
+
+  def remove(self, doc_id: int, row: Dict[str, Any] = None) -> None:
+    tf = self.doc_terms.pop(doc_id, None)
+    if tf is None:
+      return
+    self._total_len -= self.doc_len.pop(doc_id, 0.0)
+    for term in tf:
+      posting = self.postings.get(term)
+      if posting is not None:
+        posting.pop(doc_id, None)
+        if not posting:
+          del self.postings[term]
+    keys = self._exact_keys(row) if row is not None else list(self.exact.keys())
+    for key in keys:
+      ids = self.exact.get(key)
+      if ids is not None:
+        ids.discard(doc_id)
+        if not ids:
+          del self.exact[key]
+
+  @staticmethod
+  def is_identifier(query: str) -> bool:
+    """True for single identifier-like queries (POLICY_NUMBER, claims.claim_id) worth an exact lookup."""
+    return bool(_IDENTIFIER.match(query.strip()))
+
+  def exact_matches(self, query: str) -> List[int]:
+    """Doc ids whose COLUMN_NAME (or TABLE_NAME + COLUMN_NAME) equals the normalized query."""
+    return sorted(self.exact.get(identifier_key(query), ()))
+
+  def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+    """
+    Scores documents against the query with BM25.
+
+    Returns:
+      List[Tuple[int, float]]: Top-k (doc id, score) pairs, best first.
+    """
+    n_docs = len(self.doc_terms)
+    if n_docs == 0:
+      return []
+    avg_len = self._total_len / n_docs or 1.0
+    scores: Dict[int, float] = defaultdict(float)
+    for term in set(_terms(query, self.ngram)):
+      posting = self.postings.get(term)
+      if not posting:
+        continue
+      idf = math.log(1.0 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+      for doc_id, freq in posting.items():
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+        scores[doc_id] += idf * freq * (self.k1 + 1.0) / (freq + norm)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int, c: int = 60) -> List[Tuple[int, float]]:
+  """
+  Fuses several ranked id lists with reciprocal rank fusion (score = sum 1 / (c + rank)).
+
+  Returns:
+    List[Tuple[int, float]]: Top-k (id, fused score) pairs, best first.
+  """
+  fused: Dict[int, float] = defaultdict(float)
+  for ranking in rankings:
+    for rank, doc_id in enumerate(ranking):
+      fused[doc_id] += 1.0 / (c + rank + 1)
+  return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:k]
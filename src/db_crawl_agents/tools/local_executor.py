@@ -0,0 +1,242 @@
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlglot
+from sqlglot import exp
+
+from ..contracts.single_cte.execution_results import ExecutionResult
+from ..utils.env import get_env
+from .preview_sampling import SampleSpec, sample_sql
+
+EXTRACT_FORMATS = (".parquet", ".csv")
+LOCAL_ENGINES = ("duckdb", "sqlite")
+_SELECT_ONLY = re.compile(r"^\s*(with\s+.*?select|select)\b", re.IGNORECASE | re.DOTALL)
+
+
+def _view_name(key: str) -> str:
+  return re.sub(r"[^A-Za-z0-9_]", "_", key.replace(".", "__"))
+
+
+class LocalPreviewEngine:
+  """
+  In-process preview engine over local extracts of catalog tables, returning the same
+  ExecutionResult as the Spark executor.
+
+  Extracts are Parquet or CSV files under `extracts_dir`, named after the table either as
+  `DB.SCHEMA.TABLE.parquet` or as `DB/SCHEMA/TABLE.parquet`. Each is exposed as a view
+  (DuckDB) or loaded table (SQLite); table references in the generated SQL are resolved to
+  them by full name, SCHEMA.TABLE or TABLE, and the query is transpiled with sqlglot from
+  `read_dialect` (spark_sql as generated, or snowflake) to the engine's dialect.
+  """
+
+  def __init__(self, extracts_dir: Optional[str] = None, engine: str = "duckdb", read_dialect: str = "spark"):
+    """
+    Args:
+      extracts_dir (Optional[str]): Root of the extracts; defaults to DBCRAWL_LOCAL_EXTRACTS_DIR.
+      engine (str): "duckdb" or "sqlite".
+      read_dialect (str): Dialect of the SQL handed to `run_preview`.
+    """
+    if engine not in LOCAL_ENGINES:
+      raise ValueError(f"Unsupported local engine: {engine}")
+    self.extracts_dir = extracts_dir or get_env("DBCRAWL_LOCAL_EXTRACTS_DIR", "extracts")
+    self.engine = engine
+    self.read_dialect = read_dialect
+    self._extracts: Dict[str, str] = {}
+    self._loaded: Dict[str, str] = {} # extract key -> view/table name
+    self._lock = threading.Lock()
+    self._conn = None
+    self.discover()
+
+  # ---- extracts ----
+  def discover(self) -> Dict[str, str]:
+    """Scans `extracts_dir` and returns {"DB.SCHEMA.TABLE": path}."""
+    if not os.path.isdir(self.extracts_dir):
+      return self._extracts
+    for dirpath, _, files in os.walk(self.extracts_dir):
+      for name in files:
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in EXTRACT_FORMATS:
+          continue
+        rel = os.path.relpath(os.path.join(dirpath, stem), self.extracts_dir)
+        self._extracts.setdefault(rel.replace(os.sep, ".").upper(), os.path.join(dirpath, name))
+    return self._extracts
+
+  def register(self, fqn_table: str, path: str) -> None:
+    """Maps a catalog table ("DB.SCHEMA.TABLE") to an extract file."""
+    with self._lock:
+      key = fqn_table.upper()
+      self._extracts[key] = path
+      self._loaded.pop(key, None)
+
+  def tables(self) -> List[str]:
+    return sorted(self._extracts)
+
+  def _resolve(self, table: exp.Table) -> Optional[str]:
+    parts = [p.upper() for p in (table.catalog, table.db, table.name) if p]
+    ref = ".".join(parts)
+    if ref in self._extracts:
+      return ref
+    matches = [k for k in self._extracts if k.endswith("." + ref)]
+    return matches[0] if len(matches) == 1 else None
+
+  # ---- engine ----
+  def _connection(self):
+    if self._conn is None:
+      if self.engine == "duckdb":
+        import duckdb
+        self._conn = duckdb.connect(database=":memory:")
+      else:
+        import sqlite3
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+    return self._conn
+
+  def _load(self, key: str) -> str:
+    name = self._loaded.get(key)
+    if name is not None:
+      return name
+    path = self._extracts[key]
+    name = _view_name(key)
+    conn = self._connection()
+    is_parquet = path.lower().endswith(".parquet")
+    if self.engine == "duckdb":
+      reader = "read_parquet" if is_parquet else "read_csv_auto"
+      escaped = path.replace("'", "''")
+      conn.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM {reader}(\'{escaped}\')')
+    else:
+      import pyarrow.csv as pacsv
+      import pyarrow.parquet as pq
+      data = pq.read_table(path) if is_parquet else pacsv.read_csv(path)
+      cols = ", ".join(f'"{c}"' for c in data.column_names)
+      marks = ", ".join("?" for _ in data.column_names)
+      conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+      conn.execute(f'CREATE TABLE "{name}" ({cols})')
+      conn.executemany(f'INSERT INTO "{name}" VALUES ({marks})', zip(*(c.to_pylist() for c in data.columns)))
+      conn.commit()
+    self._loaded[key] = name
+    return name
+
+  def _sampled_source(self, name: str, sample: exp.TableSample, alias: exp.TableAlias) -> exp.Expression:
+    """
+    DuckDB's TABLESAMPLE defaults to system sampling of whole 2048-row vectors, which returns
+    nothing on small extracts; sample rows (bernoulli) in a subquery instead, so only this table
+    is sampled and not the joined result.
+    """
+    percent, seed = sample.args.get("percent"), sample.args.get("seed")
+    clause = f"USING SAMPLE {percent.sql()} PERCENT (bernoulli" + (f", {seed.sql()})" if seed is not None else ")")
+    inner = sqlglot.parse_one(f'SELECT * FROM "{name}" {clause}', read="duckdb")
+    return inner.subquery(alias.this.copy() if alias.this is not None else None)
+
+  def _rewrite(self, sql: str, sample: Optional[SampleSpec], index: Any) -> Tuple[str, bool]:
+    """Returns the query over the local extracts and whether any table read is sampled."""
+    if sample is not None:
+      sql = sample_sql(sql, sample, index, read=self.read_dialect, write=self.read_dialect)
+    root = sqlglot.parse_one(sql, read=self.read_dialect)
+    ctes = {cte.alias_or_name.upper() for cte in root.find_all(exp.CTE)}
+    sample_targets = {t.upper() for t in sample.sample_tables.values()} if sample is not None else set()
+    sampled = False
+    for table in list(root.find_all(exp.Table)):
+      if not table.args.get("db") and table.name.upper() in ctes:
+        continue
+      key = self._resolve(table)
+      if key is None:
+        raise LookupError(f"No local extract for table {table.sql(dialect=self.read_dialect)}")
+      name = self._load(key)
+      alias = table.args.get("alias") or exp.TableAlias(this=exp.to_identifier(table.name))
+      ref = ".".join(p.upper() for p in (table.catalog, table.db, table.name) if p)
+      sampled = sampled or ref in sample_targets
+      tablesample = table.args.get("sample")
+      if tablesample is not None and self.engine == "duckdb":
+        table.replace(self._sampled_source(name, tablesample, alias))
+        sampled = True
+        continue
+      # SQLite has no TABLESAMPLE: such tables are read whole (only `sample_tables` extracts sample them)
+      local = exp.to_table(name)
+      local.set("alias", alias)
+      table.replace(local)
+    return root.sql(dialect=self.engine), sampled
+
+  def _fetch_arrow(self, cur: Any, query: str, limit: int):
+    import pyarrow as pa
+    if self.engine == "duckdb":
+      result = cur.execute(query).arrow()
+      return result.read_all() if hasattr(result, "read_all") else result
+    cur = cur.execute(query)
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchmany(limit)
+    return pa.Table.from_arrays([pa.array([r[i] for r in rows]) for i in range(len(names))], names=names)
+
+  def run_preview(
+    self,
+    sql: str,
+    limit: int = 5,
+    timeout_s: int = 20,
+    sample: Optional[SampleSpec] = None,
+    index: Any = None,
+  ) -> ExecutionResult:
+    """
+    Runs a LIMIT preview in-process.
+
+    Args:
+      sql (str): Generated SQL in `read_dialect`.
+      limit (int): Rows returned.
+      timeout_s (int): The query is interrupted after this many seconds.
+      sample (Optional[SampleSpec]): Deterministic sampling of the extracts, as for Spark previews.
+      index (Optional[CatalogIndex]): Resolves table names and row counts when sampling.
+
+    Returns:
+      ExecutionResult: engine "duckdb" or "sqlite", with the preview in `arrow_table`.
+    """
+    if not _SELECT_ONLY.search(sql or ""):
+      return ExecutionResult(engine=self.engine, success=False, rowcount=0, error="Non-SELECT blocked.")
+    warnings: List[str] = []
+    t0 = time.time()
+    with self._lock:
+      try:
+        inner, sampled = self._rewrite(sql, sample, index)
+      except Exception as e:
+        return ExecutionResult(engine=self.engine, success=False, rowcount=0, error=str(e))
+      # SQL sampled by the caller (sample is None) carries its own warning from there
+      if sampled and sample is not None:
+        warnings.append(f"Sampled preview: {sample.percent:g}% per table, seed {sample.seed}.")
+      query = f"SELECT * FROM ({inner}) AS preview LIMIT {int(limit)}"
+      conn = self._connection()
+      # a DuckDB query runs on its own cursor, and only interrupting that cursor stops it
+      cur = conn.cursor() if self.engine == "duckdb" else conn
+      timer = threading.Timer(timeout_s, cur.interrupt) if timeout_s else None
+      if timer is not None:
+        timer.start()
+      try:
+        table = self._fetch_arrow(cur, query, limit)
+      except Exception as e:
+        return ExecutionResult(engine=self.engine, success=False, rowcount=0, error=str(e), elapsed_ms=int((time.time()-t0)*1000))
+      finally:
+        if timer is not None:
+          timer.cancel()
+        if cur is not conn:
+          cur.close()
+    schema = [{"name": f.name, "type": str(f.type)} for f in table.schema]
+    return ExecutionResult(
+      engine=self.engine,
+      success=True,
+      rowcount=table.num_rows,
+      schema_field=schema,
+      elapsed_ms=int((time.time()-t0)*1000),
+      warnings=warnings,
+      arrow_table=table,
+    )
+
+
+_engines: Dict[str, LocalPreviewEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_local_engine(engine: str = "duckdb") -> LocalPreviewEngine:
+  """Process-wide local engine over DBCRAWL_LOCAL_EXTRACTS_DIR, reading DBCRAWL_LOCAL_READ_DIALECT SQL (default spark)."""
+  with _engines_lock:
+    eng = _engines.get(engine)
+    if eng is None:
+      eng = _engines[engine] = LocalPreviewEngine(engine=engine, read_dialect=get_env("DBCRAWL_LOCAL_READ_DIALECT", "spark"))
+    return eng
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..contracts.planner import DecomposerPlan
+from ..utils.env import get_env
+
+# Fields of a feature spec that change what the decomposer should plan. Ids, titles,
+# notes and example rows are presentation only and are left out of the key.
+PLAN_KEY_FIELDS = (
+  "name",
+  "description",
+  "target_grain",
+  "temporal_scope",
+  "value_type",
+  "valid_values",
+  "acceptance_criteria",
+  "dependencies",
+)
+SIMILARITY_THRESHOLD = 0.92
+# Fields a similarity hit must match exactly: two features that embed alike but differ in any of
+# these (e.g. a 30-day vs a 90-day window, or another label set) need different plans
+PLAN_FILTER_FIELDS = ("target_grain", "value_type", "temporal_scope", "valid_values")
+
+_WS = re.compile(r"\s+")
+
+
+def _norm_value(value: Any) -> Any:
+  if isinstance(value, str):
+    return _WS.sub(" ", value.strip().lower())
+  if isinstance(value, (list, tuple, set)):
+    return sorted(_norm_value(v) for v in value if v not in (None, ""))
+  return value
+
+
+def normalize_feature(feature: Any) -> Dict[str, Any]:
+  """
+  Reduces a FeatureDefinitionSpec (model or dict) to the normalized fields that determine its plan.
+  Strings are lowercased with collapsed whitespace and lists are sorted, so cosmetic edits map to the same key.
+  """
+  data = feature.model_dump() if hasattr(feature, "model_dump") else dict(feature)
+  return {k: _norm_value(data.get(k)) for k in PLAN_KEY_FIELDS if data.get(k) not in (None, "", [])}
+
+
+def feature_key(feature: Any) -> str:
+  return hashlib.sha256(json.dumps(normalize_feature(feature), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _filter_values(norm: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+  # the PLAN_FILTER_FIELDS columns of a stored row; lists are kept as their normalized JSON
+  return tuple(
+    json.dumps(norm[k], sort_keys=True) if isinstance(norm.get(k), list) else norm.get(k)
+    for k in PLAN_FILTER_FIELDS
+  )
+
+
+def feature_text(feature: Any) -> str:
+  """Text embedded for similarity lookup: what the feature means, not how it is named."""
+  norm = normalize_feature(feature)
+  parts = [norm.get("name", "").replace("_", " "), norm.get("description", "")]
+  for k in ("target_grain", "temporal_scope", "value_type"):
+    if norm.get(k):
+      parts.append(f"{k}: {norm[k]}")
+  return ". ".join(p for p in parts if p)
+
+
+def known_columns(catalog_rows: Iterable[Any]) -> Set[Tuple[str, str]]:
+  """
+  (table reference, COLUMN_NAME) pairs for every catalog column, upper-cased. Each column is
+  registered under DB.SCHEMA.TABLE, DB.TABLE, SCHEMA.TABLE and TABLE, the forms plans use in fqn_table.
+  """
+  out: Set[Tuple[str, str]] = set()
+  for row in catalog_rows:
+    r = row.model_dump() if hasattr(row, "model_dump") else row
+    db, schema, table, col = (str(r.get(k) or "").upper() for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME"))
+    if not table or not col:
+      continue
+    for ref in {f"{db}.{schema}.{table}", f"{db}.{table}", f"{schema}.{table}", table}:
+      if not ref.startswith(".") and ".." not in ref:
+        out.add((ref, col))
+  return out
+
+
+def missing_columns(plan: DecomposerPlan, columns: Set[Tuple[str, str]]) -> List[str]:
+  """Column references in the plan's tasks that do not resolve against `columns`, as "TABLE.COLUMN"."""
+  refs: List[Tuple[str, str]] = []
+  for task in plan.tasks:
+    for ref in (task.measure_candidate, task.time_candidate, task.grain_key):
+      if ref is not None:
+        refs.append((ref.fqn_table, ref.column))
+    for src in task.source_tables:
+      for col in (*src.grain_cols, *src.time_cols, *src.measure_cols):
+        refs.append((src.fqn_table, col))
+  missing = []
+  for table, col in refs:
+    if (table.upper(), col.upper()) not in columns:
+      missing.append(f"{table}.{col}")
+  return sorted(set(missing))
+
+
+def _rebind(plan: DecomposerPlan, feature: Any) -> DecomposerPlan:
+  """Points a plan found by similarity at the requesting feature's id and name."""
+  new_id = getattr(feature, "id", None) or (feature.get("id") if isinstance(feature, dict) else None)
+  new_name = getattr(feature, "name", None) or (feature.get("name") if isinstance(feature, dict) else None)
+  if not new_id or new_id == plan.feature_id:
+    return plan
+  old_name = plan.feature_id.split(".", 1)[-1]
+  tasks = []
+  for t in plan.tasks:
+    if new_name and t.feature_name == old_name:
+      t = t.model_copy(update={
+        "feature_name": new_name,
+        "task_id": t.task_id.replace(plan.feature_id, new_id, 1),
+      })
+    tasks.append(t)
+  return plan.model_copy(update={"feature_id": new_id, "tasks": tasks})
+
+
+class PlanStore:
+  """
+  Persistent memo of DecomposerPlans, keyed by (normalized feature, catalog version).
+
+  `get` first tries the exact feature key (same catalog version, then any earlier version),
+  then the most similar stored feature above `threshold` by embedding cosine similarity,
+  restricted to features with the same target grain, value type, temporal scope and valid
+  values. Every candidate is
+  checked against the current catalog and dropped if it references a column that no longer exists.
+  """
+
+  def __init__(
+    self,
+    path: Optional[str] = None,
+    embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+    threshold: float = SIMILARITY_THRESHOLD,
+    similarity: bool = True,
+  ):
+    """
+    Args:
+      path (Optional[str]): SQLite file. Defaults to DBCRAWL_PLAN_STORE, else ".cache/plans.sqlite".
+      embed_fn (Optional[Callable]): Maps texts to an (n, d) array; defaults to the shared SBERT model.
+      threshold (float): Minimum cosine similarity for a non-exact hit.
+      similarity (bool): Enable the embedding lookup; exact lookup is always on.
+    """
+    self.path = path or get_env("DBCRAWL_PLAN_STORE") or ".cache/plans.sqlite"
+    if os.path.dirname(self.path):
+      os.makedirs(os.path.dirname(self.path), exist_ok=True)
+    self.threshold = threshold
+    self.similarity = similarity
+    self._embed_fn = embed_fn
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(self.path, check_same_thread=False)
+    self._conn.execute(
+      """CREATE TABLE IF NOT EXISTS plans (
+        feature_key TEXT NOT NULL,
+        catalog_version TEXT NOT NULL,
+        target_grain TEXT,
+        value_type TEXT,
+        temporal_scope TEXT,
+        valid_values TEXT,
+        feature_json TEXT NOT NULL,
+        plan_json TEXT NOT NULL,
+        embedding BLOB,
+        created REAL NOT NULL,
+        PRIMARY KEY (feature_key, catalog_version)
+      )"""
+    )
+    self._migrate()
+    self._conn.commit()
+
+  def _migrate(self) -> None:
+    # stores written before temporal_scope / valid_values were filtered on: add the columns
+    # and fill them from the stored normalized feature
+    existing = {r[1] for r in self._conn.execute("PRAGMA table_info(plans)")}
+    added = [c for c in ("temporal_scope", "valid_values") if c not in existing]
+    if not added:
+      return
+    for column in added:
+      self._conn.execute(f"ALTER TABLE plans ADD COLUMN {column} TEXT")
+    rows = self._conn.execute("SELECT feature_key, catalog_version, feature_json FROM plans").fetchall()
+    for key, version, feature_json in rows:
+      _, _, temporal_scope, valid_values = _filter_values(json.loads(feature_json))
+      self._conn.execute(
+        "UPDATE plans SET temporal_scope = ?, valid_values = ? WHERE feature_key = ? AND catalog_version = ?",
+        (temporal_scope, valid_values, key, version),
+      )
+
+  def _embed(self, texts: List[str]) -> Optional[np.ndarray]:
+    if not self.similarity:
+      return None
+    if self._embed_fn is None:
+      from ..llms.embedding_registry import get_sbert_model
+      self._embed_fn = lambda t: get_sbert_model().model.encode(t)
+    vecs = np.asarray(self._embed_fn(texts), dtype="float32")
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.where(norms == 0, 1.0, norms)
+
+  def _valid(self, plan_json: str, columns: Optional[Set[Tuple[str, str]]]) -> Optional[DecomposerPlan]:
+    plan = DecomposerPlan.model_validate_json(plan_json)
+    if columns is not None and missing_columns(plan, columns):
+      return None
+    return plan
+
+  def get(self, feature: Any, catalog_version: str, catalog_rows: Optional[Iterable[Any]] = None) -> Optional[DecomposerPlan]:
+    """
+    Looks up a reusable plan.
+
+    Args:
+      feature: FeatureDefinitionSpec (model or dict) being decomposed.
+      catalog_version (str): Fingerprint of the current catalog.
+      catalog_rows: Current catalog; when given, plans from other catalog versions are only
+        reused if all their column references still resolve.
+
+    Returns:
+      Optional[DecomposerPlan]: The memoized plan, re-bound to `feature` for similarity hits, or None.
+    """
+    key = feature_key(feature)
+    columns = known_columns(catalog_rows) if catalog_rows is not None else None
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT catalog_version, plan_json FROM plans WHERE feature_key = ? ORDER BY (catalog_version = ?) DESC, created DESC",
+        (key, catalog_version),
+      ).fetchall()
+    for version, plan_json in rows:
+      if version == catalog_version:
+        return DecomposerPlan.model_validate_json(plan_json)
+      if columns is None:
+        continue
+      plan = self._valid(plan_json, columns)
+      if plan is not None:
+        return plan
+
+    if not self.similarity:
+      return None
+    filters = " AND ".join(f"IFNULL({k}, '') = ?" for k in PLAN_FILTER_FIELDS)
+    with self._lock:
+      rows = self._conn.execute(
+        f"SELECT catalog_version, plan_json, embedding FROM plans WHERE feature_key != ? AND embedding IS NOT NULL AND {filters}",
+        (key, *(v or "" for v in _filter_values(normalize_feature(feature)))),
+      ).fetchall()
+    if not rows:
+      return None
+    query = self._embed([feature_text(feature)])[0]
+    scored = sorted(
+      ((float(np.frombuffer(emb, dtype="float32") @ query), version, plan_json) for version, plan_json, emb in rows),
+      reverse=True,
+    )
+    for score, version, plan_json in scored:
+      if score < self.threshold:
+        break
+      if version != catalog_version and columns is None:
+        continue
+      plan = self._valid(plan_json, columns if version != catalog_version else None)
+      if plan is not None:
+        return _rebind(plan, feature)
+    return None
+
+  def put(self, feature: Any, catalog_version: str, plan: DecomposerPlan) -> None:
+    """Stores `plan` for (feature, catalog_version), replacing any previous entry."""
+    norm = normalize_feature(feature)
+    emb = self._embed([feature_text(feature)])
+    with self._lock:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO plans (feature_key, catalog_version, target_grain, value_type, temporal_scope, "
+        "valid_values, feature_json, plan_json, embedding, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+          feature_key(feature),
+          catalog_version,
+          *_filter_values(norm),
+          json.dumps(norm, sort_keys=True),
+          plan.model_dump_json(),
+          emb[0].tobytes() if emb is not None else None,
+          time.time(),
+        ),
+      )
+      self._conn.commit()
+
+  def invalidate(self, catalog_version: Optional[str] = None) -> None:
+    """Drops the plans of one catalog version, or all plans."""
+    with self._lock:
+      if catalog_version is None:
+        self._conn.execute("DELETE FROM plans")
+      else:
+        self._conn.execute("DELETE FROM plans WHERE catalog_version = ?", (catalog_version,))
+      self._conn.commit()
@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.optimizer.scope import traverse_scope
+
+from ..utils.env import get_env
+from .sql_validator import CatalogIndex
+
+# SQL dialect of the engine behind each data asset, used when a sampled query is sent through its connector
+ENGINE_DIALECTS = {"SNOWFLAKE": "snowflake", "AIP": "tsql", "ATLAS": "tsql"}
+# table-level catalog field pointing at a pre-materialized sample of the table
+SAMPLE_TABLE_FIELD = "SAMPLE_TABLE"
+
+
+@dataclass
+class SampleSpec:
+  """
+  Deterministic preview sampling.
+
+  Attributes:
+    percent: Share of each sampled table read (TABLESAMPLE ... PERCENT).
+    seed: Sampling seed; the same seed returns the same rows across runs.
+    sample_tables: "DB.SCHEMA.TABLE" -> pre-materialized sample table, used instead of TABLESAMPLE.
+    sample_joined: Also sample joined tables. Off by default: only the driving (FROM) table of each
+      query block is sampled and joined tables are read whole, so every sampled key keeps all of its
+      join matches and join multipliers measured on the preview are unbiased.
+    min_rows: Tables with a known row count at or below this are read whole.
+  """
+  percent: float = 1.0
+  seed: int = 42
+  sample_tables: Dict[str, str] = field(default_factory=dict)
+  sample_joined: bool = False
+  min_rows: int = 100_000
+
+  @classmethod
+  def from_env(cls, seed: Optional[int] = None) -> Optional["SampleSpec"]:
+    """
+    Sampling configured by DBCRAWL_PREVIEW_SAMPLE_PERCENT; a seed passed by the executor enables it
+    with the default percent. Returns None when neither is set (full previews).
+    """
+    percent = get_env("DBCRAWL_PREVIEW_SAMPLE_PERCENT")
+    if percent is None and seed is None:
+      return None
+    return cls(
+      percent=float(percent) if percent else cls.percent,
+      seed=seed if seed is not None else int(get_env("DBCRAWL_PREVIEW_SAMPLE_SEED", "42")),
+    )
+
+
+def sample_tables_from_catalog(rows: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+  """Collects "DB.SCHEMA.TABLE" -> SAMPLE_TABLE from catalog rows that carry one."""
+  out: Dict[str, str] = {}
+  for r in rows:
+    target = r.get(SAMPLE_TABLE_FIELD)
+    if target:
+      fqn = ".".join(str(r[k]).upper() for k in ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME") if r.get(k))
+      out.setdefault(fqn, str(target))
+  return out
+
+
+def sample_sql(
+  sql: str,
+  spec: SampleSpec,
+  index: Optional[CatalogIndex] = None,
+  read: str = "spark",
+  write: str = "spark",
+) -> str:
+  """
+  Rewrites source table references into deterministic samples.
+
+  A table with a pre-materialized sample in `spec.sample_tables` is swapped for it (keeping the
+  original name as alias, so qualified column references still resolve). Otherwise the table gets
+  `TABLESAMPLE (percent PERCENT)` with `spec.seed`, rendered in the `write` dialect
+  (SEED / REPEATABLE as the engine requires). CTE references are not sampled; their sources are.
+
+  Args:
+    sql (str): Query to rewrite.
+    spec (SampleSpec): Sampling settings.
+    index (Optional[CatalogIndex]): Resolves partially qualified names and row counts.
+    read (str): Dialect of `sql`.
+    write (str): Dialect of the returned SQL.
+
+  Returns:
+    str: The sampled query.
+  """
+  root = sqlglot.parse_one(sql, read=read)
+  for scope in traverse_scope(root):
+    select = scope.expression
+    from_ = select.args.get("from") or select.args.get("from_")
+    driving = from_.this if from_ is not None else None
+    for _, (_, source) in list(scope.selected_sources.items()):
+      if not isinstance(source, exp.Table) or source.args.get("sample") is not None:
+        continue
+      keys = index.resolve_table(source.catalog, source.db, source.name) if index is not None else []
+      fqn = ".".join(p for p in keys[0] if p) if keys else ".".join(
+        p.upper() for p in (source.catalog, source.db, source.name) if p
+      )
+      target = spec.sample_tables.get(fqn)
+      if target:
+        replacement = exp.to_table(target, dialect=read)
+        replacement.set("alias", source.args.get("alias") or exp.TableAlias(this=exp.to_identifier(source.name)))
+        source.replace(replacement)
+        continue
+      if source is not driving and not spec.sample_joined:
+        continue
+      if index is not None and keys:
+        rows = max((index.row_counts.get(k, -1) for k in keys), default=-1)
+        if 0 <= rows <= spec.min_rows:
+          continue
+      source.set("sample", exp.TableSample(
+        percent=exp.Literal.number(spec.percent),
+        seed=exp.Literal.number(spec.seed),
+      ))
+  return root.sql(dialect=write)
+
+
+def render_sampled(sql: str, read: str = "spark", write: str = "spark") -> str:
+  """
+  Renders a query that was already sampled by `sample_sql` (e.g. before the cost guard) in the
+  engine's dialect, so its TABLESAMPLE clauses use the engine's syntax (Snowflake
+  `AS o TABLESAMPLE (1) SEED (7)`, T-SQL `REPEATABLE (7)`). SQL without a sample clause is
+  returned unchanged.
+
+  Args:
+    sql (str): Sampled query in `read` dialect.
+    read (str): Dialect of `sql`.
+    write (str): Engine dialect.
+
+  Returns:
+    str: The query in `write` dialect.
+  """
+  if read == write:
+    return sql
+  root = sqlglot.parse_one(sql, read=read)
+  if root.find(exp.TableSample) is None:
+    return sql
+  return root.sql(dialect=write)
@@ -1,68 +1,447 @@
-from ..llms.openai.embeddings_openai import SBERTModel
+from ..llms.embedding_registry import get_sbert_model, default_model_path, default_backend
+from ..utils.env import get_env
+from .index_store import FaissIndexStore, CatalogFingerprint, catalog_row_id, diff_catalog
+from .index_factory import IndexSpec, ExactTopK, build_index, training_size, tune_index, supports_remove
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .context_packer import pack_columns
+from .catalog_loader import has_examples, iter_catalog_rows
 from langchain_core.tools import tool
+from langchain_core.messages import ToolMessage
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from itertools import islice
+import numpy as np
 import faiss
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+# Each column is stored as up to len(VECTOR_FIELDS) vectors; vector id = (row id << SLOT_BITS) | slot
+VECTOR_FIELDS = ("name", "qualified", "examples")
+SLOT_BITS = 2
+MAX_EXAMPLES_EMBEDDED = 5
+# Columns encoded and added to the index per SBERT batch
+EMBED_BATCH_ROWS = 1024
+
+
+def _batched(items: Iterable[int], size: int) -> Iterator[List[int]]:
+  it = iter(items)
+  while True:
+    batch = list(islice(it, size))
+    if not batch:
+      return
+    yield batch
+
 class SchemaEmbedder:
-  def __init__(self):
+  def __init__(
+    self,
+    index_store: Optional[FaissIndexStore] = None,
+    index_spec: Optional[IndexSpec] = None,
+    model_path: Optional[str] = None,
+    backend: Optional[str] = None,
+    hybrid: bool = True,
+    vector_fields: Tuple[str, ...] = VECTOR_FIELDS,
+  ):
     """
-    Initializes the SchemaEmbedder class by loading the SBERT model.
+    Initializes the SchemaEmbedder class with the process-wide shared SBERT model.
+
+    Args:
+      index_store (Optional[FaissIndexStore]): Persistent index cache. Defaults to a store
+        under DBCRAWL_INDEX_CACHE_DIR when that env var is set, otherwise no caching.
+      index_spec (Optional[IndexSpec]): FAISS backend (flat, IVF-Flat, HNSW, IVF-PQ) and its
+        tuning knobs. Defaults to the exact flat index.
+      model_path (Optional[str]): Sentence-transformer to use; defaults to the packaged all-mpnet-base-v2.
+      backend (Optional[str]): Encoder backend (torch | torch-int8 | onnx | onnx-int8); the
+        quantized/ONNX variants are faster on CPU-only workers.
+      hybrid (bool): Fuse BM25 scores over COLUMN_NAME/TABLE_NAME/EXAMPLES with the dense
+        scores, and answer exact identifier queries from the inverted index without encoding.
+      vector_fields (Tuple[str, ...]): Representations embedded per column, each as its own
+        vector: "name" (COLUMN_NAME), "qualified" (TABLE_NAME.COLUMN_NAME) and "examples"
+        (column name plus sampled EXAMPLES). Queries score a column by its best vector.
     """
-    current_dir = os.getcwd()
-    self.sbert = SBERTModel(f"{current_dir}/sbert_package-0.0.1/sentence_transformer_package/models/all-mpnet-base-v2")
+    self.model_path = model_path or default_model_path()
+    self.backend = backend or default_backend()
+    if index_store is None and get_env("DBCRAWL_INDEX_CACHE_DIR"):
+      index_store = FaissIndexStore(get_env("DBCRAWL_INDEX_CACHE_DIR"))
+    self.index_store = index_store
+    self.index_spec = index_spec or IndexSpec()
+    self.hybrid = hybrid
+    unknown = set(vector_fields) - set(VECTOR_FIELDS)
+    if unknown or not vector_fields:
+      raise ValueError(f"vector_fields must be a non-empty subset of {VECTOR_FIELDS}, got {vector_fields}")
+    self.vector_fields = tuple(f for f in VECTOR_FIELDS if f in vector_fields)
     self.faiss_data = None
-  def embed_column_names(self, schema):
+
+  @property
+  def sbert(self):
+    # resolved on first use so constructing an agent never loads weights
+    return get_sbert_model(self.model_path, self.backend)
+
+  def embed_column_names(self, schema, incremental: bool = True):
     """
-    Embeds each column name from the database schema using an embeddings model.
+    Embeds each column from the database schema using an embeddings model, as one vector
+    per configured representation (name, table-qualified name, sampled examples).
+
+    When `incremental` is set and an index already exists (in memory, or as the latest
+    entry in the index store), only new or changed rows are encoded and rows that are
+    gone are removed from the ID-mapped index.
 
     Args:
-      schema (List[dict]): List of dictionaries representing the database schema.
+      schema: The database schema as a list of catalog rows, an iterator of row batches (see
+        `catalog_loader.iter_catalog_batches`) or a catalog file path, which is streamed so
+        rows without EXAMPLES are dropped while parsing.
+      incremental (bool): Update the previous index instead of rebuilding it.
 
     Returns:
       dict: A dictionary containing the FAISS index and the schema mapping.
     """
-   # Extract column names from the schema
-    filtered_schema = [
-      entry for entry in schema
-      if entry.get("EXAMPLES") not in (None, [], "null")
-    ]
-    column_names = [entry["COLUMN_NAME"] for entry in filtered_schema]
+   # Stream the columns with EXAMPLES, hashing them for the cache key as they arrive
+    fingerprint = CatalogFingerprint(self._index_tag)
+    incoming: Dict[int, Dict[str, Any]] = {}
+
+    def _stream() -> Iterator[int]:
+      for entry in self._iter_schema(schema):
+        if not has_examples(entry):
+          continue
+        fingerprint.update(entry)
+        rid = catalog_row_id(entry)
+        if rid not in incoming:
+          incoming[rid] = entry
+          yield rid
+
+   # Nothing cached to reuse: encode and add in batches while the catalog streams in
+    if self.faiss_data is None and self.index_store is None:
+      faiss_index, recall = self._build_index(_stream(), incoming)
+      return self._publish(fingerprint.hexdigest(), faiss_index, incoming, None, recall)
+
+    for _ in _stream():
+      pass
+    cache_key = fingerprint.hexdigest()
+
+   # Reuse the in-memory or persisted index when this exact catalog was embedded before
+    if self.faiss_data is not None and self.faiss_data.get("cache_key") == cache_key:
+      return self.faiss_data
+    if self.index_store is not None:
+      cached = self.index_store.load(cache_key)
+      if cached is not None:
+        tune_index(cached["faiss_index"], self.index_spec)
+        self.faiss_data = {**cached, "cache_key": cache_key, "mmapped": True}
+        if self.hybrid:
+          self.faiss_data["lexical_index"] = LexicalIndex.from_mapping(cached["schema_mapping"])
+        return self.faiss_data
+
+    base = self._incremental_base() if incremental else None
+    updated = self._update_index(base, incoming) if base is not None else None
+    if updated is None:
+      faiss_index, recall = self._build_index(iter(incoming), incoming)
+      return self._publish(cache_key, faiss_index, incoming, None, recall)
+    faiss_index, schema_mapping, lexical_index = updated
+    return self._publish(cache_key, faiss_index, schema_mapping, lexical_index, None)
+
+  def _publish(self, cache_key, faiss_index, schema_mapping, lexical_index, recall):
+    if self.hybrid and lexical_index is None:
+      lexical_index = LexicalIndex.from_mapping(schema_mapping)
+
+    self.faiss_data = {"faiss_index": faiss_index, "schema_mapping": schema_mapping, "cache_key": cache_key}
+    if lexical_index is not None:
+      self.faiss_data["lexical_index"] = lexical_index
+    if recall is not None:
+      self.faiss_data["recall_at_k"] = recall
+    if self.index_store is not None:
+      self.index_store.save(cache_key, faiss_index, schema_mapping, tag=self._index_tag)
+    return self.faiss_data
+
+  @staticmethod
+  def _iter_schema(schema):
+    if isinstance(schema, (str, os.PathLike)):
+      yield from iter_catalog_rows(schema, skip_empty_examples=True)
+      return
+    for item in schema:
+      if isinstance(item, list): # a batch
+        yield from item
+      else:
+        yield item
+
+  @property
+  def _index_tag(self) -> str:
+    # a cached index is only reusable for the same model, backend, representations and index build parameters
+    return f"{self.model_path}|{self.backend}|{','.join(self.vector_fields)}|{self.index_spec.describe()}"
+
+  def _column_texts(self, row: Dict[str, Any]) -> List[Tuple[int, str]]:
+    """
+    Returns the (slot, text) pairs embedded for one column.
+    """
+    column = str(row.get("COLUMN_NAME") or "")
+    texts: List[Tuple[int, str]] = []
+    for field in self.vector_fields:
+      slot = VECTOR_FIELDS.index(field)
+      if field == "name":
+        texts.append((slot, column))
+      elif field == "qualified":
+        texts.append((slot, f"{row.get('TABLE_NAME') or ''}.{column}"))
+      elif field == "examples":
+        examples = row.get("EXAMPLES")
+        if isinstance(examples, list) and examples:
+          sample = ", ".join(str(v) for v in examples[:MAX_EXAMPLES_EMBEDDED])
+          texts.append((slot, f"{column}: {sample}"))
+    return texts
+
+  def _encode_rows(self, rids: List[int], rows: Dict[int, Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes every representation of the given rows in one batch.
+
+    Returns:
+      Tuple[np.ndarray, np.ndarray]: (float32 embeddings, int64 vector ids).
+    """
+    texts: List[str] = []
+    vector_ids: List[int] = []
+    for rid in rids:
+      for slot, text in self._column_texts(rows[rid]):
+        texts.append(text)
+        vector_ids.append((rid << SLOT_BITS) | slot)
+    embeddings = self.sbert.model.encode(texts).astype('float32')
+    return embeddings, np.asarray(vector_ids, dtype='int64')
+
+  @staticmethod
+  def _vector_ids(rids: List[int]) -> np.ndarray:
+    return np.asarray([(rid << SLOT_BITS) | slot for rid in rids for slot in range(len(VECTOR_FIELDS))], dtype='int64')
+
+  def _incremental_base(self):
+    """
+    Returns the index to update incrementally, or None when a full build is needed.
+    Indexes read through mmap are read-only, so they are re-read into memory first.
+    """
+    base = self.faiss_data
+    if base is None or base.get("mmapped"):
+      key = base.get("cache_key") if base else None
+      if key is None and self.index_store is not None:
+        key = self.index_store.latest_key(self._index_tag)
+      base = self.index_store.load(key, mmap=False) if (key and self.index_store is not None) else None
+    if base is None or not hasattr(base["faiss_index"], "id_map"):
+      return None
+    tune_index(base["faiss_index"], self.index_spec)
+    return base
+
+  def _build_index(self, rids: Iterable[int], incoming):
+    """
+    Builds the index from row ids that may still be streaming in, encoding and adding
+    EMBED_BATCH_ROWS columns at a time. IVF/PQ backends buffer only the first
+    `training_size` vectors to train their quantizers.
+
+    Returns:
+      Tuple: (faiss index keyed by vector id, recall@k of an approximate backend or None).
+    """
+    faiss_index = None
+    pending: List[Tuple[np.ndarray, np.ndarray]] = []
+    pending_count = 0
+    train_size = training_size(self.index_spec)
+    truth = None
 
-   # Generate embeddings for the column names
-    column_name_embeddings = self.sbert.model.encode(column_names)
-    embedding_dimension = column_name_embeddings.shape[1] # Dimension of embeddings
-    faiss_index = faiss.IndexFlatL2(embedding_dimension) # L2 distance index
+    def _add(embeddings, vector_ids):
+      faiss_index.add_with_ids(embeddings, vector_ids)
+      if truth is not None:
+        truth.add(embeddings, vector_ids)
 
-   # Add embeddings to the FAISS index
-    faiss_index.add(column_name_embeddings)
-    schema_mapping = {i: filtered_schema[i] for i in range(len(filtered_schema))}
+    def _flush():
+      nonlocal faiss_index, truth
+      embeddings = np.vstack([e for e, _ in pending])
+      vector_ids = np.concatenate([v for _, v in pending])
+      pending.clear()
+      faiss_index = build_index(embeddings, self.index_spec) # trained, keyed by vector id
+     # Recall@k of the approximate backend against exact search, using catalog vectors as probe queries
+      if self.index_spec.kind != "flat" and self.index_spec.recall_sample > 0 and len(vector_ids) > 0:
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(vector_ids), size=min(self.index_spec.recall_sample, len(vector_ids)), replace=False)
+        truth = ExactTopK(embeddings[sample], self.index_spec.recall_k)
+      _add(embeddings, vector_ids)
 
-    self.faiss_data = {"faiss_index": faiss_index, "schema_mapping": schema_mapping}
+    for batch in _batched(rids, EMBED_BATCH_ROWS):
+      embeddings, vector_ids = self._encode_rows(batch, incoming)
+      if faiss_index is not None:
+        _add(embeddings, vector_ids)
+        continue
+      pending.append((embeddings, vector_ids))
+      pending_count += len(vector_ids)
+      if pending_count >= train_size:
+        _flush()
+    if faiss_index is None:
+      if not pending:
+        pending.append(self._encode_rows([], incoming))
+      _flush()
 
-  @tool("task_decomposer_rag_tool",description="A tool to query the FAISS index for identifying the actual columns present the databases to query.")
-  def query_faiss_index(self, query: str, k: int = 1):
+    recall = None
+    if truth is not None:
+      recall = truth.recall(faiss_index)
+      logger.info("%s recall@%d: %.3f", self.index_spec.kind, self.index_spec.recall_k, recall)
+    return faiss_index, recall
+
+  def _update_index(self, base, incoming):
+    faiss_index = base["faiss_index"]
+    lexical_index = base.get("lexical_index")
+    schema_mapping = dict(base["schema_mapping"])
+    to_add, to_remove, to_refresh = diff_catalog(schema_mapping, incoming)
+    logger.info("incremental re-embedding: +%d -%d ~%d", len(to_add), len(to_remove), len(to_refresh))
+
+    if to_remove and not supports_remove(faiss_index):
+      return None
+    if to_remove:
+      faiss_index.remove_ids(self._vector_ids(to_remove))
+      for rid in to_remove:
+        row = schema_mapping.pop(rid, None)
+        if lexical_index is not None:
+          lexical_index.remove(rid, row)
+    for batch in _batched(to_add, EMBED_BATCH_ROWS):
+      embeddings, vector_ids = self._encode_rows(batch, incoming)
+      faiss_index.add_with_ids(embeddings, vector_ids)
+    for rid in to_add + to_refresh:
+      if lexical_index is not None:
+        lexical_index.add(rid, incoming[rid])
+      schema_mapping[rid] = incoming[rid]
+    return faiss_index, schema_mapping, lexical_index
+
+  @tool("task_decomposer_rag_tool",description="A tool to query the FAISS index for identifying the actual columns present the databases to query. Accepts one query string or a list of query strings.")
+  def query_faiss_index(self, query: Union[str, List[str]], k: int = 1):
     """
     Queries the FAISS index and retrieves the schema entries for the nearest neighbors.
 
     Args:
-      faiss_data (dict): A dictionary containing the FAISS index and the schema mapping.
-      query (str): The query string to search for.
-      k (int): Number of nearest neighbors to retrieve.
+      query (Union[str, List[str]]): The query string to search for, or several queries to
+        encode and search in a single batch.
+      k (int): Number of nearest neighbors to retrieve per query.
 
     Returns:
-      List[dict]: List of schema entries corresponding to the nearest neighbors.
+      List[dict]: List of schema entries corresponding to the nearest neighbors. For a list of
+        queries the entries are de-duplicated across queries and carry `matched_queries`.
     """
-   # Generate embedding for the query
     print("using the rag tool to identify the columns")
-    query_embedding = self.sbert.model.encode([query]).astype('float32')
+    if isinstance(query, str):
+      return [row for row, _ in self.search_batch([query], k)[0]]
+    return self.query_batch(query, k)
+
+  def search_batch(self, queries: List[str], k: int) -> List[List[Tuple[Dict[str, Any], float]]]:
+    """
+    Retrieves columns for several queries with one SBERT batch and a single index.search call.
+
+    In hybrid mode, identifier-like queries whose exact COLUMN_NAME hits fill k are answered
+    from the inverted index without being encoded; the remaining queries fuse dense and BM25
+    rankings with reciprocal rank fusion, ranked after any exact hits. Each column is scored by its closest vector (max-sim over its
+    name / qualified-name / examples representations).
+
+    Args:
+      queries (List[str]): Query strings.
+      k (int): Number of nearest neighbors to retrieve per query.
 
-   # Search the FAISS index
-    distances, indices = self.faiss_data["faiss_index"].search(query_embedding, k)
-    print(distances)
+    Returns:
+      List[List[Tuple[dict, float]]]: Per query, the (schema entry, score) pairs best first.
+        Scores are higher-is-better: 1 / (1 + L2 distance) for dense-only retrieval, the fused
+        RRF score in hybrid mode, and 1.0 for exact identifier hits.
+    """
+    if not queries:
+      return []
     schema_mapping = self.faiss_data["schema_mapping"]
-    nearest_neighbors = [schema_mapping[idx] for idx in indices[0]]
+    lexical_index = self.faiss_data.get("lexical_index") if self.hybrid else None
+    results: List[List[Tuple[Dict[str, Any], float]]] = [[] for _ in queries]
+
+   # Exact identifier hits skip the embedding model entirely when they fill k
+    to_encode: List[int] = []
+    exact_hits: List[List[int]] = []
+    for qi, query in enumerate(queries):
+      exact = lexical_index.exact_matches(query) if (lexical_index is not None and LexicalIndex.is_identifier(query)) else []
+      exact_hits.append(exact[:k])
+      results[qi] = [(schema_mapping[rid], 1.0) for rid in exact[:k]]
+      if len(exact) < k:
+        to_encode.append(qi)
+    if not to_encode:
+      return results
+
+   # Generate embeddings for the remaining queries at once
+    query_embeddings = self.sbert.model.encode([queries[qi] for qi in to_encode]).astype('float32')
+
+   # Search the FAISS index; fetch one hit per representation so max-sim can fill k columns,
+   # and over-fetch in hybrid mode so fusion has candidates to re-rank
+    k_dense = k * 2 if lexical_index is not None else k
+    distances, indices = self.faiss_data["faiss_index"].search(query_embeddings, k_dense * len(self.vector_fields))
+    for qi, q_dist, q_idx in zip(to_encode, distances, indices):
+     # max-sim aggregation: hits come back nearest first, so the first hit per column is its best
+      best: Dict[int, float] = {}
+      for dist, idx in zip(q_dist, q_idx):
+        if idx != -1:
+          best.setdefault(int(idx) >> SLOT_BITS, float(dist))
+      dense = list(best.items())[:k_dense]
+      if lexical_index is None:
+        results[qi] = [(schema_mapping[rid], 1.0 / (1.0 + dist)) for rid, dist in dense[:k]]
+        continue
+      lexical = [rid for rid, _ in lexical_index.search(queries[qi], k_dense)]
+      exact = set(exact_hits[qi])
+      fused = reciprocal_rank_fusion([[rid for rid, _ in dense], lexical], k + len(exact))
+      results[qi] += [(schema_mapping[rid], score) for rid, score in fused if rid not in exact][:k - len(exact)]
+    return results
+
+  def query_batch(self, queries: List[str], k: int = 1) -> List[Dict[str, Any]]:
+    """
+    Runs several queries as one batch and merges their hits.
+
+    Args:
+      queries (List[str]): Query strings.
+      k (int): Number of nearest neighbors to retrieve per query.
+
+    Returns:
+      List[dict]: Unique schema entries ordered by best score, each with `matched_queries`
+        (the queries that retrieved it) and `score` (its best retrieval score).
+    """
+    merged: Dict[int, Dict[str, Any]] = {}
+    for query, hits in zip(queries, self.search_batch(queries, k)):
+      for row, score in hits:
+        key = id(row)
+        entry = merged.get(key)
+        if entry is None:
+          merged[key] = {**row, "matched_queries": [query], "score": score}
+        else:
+          if query not in entry["matched_queries"]:
+            entry["matched_queries"].append(query)
+          entry["score"] = max(entry["score"], score)
+    return sorted(merged.values(), key=lambda r: r["score"], reverse=True)
+
+  def answer_tool_calls(
+    self,
+    tool_calls: List[Dict[str, Any]],
+    default_k: int = 10,
+    token_budget: int = 1500,
+  ) -> List[ToolMessage]:
+    """
+    Answers every task_decomposer_rag_tool call from one LLM turn with a single batched search.
+
+    Args:
+      tool_calls (List[dict]): LangChain tool calls ({"name", "args", "id"}) from an AIMessage.
+      default_k (int): k used when a call does not specify one.
+      token_budget (int): Token budget of each packed tool response.
+
+    Returns:
+      List[ToolMessage]: One message per rag tool call, in call order.
+    """
+    calls = [tc for tc in tool_calls if tc.get("name") == "task_decomposer_rag_tool"]
+    queries: List[str] = []
+    spans: List[Tuple[int, int, int]] = []
+    for tc in calls:
+      args = tc.get("args") or {}
+      q = args.get("query") or []
+      q = [q] if isinstance(q, str) else list(q)
+      spans.append((len(queries), len(queries) + len(q), int(args.get("k") or default_k)))
+      queries.extend(q)
 
-    return nearest_neighbors
+    max_k = max((span[2] for span in spans), default=default_k)
+    hits = self.search_batch(queries, max_k)
+    messages: List[ToolMessage] = []
+    for tc, (lo, hi, k) in zip(calls, spans):
+      scored: Dict[int, Dict[str, Any]] = {}
+      for per_query in hits[lo:hi]:
+        for row, score in per_query[:k]:
+          prev = scored.get(id(row))
+          if prev is None or score > prev["score"]:
+            scored[id(row)] = {**row, "score": score}
+      content = pack_columns(list(scored.values()), token_budget=token_budget)
+      messages.append(ToolMessage(content=content, tool_call_id=tc.get("id") or ""))
+    return messages
 
 
 
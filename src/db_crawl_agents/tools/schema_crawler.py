@@ -0,0 +1,718 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.env import get_env
+from .catalog_loader import CatalogSource, JSONL_SUFFIXES, iter_catalog_rows
+from .column_sketches import SketchStore, column_key, publish_sketch_store
+
+STATE_VERSION = 1
+DEFAULT_EXAMPLES = 5 # distinct EXAMPLES kept per column
+DEFAULT_SAMPLE_ROWS = 200 # rows read per table to pick EXAMPLES from
+MAX_EXAMPLE_CHARS = 200
+OBJECT_TYPES = {"BASE TABLE": "TABLE", "TABLE": "TABLE", "VIEW": "VIEW", "MATERIALIZED VIEW": "VIEW"}
+
+# PRIMARY KEY / UNIQUE flags of a column
+KeyFlags = Tuple[bool, bool]
+
+
+@dataclass
+class TableInfo:
+  """A table or view as listed by a connector."""
+  schema: str
+  table: str
+  object_type: str = "TABLE"
+  last_altered: Optional[str] = None # DDL or data change marker reported by the source, if any
+  comment: Optional[str] = None
+  row_count: Optional[int] = None
+
+
+@dataclass
+class ColumnInfo:
+  name: str
+  data_type: Optional[str] = None
+  is_nullable: Optional[str] = None # "YES" / "NO", as in INFORMATION_SCHEMA
+  ordinal_position: Optional[int] = None
+  comment: Optional[str] = None
+
+
+class Connector:
+  """
+  Source of catalog metadata for `SchemaCrawler`.
+
+  Metadata is listed a schema at a time (one query per schema for tables, columns and keys),
+  so refreshes stay cheap; only `sample` runs per table. Every method receives a connection from
+  `connect()`; the crawler opens one per worker thread, so implementations need not be thread-safe.
+  """
+
+  catalog: Optional[str] = None # value of the CatalogRow `catalog` field (the data asset)
+
+  def connect(self) -> Any:
+    raise NotImplementedError
+
+  def close(self, conn: Any) -> None:
+    conn.close()
+
+  def database_name(self, conn: Any) -> str:
+    raise NotImplementedError
+
+  def list_schemas(self, conn: Any) -> List[str]:
+    raise NotImplementedError
+
+  def list_tables(self, conn: Any, schema: str) -> List[TableInfo]:
+    raise NotImplementedError
+
+  def list_columns(self, conn: Any, schema: str) -> Dict[str, List[ColumnInfo]]:
+    """Columns of every table in `schema`, keyed by table name, in ordinal order."""
+    raise NotImplementedError
+
+  def list_keys(self, conn: Any, schema: str) -> Dict[str, Dict[str, KeyFlags]]:
+    """table -> column -> (part of the primary key, unique on its own)."""
+    return {}
+
+  def sample(self, conn: Any, table: TableInfo, columns: List[str], limit: int) -> List[Sequence[Any]]:
+    """Up to `limit` rows of `columns`, used to pick EXAMPLES."""
+    raise NotImplementedError
+
+
+def quote_ident(name: str) -> str:
+  return '"' + str(name).replace('"', '""') + '"'
+
+
+def key_flags(rows: Iterable[Tuple[str, str, str, str]]) -> Dict[str, Dict[str, KeyFlags]]:
+  """
+  Folds (table, column, constraint name, constraint type) rows into per-column key flags. A column
+  of a composite key is marked as part of the primary key but not as unique.
+  """
+  members: Dict[Tuple[str, str, str], List[str]] = {}
+  for table, column, name, ctype in rows:
+    members.setdefault((table, name, str(ctype).upper()), []).append(column)
+  out: Dict[str, Dict[str, KeyFlags]] = {}
+  for (table, _, ctype), columns in members.items():
+    for column in columns:
+      pk, unique = out.setdefault(table, {}).get(column, (False, False))
+      out[table][column] = (pk or ctype == "PRIMARY KEY", unique or len(columns) == 1)
+  return out
+
+
+class InformationSchemaConnector(Connector):
+  """
+  Generic DB-API connector over ANSI INFORMATION_SCHEMA views.
+
+  Works for most warehouses given a `connect` callable, e.g. for Snowflake
+  `InformationSchemaConnector(lambda: snowflake.connector.connect(...), "ANALYTICS",
+  catalog="SNOWFLAKE", paramstyle="pyformat", last_altered_column="LAST_ALTERED",
+  comment_column="COMMENT")`. Subclasses adjust the SQL templates for a specific engine.
+  """
+
+  system_schemas = ("INFORMATION_SCHEMA",)
+  schemas_sql = "SELECT schema_name FROM information_schema.schemata"
+  tables_sql = (
+    "SELECT table_name, table_type{extra} FROM information_schema.tables "
+    "WHERE table_schema = {p} ORDER BY table_name"
+  )
+  columns_sql = (
+    "SELECT table_name, column_name, data_type, is_nullable, ordinal_position{extra} "
+    "FROM information_schema.columns WHERE table_schema = {p} ORDER BY table_name, ordinal_position"
+  )
+  keys_sql = (
+    "SELECT kcu.table_name, kcu.column_name, tc.constraint_name, tc.constraint_type "
+    "FROM information_schema.table_constraints tc "
+    "JOIN information_schema.key_column_usage kcu "
+    "ON kcu.constraint_schema = tc.constraint_schema AND kcu.constraint_name = tc.constraint_name "
+    "AND kcu.table_name = tc.table_name "
+    "WHERE tc.table_schema = {p} AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE')"
+  )
+  sample_sql = "SELECT {columns} FROM {table} LIMIT {limit}"
+
+  def __init__(
+    self,
+    connect: Callable[[], Any],
+    database: str,
+    catalog: Optional[str] = None,
+    paramstyle: str = "qmark",
+    last_altered_column: Optional[str] = None,
+    comment_column: Optional[str] = None,
+  ):
+    """
+    Args:
+      connect (Callable): Returns a new DB-API connection.
+      database (str): DATABASE_NAME written to the rows.
+      catalog (Optional[str]): `catalog` field written to the rows.
+      paramstyle (str): The driver's DB-API paramstyle ("qmark", "format", "pyformat", "numeric").
+      last_altered_column (Optional[str]): information_schema.tables column holding the last DDL/DML time.
+      comment_column (Optional[str]): Comment column of information_schema.tables and .columns.
+    """
+    self._connect = connect
+    self.database = database
+    self.catalog = catalog
+    self.paramstyle = paramstyle
+    self.last_altered_column = last_altered_column
+    self.comment_column = comment_column
+
+  @property
+  def placeholder(self) -> str:
+    return {"qmark": "?", "format": "%s", "pyformat": "%s", "numeric": ":1"}.get(self.paramstyle, "?")
+
+  def _query(self, conn: Any, sql: str, params: Sequence[Any] = ()) -> List[Sequence[Any]]:
+    cur = conn.cursor()
+    try:
+      cur.execute(sql, tuple(params)) if params else cur.execute(sql)
+      return cur.fetchall()
+    finally:
+      cur.close()
+
+  def connect(self) -> Any:
+    return self._connect()
+
+  def database_name(self, conn: Any) -> str:
+    return self.database
+
+  def list_schemas(self, conn: Any) -> List[str]:
+    system = {s.upper() for s in self.system_schemas}
+    return [r[0] for r in self._query(conn, self.schemas_sql) if str(r[0]).upper() not in system]
+
+  def list_tables(self, conn: Any, schema: str) -> List[TableInfo]:
+    extra = "".join(f", {c}" for c in (self.last_altered_column, self.comment_column) if c)
+    rows = self._query(conn, self.tables_sql.format(extra=extra, p=self.placeholder), (schema,))
+    out = []
+    for r in rows:
+      rest = list(r[2:])
+      last_altered = _text(rest.pop(0)) if self.last_altered_column else None
+      comment = rest.pop(0) if self.comment_column else None
+      out.append(TableInfo(schema, r[0], _object_type(r[1]), last_altered, comment))
+    return out
+
+  def list_columns(self, conn: Any, schema: str) -> Dict[str, List[ColumnInfo]]:
+    extra = f", {self.comment_column}" if self.comment_column else ""
+    out: Dict[str, List[ColumnInfo]] = {}
+    for r in self._query(conn, self.columns_sql.format(extra=extra, p=self.placeholder), (schema,)):
+      comment = r[5] if self.comment_column else None
+      out.setdefault(r[0], []).append(ColumnInfo(r[1], r[2], r[3], r[4], comment))
+    return out
+
+  def list_keys(self, conn: Any, schema: str) -> Dict[str, Dict[str, KeyFlags]]:
+    return key_flags(self._query(conn, self.keys_sql.format(p=self.placeholder), (schema,)))
+
+  def sample(self, conn: Any, table: TableInfo, columns: List[str], limit: int) -> List[Sequence[Any]]:
+    sql = self.sample_sql.format(
+      columns=", ".join(quote_ident(c) for c in columns),
+      table=f"{quote_ident(table.schema)}.{quote_ident(table.table)}",
+      limit=int(limit),
+    )
+    return self._query(conn, sql)
+
+
+class PostgresConnector(InformationSchemaConnector):
+  """
+  PostgreSQL (and RDS / Aurora Postgres) connector, using psycopg 3 or psycopg2.
+
+  Postgres keeps no DDL timestamp, so `last_altered` is the table's last (auto-)analyze time from
+  pg_stat_all_tables, which moves after significant data changes; DDL changes are caught by the
+  crawler's column fingerprint. Large tables are sampled with TABLESAMPLE SYSTEM instead of reading
+  their first rows.
+  """
+
+  system_schemas = ("information_schema", "pg_catalog", "pg_toast")
+  schemas_sql = (
+    "SELECT nspname FROM pg_catalog.pg_namespace "
+    "WHERE nspname NOT LIKE 'pg\\_%%' AND nspname <> 'information_schema' ORDER BY nspname"
+  )
+  tables_sql = (
+    "SELECT t.table_name, t.table_type, "
+    "GREATEST(s.last_analyze, s.last_autoanalyze), "
+    "obj_description(c.oid, 'pg_class'), "
+    "c.reltuples::bigint "
+    "FROM information_schema.tables t "
+    "JOIN pg_catalog.pg_namespace n ON n.nspname = t.table_schema "
+    "JOIN pg_catalog.pg_class c ON c.relnamespace = n.oid AND c.relname = t.table_name "
+    "LEFT JOIN pg_catalog.pg_stat_all_tables s ON s.relid = c.oid "
+    "WHERE t.table_schema = %s ORDER BY t.table_name"
+  )
+  columns_sql = (
+    "SELECT c.table_name, c.column_name, "
+    "CASE WHEN c.data_type IN ('ARRAY', 'USER-DEFINED') THEN c.udt_name ELSE c.data_type END, "
+    "c.is_nullable, c.ordinal_position, "
+    "col_description((quote_ident(c.table_schema) || '.' || quote_ident(c.table_name))::regclass, c.ordinal_position) "
+    "FROM information_schema.columns c WHERE c.table_schema = %s "
+    "ORDER BY c.table_name, c.ordinal_position"
+  )
+  # tables with more (estimated) rows than this are sampled with TABLESAMPLE SYSTEM
+  tablesample_min_rows = 100_000
+
+  def __init__(self, dsn: Optional[str] = None, catalog: Optional[str] = "POSTGRES", statement_timeout_ms: int = 30_000):
+    """
+    Args:
+      dsn (Optional[str]): libpq connection string or URL; defaults to DBCRAWL_CRAWL_DSN.
+      catalog (Optional[str]): `catalog` field written to the rows.
+      statement_timeout_ms (int): Per-statement timeout set on every crawler connection.
+    """
+    super().__init__(self._open, database="", catalog=catalog, paramstyle="format")
+    self.dsn = dsn or get_env("DBCRAWL_CRAWL_DSN", required=True)
+    self.statement_timeout_ms = statement_timeout_ms
+
+  def _open(self) -> Any:
+    try:
+      import psycopg
+      conn = psycopg.connect(self.dsn, autocommit=True)
+    except ImportError:
+      import psycopg2
+      conn = psycopg2.connect(self.dsn)
+      conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"SET statement_timeout = {int(self.statement_timeout_ms)}")
+    cur.close()
+    return conn
+
+  def database_name(self, conn: Any) -> str:
+    if not self.database:
+      self.database = self._query(conn, "SELECT current_database()")[0][0]
+    return self.database
+
+  def list_tables(self, conn: Any, schema: str) -> List[TableInfo]:
+    rows = self._query(conn, self.tables_sql, (schema,))
+    return [
+      TableInfo(schema, r[0], _object_type(r[1]), _text(r[2]), r[3], int(r[4]) if r[4] is not None and r[4] >= 0 else None)
+      for r in rows
+    ]
+
+  def list_columns(self, conn: Any, schema: str) -> Dict[str, List[ColumnInfo]]:
+    out: Dict[str, List[ColumnInfo]] = {}
+    for r in self._query(conn, self.columns_sql, (schema,)):
+      out.setdefault(r[0], []).append(ColumnInfo(r[1], r[2], r[3], r[4], r[5]))
+    return out
+
+  def sample(self, conn: Any, table: TableInfo, columns: List[str], limit: int) -> List[Sequence[Any]]:
+    if table.object_type == "TABLE" and table.row_count and table.row_count > self.tablesample_min_rows:
+      percent = min(100.0, max(0.01, 100.0 * limit * 10 / table.row_count))
+      sql = (
+        f"SELECT {', '.join(quote_ident(c) for c in columns)} "
+        f"FROM {quote_ident(table.schema)}.{quote_ident(table.table)} "
+        f"TABLESAMPLE SYSTEM ({percent:.4f}) REPEATABLE (42) LIMIT {int(limit)}"
+      )
+      rows = self._query(conn, sql)
+      if rows:
+        return rows
+    return super().sample(conn, table, columns, limit)
+
+
+class SQLiteConnector(Connector):
+  """
+  SQLite connector, a local stand-in for a warehouse. Schemas are `main` and any attached
+  databases; SQLite records no change times, so refreshes rely on the column fingerprint.
+  """
+
+  def __init__(self, path: str, database: Optional[str] = None, catalog: Optional[str] = "SQLITE", attach: Optional[Dict[str, str]] = None):
+    """
+    Args:
+      path (str): Database file.
+      database (Optional[str]): DATABASE_NAME written to the rows; defaults to the file name.
+      catalog (Optional[str]): `catalog` field written to the rows.
+      attach (Optional[Dict[str, str]]): Extra database files to attach, as {schema: path}.
+    """
+    self.path = path
+    self.database = database or os.path.splitext(os.path.basename(path))[0]
+    self.catalog = catalog
+    self.attach = dict(attach or {})
+
+  def connect(self) -> sqlite3.Connection:
+    # each connection stays on the worker thread that opened it; the crawler closes them all at the end
+    conn = sqlite3.connect(self.path, check_same_thread=False)
+    for schema, path in self.attach.items():
+      conn.execute("ATTACH DATABASE ? AS " + quote_ident(schema), (path,))
+    return conn
+
+  def database_name(self, conn: sqlite3.Connection) -> str:
+    return self.database
+
+  def list_schemas(self, conn: sqlite3.Connection) -> List[str]:
+    return [r[1] for r in conn.execute("PRAGMA database_list") if r[1] != "temp"]
+
+  def list_tables(self, conn: sqlite3.Connection, schema: str) -> List[TableInfo]:
+    rows = conn.execute(
+      f"SELECT name, type FROM {quote_ident(schema)}.sqlite_master "
+      "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' ORDER BY name"
+    )
+    return [TableInfo(schema, name, _object_type(kind)) for name, kind in rows]
+
+  def list_columns(self, conn: sqlite3.Connection, schema: str) -> Dict[str, List[ColumnInfo]]:
+    out: Dict[str, List[ColumnInfo]] = {}
+    for t in self.list_tables(conn, schema):
+      rows = conn.execute(f"PRAGMA {quote_ident(schema)}.table_info({quote_ident(t.table)})")
+      out[t.table] = [ColumnInfo(name, dtype or None, "NO" if notnull else "YES", cid + 1) for cid, name, dtype, notnull, _, _ in rows]
+    return out
+
+  def list_keys(self, conn: sqlite3.Connection, schema: str) -> Dict[str, Dict[str, KeyFlags]]:
+    q = quote_ident(schema)
+    rows: List[Tuple[str, str, str, str]] = []
+    for t in self.list_tables(conn, schema):
+      if t.object_type != "TABLE":
+        continue
+      pk = [(pos, name) for _, name, _, _, _, pos in conn.execute(f"PRAGMA {q}.table_info({quote_ident(t.table)})") if pos]
+      rows += [(t.table, name, "pk", "PRIMARY KEY") for _, name in sorted(pk)]
+      for _, index, unique, origin, partial in conn.execute(f"PRAGMA {q}.index_list({quote_ident(t.table)})"):
+        if unique and origin != "pk" and not partial:
+          rows += [(t.table, r[2], index, "UNIQUE") for r in conn.execute(f"PRAGMA {q}.index_info({quote_ident(index)})") if r[2]]
+    return key_flags(rows)
+
+  def sample(self, conn: sqlite3.Connection, table: TableInfo, columns: List[str], limit: int) -> List[Sequence[Any]]:
+    sql = (
+      f"SELECT {', '.join(quote_ident(c) for c in columns)} "
+      f"FROM {quote_ident(table.schema)}.{quote_ident(table.table)} LIMIT {int(limit)}"
+    )
+    return conn.execute(sql).fetchall()
+
+
+def _object_type(value: Any) -> str:
+  text = str(value or "TABLE").upper()
+  return OBJECT_TYPES.get(text, text)
+
+
+def _text(value: Any) -> Optional[str]:
+  if value is None:
+    return None
+  return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _example(value: Any) -> Optional[str]:
+  if value is None or isinstance(value, (bytes, bytearray, memoryview)):
+    return None
+  text = _text(value) if isinstance(value, (datetime.date, datetime.time)) else str(value)
+  text = text.strip()
+  return text[:MAX_EXAMPLE_CHARS] if text else None
+
+
+def pick_examples(rows: List[Sequence[Any]], n_columns: int, k: int = DEFAULT_EXAMPLES) -> List[List[str]]:
+  """First `k` distinct non-empty values per column of sampled rows, as strings."""
+  out: List[List[str]] = [[] for _ in range(n_columns)]
+  seen = [set() for _ in range(n_columns)]
+  for row in rows:
+    for j in range(n_columns):
+      if len(out[j]) >= k:
+        continue
+      text = _example(row[j])
+      if text is not None and text not in seen[j]:
+        seen[j].add(text)
+        out[j].append(text)
+  return out
+
+
+def table_fingerprint(table: TableInfo, columns: List[ColumnInfo], keys: Dict[str, KeyFlags]) -> str:
+  """Hash of everything a catalog row takes from metadata; a changed hash means the table is re-crawled."""
+  parts = [table.object_type, table.comment or ""]
+  for c in columns:
+    pk, unique = keys.get(c.name, (False, False))
+    parts.append("\x1f".join(str(v) for v in (c.name, c.data_type, c.is_nullable, c.ordinal_position, c.comment, pk, unique)))
+  return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _TableMeta:
+  info: TableInfo
+  columns: List[ColumnInfo]
+  keys: Dict[str, KeyFlags]
+  fingerprint: str
+
+
+@dataclass
+class CrawlResult:
+  """
+  Outcome of a crawl.
+
+  Attributes:
+    rows: CatalogRow-shaped dicts for the whole database, ordered by schema, table and column.
+    state: Resume state to pass to the next crawl (see `SchemaCrawler.crawl`).
+    crawled: "SCHEMA.TABLE" keys whose metadata and EXAMPLES were read in this run.
+    reused: Unchanged tables whose rows were carried over from the previous catalog.
+    removed: Tables in the previous state that no longer exist.
+    errors: "SCHEMA" or "SCHEMA.TABLE" -> error message; rows of a failed schema are carried over.
+  """
+  rows: List[Dict[str, Any]]
+  state: Dict[str, Any]
+  crawled: List[str] = field(default_factory=list)
+  reused: List[str] = field(default_factory=list)
+  removed: List[str] = field(default_factory=list)
+  errors: Dict[str, str] = field(default_factory=dict)
+  elapsed_s: float = 0.0
+
+
+class SchemaCrawler:
+  """
+  Builds `columns_lineage_table_json` catalogs from a live database.
+
+  Per schema, tables, columns and PRIMARY KEY / UNIQUE constraints are read with one bulk query
+  each; per table, a few rows are sampled for EXAMPLES. Schemas are crawled in parallel, and
+  sampling of the tables that need it is spread over the same pool, each worker thread holding its
+  own connection. Given the state of a previous crawl, a table is only sampled again when its
+  `last_altered` marker or its metadata fingerprint changed; other tables keep their previous rows.
+  """
+
+  def __init__(
+    self,
+    connector: Connector,
+    max_workers: Optional[int] = None,
+    schemas: Optional[Iterable[str]] = None,
+    exclude_schemas: Iterable[str] = (),
+    examples: int = DEFAULT_EXAMPLES,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    row_counts: bool = False,
+    sketches: Optional[SketchStore] = None,
+  ):
+    """
+    Args:
+      connector (Connector): Metadata source.
+      max_workers (Optional[int]): Parallel connections; defaults to DBCRAWL_CRAWL_WORKERS or 8.
+      schemas (Optional[Iterable[str]]): Only crawl these schemas (case-insensitive).
+      exclude_schemas (Iterable[str]): Schemas to skip.
+      examples (int): EXAMPLES kept per column; 0 skips sampling.
+      sample_rows (int): Rows read per table to pick EXAMPLES from.
+      row_counts (bool): Add the connector's row estimate as ROW_COUNT (read by cost estimation).
+        Off by default, since estimates drift and ROW_COUNT is part of the catalog version.
+      sketches (Optional[SketchStore]): Column sketches refreshed from every sampled read (all
+        `sample_rows` rows, not just the kept EXAMPLES); sketches of changed or removed tables are replaced.
+    """
+    self.connector = connector
+    self.max_workers = max_workers or int(get_env("DBCRAWL_CRAWL_WORKERS", "8"))
+    self.schemas = {s.upper() for s in schemas} if schemas is not None else None
+    self.exclude_schemas = {s.upper() for s in exclude_schemas}
+    self.examples = examples
+    self.sample_rows = sample_rows
+    self.row_counts = row_counts
+    self.sketches = sketches
+    self._database = ""
+    self._local = threading.local()
+    self._conns: List[Any] = []
+    self._conns_lock = threading.Lock()
+
+  def _conn(self) -> Any:
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      conn = self._local.conn = self.connector.connect()
+      with self._conns_lock:
+        self._conns.append(conn)
+    return conn
+
+  def _close_all(self) -> None:
+    with self._conns_lock:
+      conns, self._conns = self._conns, []
+    for conn in conns:
+      try:
+        self.connector.close(conn)
+      except Exception:
+        pass
+    self._local = threading.local()
+
+  def _wanted(self, schema: str) -> bool:
+    s = schema.upper()
+    return s not in self.exclude_schemas and (self.schemas is None or s in self.schemas)
+
+  def _schema_meta(self, schema: str) -> List[_TableMeta]:
+    conn = self._conn()
+    tables = self.connector.list_tables(conn, schema)
+    columns = self.connector.list_columns(conn, schema)
+    keys = self.connector.list_keys(conn, schema)
+    out = []
+    for t in tables:
+      cols = sorted(columns.get(t.table, []), key=lambda c: c.ordinal_position or 0)
+      if cols:
+        out.append(_TableMeta(t, cols, keys.get(t.table, {}), table_fingerprint(t, cols, keys.get(t.table, {}))))
+    return out
+
+  def _sample(self, meta: _TableMeta) -> List[List[str]]:
+    names = [c.name for c in meta.columns]
+    rows = self.connector.sample(self._conn(), meta.info, names, self.sample_rows)
+    if self.sketches is not None:
+      table = ".".join(p for p in (self._database, meta.info.schema, meta.info.table) if p)
+      self.sketches.discard_table(table)
+      self.sketches.add_sample(table, [dict(zip(names, r)) for r in rows])
+    return pick_examples(rows, len(names), self.examples)
+
+  def _rows(self, database: str, meta: _TableMeta, examples: Optional[List[List[str]]]) -> List[Dict[str, Any]]:
+    t = meta.info
+    out = []
+    for j, c in enumerate(meta.columns):
+      pk, unique = meta.keys.get(c.name, (False, False))
+      row: Dict[str, Any] = {
+        "catalog": self.connector.catalog,
+        "DATABASE_NAME": database,
+        "SCHEMA_NAME": t.schema,
+        "TABLE_NAME": t.table,
+        "COLUMN_NAME": c.name,
+        "DATA_TYPE": c.data_type,
+        "OBJECT_TYPE": t.object_type,
+        "IS_NULLABLE": c.is_nullable,
+        "ORDINAL_POSITION": str(c.ordinal_position) if c.ordinal_position is not None else None,
+        "IS_PRIMARY_KEY": "YES" if pk else "NO",
+        "IS_UNIQUE": "YES" if unique else "NO",
+        "EXAMPLES": examples[j] if examples is not None else None,
+        "comment": c.comment,
+      }
+      if self.row_counts and t.row_count is not None:
+        row["ROW_COUNT"] = t.row_count
+      out.append(row)
+    return out
+
+  def crawl(self, previous: Optional[CatalogSource] = None, state: Optional[Dict[str, Any]] = None) -> CrawlResult:
+    """
+    Crawls the database, incrementally when `previous` and `state` come from an earlier crawl.
+
+    Args:
+      previous (Optional[CatalogSource]): The previous catalog (rows or file).
+      state (Optional[dict]): `CrawlResult.state` of the crawl that produced `previous`.
+
+    Returns:
+      CrawlResult: The full catalog plus what was crawled, reused and removed.
+    """
+    t0 = time.time()
+    state = state or {}
+    # a different EXAMPLES setting invalidates every table
+    prev_tables: Dict[str, Dict[str, Any]] = dict(state.get("tables") or {}) if state.get("examples", DEFAULT_EXAMPLES) == self.examples else {}
+    prev_rows: Dict[str, List[Dict[str, Any]]] = {}
+    if previous is not None and prev_tables:
+      for r in iter_catalog_rows(previous):
+        prev_rows.setdefault(_key(r.get("SCHEMA_NAME"), r.get("TABLE_NAME")), []).append(dict(r))
+
+    result = CrawlResult(rows=[], state={})
+    metas: Dict[str, _TableMeta] = {}
+    failed_schemas = set()
+    pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="schema-crawl")
+    try:
+      conn = self._conn()
+      database = self._database = self.connector.database_name(conn)
+      schemas = [s for s in self.connector.list_schemas(conn) if self._wanted(s)]
+      futures = {pool.submit(self._schema_meta, s): s for s in schemas}
+      for fut in as_completed(futures):
+        schema = futures[fut]
+        try:
+          for meta in fut.result():
+            metas[_key(meta.info.schema, meta.info.table)] = meta
+        except Exception as e:
+          failed_schemas.add(schema.upper())
+          result.errors[schema] = f"{type(e).__name__}: {e}"
+
+      todo, table_state = [], {}
+      for key, meta in metas.items():
+        old = prev_tables.get(key)
+        if (old and key in prev_rows and old.get("sampled")
+            and old.get("fingerprint") == meta.fingerprint and old.get("last_altered") == meta.info.last_altered):
+          result.reused.append(key)
+          table_state[key] = {"last_altered": meta.info.last_altered, "fingerprint": meta.fingerprint, "sampled": True}
+        else:
+          todo.append(key)
+
+      examples: Dict[str, Optional[List[List[str]]]] = {}
+      if self.examples > 0:
+        futures = {pool.submit(self._sample, metas[key]): key for key in todo}
+        for fut in as_completed(futures):
+          key = futures[fut]
+          try:
+            examples[key] = fut.result()
+          except Exception as e:
+            examples[key] = None
+            result.errors[key] = f"{type(e).__name__}: {e}"
+      for key in todo:
+        # tables whose sample failed are retried on the next refresh
+        table_state[key] = {"last_altered": metas[key].info.last_altered, "fingerprint": metas[key].fingerprint,
+                            "sampled": self.examples == 0 or examples.get(key) is not None}
+        result.crawled.append(key)
+    finally:
+      pool.shutdown(wait=True)
+      self._close_all()
+
+    reused = set(result.reused)
+    for key in sorted(set(metas) | {k for k in prev_tables if k.split(".", 1)[0] in failed_schemas}):
+      if key in metas:
+        result.rows += prev_rows[key] if key in reused else self._rows(database, metas[key], examples.get(key))
+      elif key in prev_rows: # schema could not be read this time: keep what we had
+        result.rows += prev_rows[key]
+        table_state[key] = prev_tables[key]
+    result.removed = sorted(k for k in prev_tables if k not in table_state)
+    if self.sketches is not None:
+      for key in result.removed:
+        self.sketches.discard_table(f"{database}.{key}")
+    result.crawled.sort()
+    result.reused.sort()
+    result.state = {
+      "version": STATE_VERSION,
+      "catalog": self.connector.catalog,
+      "database": database,
+      "examples": self.examples,
+      "crawled_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+      "tables": table_state,
+    }
+    result.elapsed_s = round(time.time() - t0, 3)
+    return result
+
+
+def _key(schema: Any, table: Any) -> str:
+  return f"{str(schema or '').upper()}.{str(table or '').upper()}"
+
+
+def _write_json(path: str, rows: List[Dict[str, Any]]) -> None:
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  tmp = path + ".tmp"
+  with open(tmp, "w", encoding="utf-8") as fh:
+    if path.lower().endswith(JSONL_SUFFIXES):
+      for row in rows:
+        fh.write(json.dumps(row, default=str) + "\n")
+    else:
+      json.dump(rows, fh, default=str)
+  os.replace(tmp, path)
+
+
+def crawl_catalog(
+  connector: Connector,
+  output_path: str,
+  state_path: Optional[str] = None,
+  full: bool = False,
+  **crawler_kwargs: Any,
+) -> CrawlResult:
+  """
+  Crawls a database into a catalog file, refreshing the previous file in place when present.
+
+  Args:
+    connector (Connector): Metadata source, e.g. `PostgresConnector(dsn)` or `SQLiteConnector(path)`.
+    output_path (str): Catalog file (`.json` array or `.jsonl`), usable as `columns_lineage_table_json`.
+    state_path (Optional[str]): Resume state; defaults to `<output_path>.state.json`.
+    full (bool): Ignore the previous catalog and state and re-crawl every table.
+    **crawler_kwargs: Passed to `SchemaCrawler`. Unless `sketches` is given, column sketches are
+      kept next to the catalog as `<output_path>.sketches.npz` and published for the catalog's
+      version (see `column_sketches.publish_sketch_store`).
+
+  Returns:
+    CrawlResult: The crawl result; the catalog and state are written atomically.
+  """
+  state_path = state_path or output_path + ".state.json"
+  state, previous = None, None
+  if not full and os.path.isfile(output_path) and os.path.isfile(state_path):
+    with open(state_path, "r", encoding="utf-8") as fh:
+      state = json.load(fh)
+    if state.get("version") == STATE_VERSION and state.get("catalog") == connector.catalog:
+      previous = output_path
+    else:
+      state = None
+  sketches_path = output_path + ".sketches.npz"
+  if "sketches" not in crawler_kwargs and crawler_kwargs.get("examples", DEFAULT_EXAMPLES) > 0:
+    crawler_kwargs["sketches"] = SketchStore.load(sketches_path) if previous and os.path.isfile(sketches_path) else SketchStore()
+  result = SchemaCrawler(connector, **crawler_kwargs).crawl(previous, state)
+  _write_json(output_path, result.rows)
+  sketches = crawler_kwargs.get("sketches")
+  if sketches is not None:
+    from .index_store import catalog_fingerprint
+    for row in result.rows: # tables never sampled by the crawler (e.g. a failed sample) fall back to EXAMPLES
+      if column_key(row) not in sketches and row.get("EXAMPLES"):
+        sketches.add(column_key(row), row["EXAMPLES"])
+    sketches.save(sketches_path)
+    # the version the decomposer computes for this file, so its join graph uses the sampled sketches
+    publish_sketch_store(sketches, catalog_fingerprint(result.rows))
+  with open(state_path + ".tmp", "w", encoding="utf-8") as fh:
+    json.dump(result.state, fh, indent=1)
+  os.replace(state_path + ".tmp", state_path)
+  return result
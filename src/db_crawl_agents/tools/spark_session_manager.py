@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.env import get_env
+
+SUPPORTED_DATA_ASSETS = ("AIP", "ATLAS", "SNOWFLAKE")
+
+
+def config_hash(config_dict: Dict[str, Any]) -> str:
+  """Stable hash of a connection config, used to key cached readers."""
+  return hashlib.sha1(json.dumps(config_dict, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SparkSessionManager:
+  """
+  Long-lived Spark sessions and reader configurations for the preview executor.
+
+  One base SparkSession is created lazily with a configurable master and parallelism.
+  Each (data_asset, config hash) gets its own child session (`newSession()`), so the
+  `spark.conf` entries of AIP, ATLAS and of different configs of the same asset are
+  applied once and never overwrite each other. Reader configurations are cached under
+  the same key, next to their session; `reader()` hands out a fresh
+  DataFrameReader from the cached configuration, because DataFrameReader.option()
+  mutates the reader and a shared instance would race under concurrent previews.
+  """
+
+  def __init__(self, master: Optional[str] = None, parallelism: Optional[int] = None, app_name: str = "DataPuller"):
+    """
+    Args:
+      master (Optional[str]): Spark master URL. Defaults to DBCRAWL_SPARK_MASTER, else "local[*]".
+      parallelism (Optional[int]): Default parallelism and shuffle partitions.
+        Defaults to DBCRAWL_SPARK_PARALLELISM when set; otherwise Spark's own default.
+      app_name (str): Spark application name.
+    """
+    self.master = master or get_env("DBCRAWL_SPARK_MASTER", "local[*]")
+    env_parallelism = get_env("DBCRAWL_SPARK_PARALLELISM")
+    self.parallelism = parallelism or (int(env_parallelism) if env_parallelism else None)
+    self.app_name = app_name
+    self._base = None
+    self._sessions: Dict[Tuple[str, str], Any] = {}
+    self._readers: Dict[Tuple[str, str], Tuple[str, Dict[str, str]]] = {}
+    self._lock = threading.RLock()
+
+  def base_session(self):
+    """Returns the process-wide SparkSession, creating it on first use."""
+    if self._base is None:
+      with self._lock:
+        if self._base is None:
+          from pyspark.sql import SparkSession
+          builder = SparkSession.builder.master(self.master).appName(self.app_name)
+          if self.parallelism:
+            builder = builder.config("spark.default.parallelism", str(self.parallelism)) \
+              .config("spark.sql.shuffle.partitions", str(self.parallelism))
+          self._base = builder.getOrCreate()
+    return self._base
+
+  def session(self, data_asset: str, config_dict: Optional[Dict[str, Any]] = None):
+    """
+    Returns the session dedicated to `data_asset` and `config_dict`, sharing the base SparkContext.
+    The session's `spark.conf` holds that config's options, so configs never share a session.
+    """
+    if data_asset not in SUPPORTED_DATA_ASSETS:
+      raise ValueError(f"Unsupported data asset: {data_asset}")
+    key = (data_asset, config_hash(config_dict) if config_dict is not None else "")
+    sess = self._sessions.get(key)
+    if sess is None:
+      with self._lock:
+        sess = self._sessions.get(key)
+        if sess is None:
+          sess = self.base_session().newSession()
+          self._sessions[key] = sess
+    return sess
+
+  def _reader_config(self, data_asset: str, config_dict: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+    """
+    Applies the session-level settings for (`data_asset`, `config_dict`) once, on that pair's own
+    session, and returns (format, reader options).
+    """
+    key = (data_asset, config_hash(config_dict))
+    cfg = self._readers.get(key)
+    if cfg is not None:
+      return cfg
+    with self._lock:
+      cfg = self._readers.get(key)
+      if cfg is not None:
+        return cfg
+      sess = self.session(data_asset, config_dict)
+      if data_asset == 'AIP':
+        for param, value in config_dict['options'].items():
+          sess.conf.set(param, value)
+        cfg = ("com.databricks.spark.sqldw", {
+          "url": config_dict['SQLDW_URL'],
+          "tempDir": config_dict['POLYBASE_STORAGE_PATH'],
+          "enableServicePrincipalAuth": "true",
+          "useAzureMSI": "true",
+        })
+      elif data_asset == 'ATLAS':
+        for param, value in config_dict['options'].items():
+          sess.conf.set(param, value)
+        cfg = ("com.databricks.spark.sqldw", {
+          "url": config_dict['SQLDW_URL_ATLAS'],
+          "tempDir": config_dict['POLYBASE_STORAGE_PATH_ATLAS'],
+          "enableServicePrincipalAuth": "true",
+          "useAzureMSI": "true",
+        })
+      else:
+        cfg = (config_dict['SNOWFLAKE_SOURCE_NAME'], dict(config_dict['options']))
+      self._readers[key] = cfg
+    return cfg
+
+  def reader(self, data_asset: str, config_dict: Dict[str, Any]):
+    """
+    Returns a DataFrameReader configured for `data_asset`.
+
+    Args:
+      data_asset (str): The type of data asset ('AIP', 'ATLAS', 'SNOWFLAKE').
+      config_dict (dict): Configuration dictionary containing connection details.
+    """
+    fmt, options = self._reader_config(data_asset, config_dict)
+    return self.session(data_asset, config_dict).read.format(fmt).options(**options)
+
+  def stop(self) -> None:
+    with self._lock:
+      if self._base is not None:
+        self._base.stop()
+      self._base = None
+      self._sessions.clear()
+      self._readers.clear()
+
+
+_default_manager: Optional[SparkSessionManager] = None
+_default_lock = threading.Lock()
+
+
+def get_session_manager() -> SparkSessionManager:
+  """Returns the process-wide SparkSessionManager."""
+  global _default_manager
+  if _default_manager is None:
+    with _default_lock:
+      if _default_manager is None:
+        _default_manager = SparkSessionManager()
+  return _default_manager
+
+
+def set_session_manager(manager: SparkSessionManager) -> None:
+  """Replaces the process-wide manager, e.g. to change master or parallelism at startup."""
+  global _default_manager
+  with _default_lock:
+    _default_manager = manager
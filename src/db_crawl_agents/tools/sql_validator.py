@@ -0,0 +1,317 @@
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+TableKey = Tuple[str, str, str] # (DATABASE_NAME, SCHEMA_NAME, TABLE_NAME), upper-cased
+
+# table-level row count fields a catalog extract may carry (CatalogRow allows extra fields)
+ROW_COUNT_FIELDS = ("ROW_COUNT", "TABLE_ROWS", "NUM_ROWS")
+
+# statements that must never reach a preview
+_WRITE_NODES = (exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Alter, exp.Command)
+_SET_OPS = getattr(exp, "SetOperation", exp.Union) # UNION/INTERSECT/EXCEPT
+MAX_CACHED_INDEXES = 4
+
+
+def _u(value: Any) -> str:
+  return str(value or "").upper()
+
+
+def catalog_identity_version(rows: Iterable[Dict[str, Any]]) -> str:
+  """
+  Cheap version of a catalog for the index: a hash of the column identities, key flags and
+  row counts only, since types, examples and comments do not affect resolution or costing.
+  """
+  fields = ("DATABASE_NAME", "SCHEMA_NAME", "TABLE_NAME", "COLUMN_NAME", "IS_PRIMARY_KEY", "IS_UNIQUE") + ROW_COUNT_FIELDS
+  h = hashlib.sha1()
+  for r in rows:
+    h.update("\x1f".join(_u(r.get(k)) for k in fields).encode("utf-8"))
+    h.update(b"\n")
+  return h.hexdigest()
+
+
+class CatalogIndex:
+  """
+  Name-resolution index over catalog rows: db -> schema -> table -> columns, plus lookups
+  for the partially qualified forms SQL uses (TABLE, SCHEMA.TABLE, DB.TABLE). All names are
+  upper-cased, so quoted and unquoted identifiers resolve alike.
+  """
+
+  def __init__(self, rows: Iterable[Dict[str, Any]], version: Optional[str] = None):
+    self.version = version
+    self.tree: Dict[str, Dict[str, Dict[str, Set[str]]]] = defaultdict(lambda: defaultdict(dict))
+    self.columns: Dict[TableKey, Set[str]] = {}
+    self._by_name: Dict[str, List[TableKey]] = defaultdict(list)
+    self._by_schema_table: Dict[Tuple[str, str], List[TableKey]] = defaultdict(list)
+    self._by_db_table: Dict[Tuple[str, str], List[TableKey]] = defaultdict(list)
+    self.unique_columns: Dict[TableKey, Set[str]] = defaultdict(set) # IS_PRIMARY_KEY / IS_UNIQUE = Y
+    self.row_counts: Dict[TableKey, int] = {}
+    for r in rows:
+      key = (_u(r.get("DATABASE_NAME")), _u(r.get("SCHEMA_NAME")), _u(r.get("TABLE_NAME")))
+      cols = self.columns.get(key)
+      if cols is None:
+        cols = self.columns[key] = set()
+        self.tree[key[0]][key[1]][key[2]] = cols
+        self._by_name[key[2]].append(key)
+        self._by_schema_table[(key[1], key[2])].append(key)
+        self._by_db_table[(key[0], key[2])].append(key)
+      col = _u(r.get("COLUMN_NAME"))
+      cols.add(col)
+      if _u(r.get("IS_PRIMARY_KEY")) in ("Y", "YES", "TRUE") or _u(r.get("IS_UNIQUE")) in ("Y", "YES", "TRUE"):
+        self.unique_columns[key].add(col)
+      if key not in self.row_counts:
+        for f in ROW_COUNT_FIELDS:
+          if r.get(f) not in (None, ""):
+            try:
+              self.row_counts[key] = int(float(r[f]))
+            except (TypeError, ValueError):
+              pass
+            break
+
+  def __len__(self) -> int:
+    return sum(len(c) for c in self.columns.values())
+
+  def resolve_fqn(self, fqn_table: str) -> List[TableKey]:
+    """Candidate tables for a dotted reference as used in plans ("DB.TABLE", "DB.SCHEMA.TABLE")."""
+    parts = [p.strip('`"[]') for p in fqn_table.split(".")][-3:]
+    return self.resolve_table(*([""] * (3 - len(parts)) + parts))
+
+  def resolve_table(self, catalog: str, db: str, name: str) -> List[TableKey]:
+    """
+    Candidate catalog tables for a (catalog, db, name) reference as parsed by sqlglot.
+    Two-part names are tried as SCHEMA.TABLE and DB.TABLE, since plans use both.
+    """
+    catalog, db, name = _u(catalog), _u(db), _u(name)
+    if catalog:
+      key = (catalog, db, name)
+      return [key] if key in self.columns else []
+    if db:
+      return self._by_schema_table.get((db, name), []) or self._by_db_table.get((db, name), [])
+    return self._by_name.get(name, [])
+
+
+_index_cache: "OrderedDict[str, CatalogIndex]" = OrderedDict()
+# id(rows) -> (rows, len(rows), version) for plain lists, so a catalog list passed again is not re-hashed;
+# holding the list keeps its id from being reused
+_version_cache: "OrderedDict[int, Tuple[Any, int, str]]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def _rows_version(rows: Any) -> str:
+  if not isinstance(rows, list):
+    return getattr(rows, "version", None) or catalog_identity_version(rows)
+  with _index_lock:
+    hit = _version_cache.get(id(rows))
+    if hit is not None and hit[0] is rows and hit[1] == len(rows):
+      _version_cache.move_to_end(id(rows))
+      return hit[2]
+  version = catalog_identity_version(rows)
+  with _index_lock:
+    _version_cache[id(rows)] = (rows, len(rows), version)
+    while len(_version_cache) > MAX_CACHED_INDEXES:
+      _version_cache.popitem(last=False)
+  return version
+
+
+def get_catalog_index(rows: List[Dict[str, Any]], catalog_version: Optional[str] = None) -> CatalogIndex:
+  """
+  Returns the CatalogIndex for `rows`, building it once per catalog version.
+
+  Args:
+    rows (List[dict]): Catalog rows (CatalogRow-shaped dicts).
+    catalog_version (Optional[str]): Version id of the catalog when the caller already has one;
+      otherwise the version of a CatalogStore, or `catalog_identity_version(rows)`, is used. The
+      version of a list is remembered for that list object, so catalogs must not be edited in
+      place after indexing (pass `catalog_version` if they are).
+  """
+  version = catalog_version or _rows_version(rows)
+  with _index_lock:
+    index = _index_cache.get(version)
+    if index is not None:
+      _index_cache.move_to_end(version)
+      return index
+  index = CatalogIndex(rows, version)
+  with _index_lock:
+    _index_cache[version] = index
+    while len(_index_cache) > MAX_CACHED_INDEXES:
+      _index_cache.popitem(last=False)
+  return index
+
+
+@dataclass
+class ColumnReference:
+  column: str
+  qualifier: str # alias/table as written, "" when unqualified
+  resolved: Optional[str] = None # "DB.SCHEMA.TABLE.COLUMN"; None for CTE/derived-table columns
+
+
+@dataclass
+class ValidationReport:
+  ok: bool
+  errors: List[str] = field(default_factory=list)
+  tables: List[str] = field(default_factory=list)
+  columns: List[ColumnReference] = field(default_factory=list)
+
+
+def _outputs(scope: Scope) -> Optional[Set[str]]:
+  """Output column names of a CTE/derived-table scope, or None when it selects `*`."""
+  node = scope.expression
+  while isinstance(node, _SET_OPS):
+    node = node.left
+  if not isinstance(node, exp.Select):
+    return None
+  names: Set[str] = set()
+  for proj in node.expressions:
+    if isinstance(proj, exp.Star) or (isinstance(proj, exp.Column) and isinstance(proj.this, exp.Star)):
+      return None
+    names.add(_u(proj.alias_or_name))
+  return names
+
+
+def _fqn(key: TableKey) -> str:
+  return ".".join(p for p in key if p)
+
+
+def validate_sql(sql: str, index: CatalogIndex, grain: Optional[str] = None, dialect: str = "spark") -> ValidationReport:
+  """
+  Parses `sql` once and resolves every table and column reference against `index`.
+
+  Table references resolve through CTE names and catalog tables; column references resolve
+  through their alias/table qualifier, or, when unqualified, against every source selected
+  in their scope, falling back to enclosing scopes for correlated subqueries. Output aliases
+  of the scope's own projections are accepted outside the projection (ORDER BY total,
+  HAVING / QUALIFY on an alias); a bare projected column must still resolve to a source.
+
+  Args:
+    sql (str): Statement to validate.
+    index (CatalogIndex): Catalog built by `get_catalog_index`.
+    grain (Optional[str]): Column that must appear in the final projection.
+    dialect (str): sqlglot read dialect.
+
+  Returns:
+    ValidationReport: All errors plus the resolved table and column references.
+  """
+  report = ValidationReport(ok=False)
+  sql = (sql or "").strip()
+  if not sql:
+    report.errors.append("Empty SQL.")
+    return report
+  try:
+    statements = [s for s in sqlglot.parse(sql, read=dialect) if s is not None]
+  except ParseError as e:
+    report.errors.append(f"SQL does not parse: {e}")
+    return report
+  if len(statements) != 1:
+    report.errors.append("SQL must be a single statement.")
+    return report
+  root = statements[0]
+  if not isinstance(root, (exp.Select, _SET_OPS)) or root.find(*_WRITE_NODES) is not None:
+    report.errors.append("SQL must be SELECT-only (CTEs ending in SELECT).")
+    return report
+
+  errors: List[str] = []
+  tables: Set[str] = set()
+  by_scope: Dict[int, Dict[str, Tuple[str, Any]]] = {}
+
+  def _sources(scope: Scope) -> Dict[str, Tuple[str, Any]]:
+    """alias -> resolved catalog tables (None: unknown table) or CTE/derived output names (None: star)."""
+    sources = by_scope.get(id(scope))
+    if sources is not None:
+      return sources
+    sources = by_scope[id(scope)] = {}
+    for alias, (_, source) in scope.selected_sources.items():
+      if isinstance(source, Scope):
+        sources[_u(alias)] = ("scope", _outputs(source))
+      elif isinstance(source, exp.Table):
+        candidates = index.resolve_table(source.catalog, source.db, source.name)
+        if not candidates:
+          errors.append(f"Table not in catalog: {'.'.join(p for p in (source.catalog, source.db, source.name) if p)}")
+          sources[_u(alias)] = ("table", None)
+        else:
+          tables.update(_fqn(k) for k in candidates)
+          sources[_u(alias)] = ("table", candidates)
+    return sources
+
+  def _outer(scope: Scope) -> List[Dict[str, Tuple[str, Any]]]:
+    """Sources of the enclosing scopes, innermost first, for correlated references (subqueries only; CTEs and derived tables cannot correlate)."""
+    out = []
+    while scope.is_subquery and scope.parent is not None:
+      scope = scope.parent
+      out.append(_sources(scope))
+    return out
+
+  for scope in traverse_scope(root):
+    sources = _sources(scope)
+    select = scope.expression
+    own = {_u(e.alias) for e in select.expressions if isinstance(e, exp.Alias)} if isinstance(select, exp.Select) else set()
+
+    def _alias_ref(column: exp.Column, col: str) -> bool:
+      # a reference to one of the scope's output aliases from outside its projection
+      if col not in own:
+        return False
+      node = column
+      while node.parent is not None and node.parent is not select:
+        node = node.parent
+      return node.parent is select and node.arg_key != "expressions"
+
+    def _lookup(src: Tuple[str, Any], col: str) -> Tuple[bool, Optional[str]]:
+      kind, target = src
+      if target is None: # unknown table or star: cannot disprove the column
+        return True, None
+      if kind == "scope":
+        return col in target, None
+      for key in target:
+        if col in index.columns[key]:
+          return True, f"{_fqn(key)}.{col}"
+      return False, None
+
+    for column in scope.columns:
+      col = _u(column.name)
+      if not col or col == "*":
+        continue
+      if column.find_ancestor(exp.Select) is not select:
+        # sqlglot also lists a subquery's unqualified columns in the enclosing scope; they are checked in their own
+        continue
+      qualifier = _u(column.table)
+      ref = ColumnReference(column=col, qualifier=qualifier)
+      if qualifier:
+        src = sources.get(qualifier)
+        if src is None:
+          src = next((outer[qualifier] for outer in _outer(scope) if qualifier in outer), None)
+        if src is None and (column.args.get("db") or column.args.get("catalog")):
+          # fully qualified DB.SCHEMA.TABLE.COLUMN
+          cands = index.resolve_table(column.catalog, column.db, column.table)
+          src = ("table", cands) if cands else None
+        if src is None:
+          errors.append(f"Unknown table or alias '{column.table}' for column {column.name}")
+        else:
+          found, ref.resolved = _lookup(src, col)
+          if not found:
+            errors.append(f"Column not in catalog: {column.table}.{column.name}")
+      else:
+        hits = [r for r in (_lookup(s, col) for s in sources.values()) if r[0]]
+        alias_ref = _alias_ref(column, col)
+        for outer in _outer(scope) if not hits and not alias_ref else ():
+          hits = [r for r in (_lookup(s, col) for s in outer.values()) if r[0]]
+          if hits:
+            break
+        if hits:
+          ref.resolved = hits[0][1]
+        elif not alias_ref:
+          errors.append(f"Column not found in any source: {column.name}")
+      report.columns.append(ref)
+
+  if grain and _u(grain) not in {_u(n) for n in root.named_selects} and "*" not in root.named_selects:
+    errors.append(f"Grain '{grain}' not in final projection.")
+
+  report.errors = list(dict.fromkeys(errors))
+  report.tables = sorted(tables)
+  report.ok = not report.errors
+  return report
@@ -11,6 +11,7 @@ class RunnableLLMAdapter:
     Adapter that gives the graph the expected interface:
       - render_system(stage, **fmt)
       - generate(system, prompt, json_expected=False)
+      - agenerate(system, prompt, json_expected=False)  (async)
 
     Under the hood it calls a RunnableChatModel, so tool-calls remain intact.
     """
@@ -41,4 +42,17 @@ class RunnableLLMAdapter:
                 return {}
         else:
             ai = self.rcm.invoke(messages)
-            return ai.content
\ No newline at end of file
+            return ai.content
+
+    async def agenerate(self, system: str, prompt: str, json_expected: bool = False) -> Any:
+        messages = [SystemMessage(content=system), HumanMessage(content=prompt)]
+        if json_expected:
+            ai = await self.rcm.bind(response_format={"type": "json_object"}).ainvoke(messages)
+            try:
+                import json
+                return ai.additional_kwargs.get("parsed") or json.loads(ai.content or "{}")
+            except Exception:
+                return {}
+        else:
+            ai = await self.rcm.ainvoke(messages)
+            return ai.content
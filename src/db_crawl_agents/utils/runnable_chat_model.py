@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Iterable, Dict, Any, Optional
+from typing import List, Iterable, AsyncIterator, Dict, Any, Optional
 
 from langchain_core.messages import BaseMessage, AIMessage
 from langchain_core.runnables import Runnable
@@ -71,6 +71,32 @@ class RunnableChatModel(Runnable[List[BaseMessage], AIMessage]):
             tool_calls=to_lc_tool_calls(resp.tool_calls),
         )
 
+    async def ainvoke(self, input: List[BaseMessage], config=None, **kwargs) -> AIMessage:
+        msgs = [from_lc(m) for m in input]
+        resp = await self._m.achat(
+            msgs,
+            tools=self._tools_schema,
+            tool_choice=self._tool_choice,
+            **self._params,
+        )
+        return AIMessage(
+            content=resp.content or "",
+            tool_calls=to_lc_tool_calls(resp.tool_calls),
+        )
+
+    async def astream(self, input: List[BaseMessage], config=None, **kwargs) -> AsyncIterator[AIMessage]:
+        msgs = [from_lc(m) for m in input]
+        async for delta in self._m.astream(
+            msgs,
+            tools=self._tools_schema,
+            tool_choice=self._tool_choice,
+            **self._params,
+        ):
+            yield AIMessage(
+                content=delta.content or "",
+                tool_calls=to_lc_tool_calls(delta.tool_calls) if getattr(delta, "tool_calls", None) else [],
+            )
+
     def stream(self, input: List[BaseMessage], config=None) -> Iterable[AIMessage]:
         msgs = [from_lc(m) for m in input]
         acc = []
@@ -98,4 +124,13 @@ class RunnableChatModel(Runnable[List[BaseMessage], AIMessage]):
             import json
             return ai.additional_kwargs.get("parsed") or json.loads(ai.content or "{}")
         except Exception:
-            return {}
\ No newline at end of file
+            return {}
+
+    async def ainvoke_json(self, input: List[BaseMessage], config=None) -> Dict[str, Any]:
+        rm = self.bind(response_format={"type": "json_object"})
+        ai = await rm.ainvoke(input, config=config)
+        try:
+            import json
+            return ai.additional_kwargs.get("parsed") or json.loads(ai.content or "{}")
+        except Exception:
+            return {}
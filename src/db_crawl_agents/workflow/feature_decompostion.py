@@ -1,25 +1,44 @@
 # workflows/feature_loop.py
 
 from __future__ import annotations
-from typing import TypedDict, List, Dict, Any, Literal
+import asyncio
+from functools import partial
+from typing import TypedDict, List, Dict, Any, Callable, Literal, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from agents.contracts_runtime import (
-FeatureDefinitionSpec, CatalogRow, DecomposerPlan,
+FeatureDefinitionSpec, DecomposerPlan,
 SingleCTETaskDefinition, SingleCTEResult, CandidateAssessment, RetrySpec
 )
 from agents.task_decomposer_agent import run_task_decomposer_single_feature
 from agents.evaluator import assess_candidate
 from agents.retry_planner import suggest_retry, apply_retry
+from .parallel_execution import run_candidates, arun_candidates, _failed_result
+from ..tools.sql_validator import get_catalog_index
+from ..tools.catalog_store import as_catalog_store
+from ..tools.cost_guard import CostBudget, guard_task
+from ..nodes.feature_orchestrator.decision_graph import DecisionGraphStore
 
 # You already have this:
 
 # def execute_cte_task_spark(task: SingleCTETaskDefinition, limit: int = 10, seed: int = 42) -> SingleCTEResult: ...
+# `seed` is forwarded to singleCTE.run_single_cte(..., seed=seed), which previews on a deterministic
+# sample of each source table (see tools/preview_sampling.py).
 
 MAX_RETRIES = 2
 
 BEAM_LIMIT = 3
 
+ACCEPT_THRESHOLD = 0.75
+
+# concurrent preview stage
+MAX_PARALLEL_PREVIEWS = 6
+ENGINE_CONCURRENCY = {"snowflake": 3, "atlas": 2, "cbd": 2}
+PREVIEW_TIMEOUT_S = 120.0
+
+# pre-execution cost budget (DBCRAWL_PREVIEW_* env vars)
+COST_BUDGET = CostBudget.from_env()
+
 class FState(TypedDict, total=False):
 
     database_type: Literal["snowflake","atlas","cbd"]
@@ -36,10 +55,16 @@ class FState(TypedDict, total=False):
     accepted_task_id: str
     final_result: Dict[str, Any]
     done: bool
+    # decision graph (when the loop is built with a DecisionGraphStore): the orchestrator's
+    # FEATURE node and run for this feature, and the PLAN node recorded under it
+    feature_node: Optional[str]
+    run_id: Optional[str]
+    plan_node: Optional[str]
 
-def node_decompose(state: FState) -> FState:
+def node_decompose(state: FState, decisions: Optional[DecisionGraphStore] = None) -> FState:
     feat = FeatureDefinitionSpec.model_validate(state["feature"])
-    cat = [CatalogRow.model_validate(r) for r in state["catalog_rows"]]
+    # one compact, immutable catalog instead of a pydantic CatalogRow per column; rows are lazy views
+    cat = as_catalog_store(state["catalog_rows"])
     plan = run_task_decomposer_single_feature(
     database_type=state["database_type"],
     feature=feat,
@@ -58,21 +83,99 @@ def node_decompose(state: FState) -> FState:
     for arr in by_name.values():
         tasks.extend(arr[:BEAM_LIMIT])
 
-    return {**state, "plan": plan.model_dump(), "candidates": [t.model_dump() for t in tasks], "retries_used": 0}
+    out = {**state, "plan": plan.model_dump(), "candidates": [t.model_dump() for t in tasks], "retries_used": 0}
+    if decisions is not None and state.get("feature_node"):
+        out["plan_node"] = decisions.record_plan(state["feature_node"], plan, run_id=state.get("run_id"))
+    return out
+
+def _guard_candidates(state: FState, tasks: List[SingleCTETaskDefinition]):
+    # Candidates whose estimated scan / join fan-out exceeds the budget never reach the executor.
+    index = get_catalog_index(state.get("catalog_rows", []))
+    allowed: List[SingleCTETaskDefinition] = []
+    rejected: Dict[str, SingleCTEResult] = {}
+    for t in tasks:
+        ok, reasons = guard_task(t, index, COST_BUDGET)
+        if ok:
+            allowed.append(t)
+        else:
+            rejected[t.task_id] = _failed_result(t, "Rejected by cost guard: " + "; ".join(reasons))
+    return allowed, rejected
+
+def _assessor(feat: FeatureDefinitionSpec) -> Callable[[SingleCTEResult], CandidateAssessment]:
+    # one assessment per result, taken while its Arrow preview is still in memory
+    cache: Dict[str, CandidateAssessment] = {}
+
+    def assess(result: SingleCTEResult) -> CandidateAssessment:
+        if result.task_id not in cache:
+            cache[result.task_id] = assess_candidate(feat, result)
+        return cache[result.task_id]
+
+    return assess
+
+def _merge_in_order(tasks, results, rejected, assess) -> FState:
+    # preview tables are not msgpack-serializable, so they never enter the checkpointed state
+    by_id = {r.task_id: r for r in results}
+    by_id.update(rejected)
+    ordered = [by_id[t.task_id] for t in tasks if t.task_id in by_id]
+    return {
+        "results": [r.model_dump(exclude={"preview_table"}) for r in ordered],
+        "assessments": [assess(r).model_dump() for r in ordered],
+    }
+
+def _record_results(state: FState, results, rejected, decisions: Optional[DecisionGraphStore]) -> None:
+    # SQL and result nodes go under the task nodes of the plan recorded by node_decompose
+    if decisions is None or not state.get("plan_node"):
+        return
+    for result in [*results, *rejected.values()]:
+        decisions.record_result(state["plan_node"], result, run_id=state.get("run_id"))
+
+def node_execute_map(state: FState, decisions: Optional[DecisionGraphStore] = None) -> FState:
+    # Candidates run concurrently; once one clears the acceptance threshold the rest are dropped.
+    feat = FeatureDefinitionSpec.model_validate(state["feature"])
+    tasks = [SingleCTETaskDefinition.model_validate(tdict) for tdict in state.get("candidates", [])]
+    allowed, rejected = _guard_candidates(state, tasks)
+    assess = _assessor(feat)
+    results = run_candidates(
+        allowed,
+        lambda task: execute_cte_task_spark(task, limit=10, seed=42), # your executor
+        accept=lambda res: assess(res).confidence >= ACCEPT_THRESHOLD,
+        max_workers=MAX_PARALLEL_PREVIEWS,
+        engine_limits=ENGINE_CONCURRENCY,
+        timeout_s=PREVIEW_TIMEOUT_S,
+    )
+    _record_results(state, results, rejected, decisions)
+
+    return {**state, **_merge_in_order(tasks, results, rejected, assess)}
 
-def node_execute_map(state: FState) -> FState:
-    results: List[Dict[str, Any]] = []
-    for tdict in state.get("candidates", []):
-        task = SingleCTETaskDefinition.model_validate(tdict)
-        res = execute_cte_task_spark(task, limit=10, seed=42) # your executor
-        results.append(res.model_dump())
+async def anode_decompose(state: FState, decisions: Optional[DecisionGraphStore] = None) -> FState:
+    # The decomposer's tool loop (LLM + FAISS) is blocking; keep it off the event loop.
+    return await asyncio.to_thread(node_decompose, state, decisions)
 
-    return {**state, "results": results}
+async def anode_execute_map(state: FState, decisions: Optional[DecisionGraphStore] = None) -> FState:
+    feat = FeatureDefinitionSpec.model_validate(state["feature"])
+    tasks = [SingleCTETaskDefinition.model_validate(tdict) for tdict in state.get("candidates", [])]
+    allowed, rejected = _guard_candidates(state, tasks)
+    assess = _assessor(feat)
+    results = await arun_candidates(
+        allowed,
+        lambda task: asyncio.to_thread(execute_cte_task_spark, task, limit=10, seed=42),
+        accept=lambda res: assess(res).confidence >= ACCEPT_THRESHOLD,
+        max_workers=MAX_PARALLEL_PREVIEWS,
+        engine_limits=ENGINE_CONCURRENCY,
+        timeout_s=PREVIEW_TIMEOUT_S,
+    )
+    await asyncio.to_thread(_record_results, state, results, rejected, decisions)
+
+    return {**state, **_merge_in_order(tasks, results, rejected, assess)}
 
 def node_evaluate(state: FState) -> FState:
+    # the execute nodes already assessed their results; only results without one are assessed here
     feat = FeatureDefinitionSpec.model_validate(state["feature"])
-    assessments: List[Dict[str, Any]] = []
+    assessments: List[Dict[str, Any]] = list(state.get("assessments", []))
+    assessed = {a["task_id"] for a in assessments}
     for rdict in state.get("results", []):
+        if rdict["task_id"] in assessed:
+            continue
         result = SingleCTEResult.model_validate(rdict)
         a = assess_candidate(feat, result)
         assessments.append(a.model_dump())
@@ -83,7 +186,7 @@ def router_after_eval(state: FState) -> Literal["accept","retry","fail"]:
         return "fail"
 # pick best
     best = max(state["assessments"], key=lambda a: a["confidence"])
-    if best["confidence"] >= 0.75:
+    if best["confidence"] >= ACCEPT_THRESHOLD:
         return "accept"
     
     if state.get("retries_used", 0) < MAX_RETRIES:
@@ -125,10 +228,16 @@ def node_fail(state: FState) -> FState:
         final = next((r for r in state.get("results", []) if r["task_id"] == best["task_id"]), None)
     return {**state, "final_result": final or {}, "done": True}
 
-def build_feature_loop():
+def build_feature_loop(use_async: bool = False, decisions: Optional[DecisionGraphStore] = None):
+    """
+    Builds the decompose -> execute -> evaluate loop for one feature.
+
+    With `decisions`, the plan and every preview result are recorded in the decision graph
+    under the state's `feature_node` (the orchestrator's `feature_nodes[name]`, with its `run_id`).
+    """
     g = StateGraph(FState)
-    g.add_node("decompose", node_decompose)
-    g.add_node("execute", node_execute_map)
+    g.add_node("decompose", partial(anode_decompose if use_async else node_decompose, decisions=decisions))
+    g.add_node("execute", partial(anode_execute_map if use_async else node_execute_map, decisions=decisions))
     g.add_node("evaluate", node_evaluate)
     g.add_node("accept", node_accept)
     g.add_node("retry", node_retry)
@@ -144,4 +253,8 @@ def build_feature_loop():
     g.add_edge("retry", "execute")
     g.add_edge("accept", END)
     g.add_edge("fail", END)
-    return g.compile(checkpointer=MemorySaver())
\ No newline at end of file
+    return g.compile(checkpointer=MemorySaver())
+
+def build_feature_loop_async(decisions: Optional[DecisionGraphStore] = None):
+    """Same graph as `build_feature_loop`, with async decompose/execute nodes; drive it with `ainvoke`."""
+    return build_feature_loop(use_async=True, decisions=decisions)
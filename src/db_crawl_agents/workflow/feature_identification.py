@@ -2,13 +2,16 @@ from __future__ import annotations
 from typing import Optional, Dict, Any
 from langgraph.graph import StateGraph, END
 # from .schema import UserQuery, Feedback
-from ..contracts.feature_orchestrator.feature_orchestrator import UserQuery, Feedback
+from ..contracts.feature_orchestrator.feature_orchestrator import UserQuery, Feedback, FeatureDraft, FinalizedFeatures
 from ..contracts.feature_orchestrator.orchestrator_state import OrchestratorState
-from ..nodes.feature_orchestrator.parse_query_node import parse_query_node
-from ..nodes.feature_orchestrator.propose_features import propose_features_node
-from ..nodes.feature_orchestrator.refine_with_feedback import refine_with_feedback_node
-from ..nodes.feature_orchestrator.finalize_features import finalize_node
+from ..nodes.feature_orchestrator.parse_query_node import parse_query_node, aparse_query_node
+from ..nodes.feature_orchestrator.propose_features import propose_features_node, apropose_features_node
+from ..nodes.feature_orchestrator.refine_with_feedback import refine_with_feedback_node, arefine_with_feedback_node
+from ..nodes.feature_orchestrator.finalize_features import finalize_node, afinalize_node
 from ..nodes.feature_orchestrator.memory import OrchestratorMemory
+from ..nodes.feature_orchestrator.decision_graph import (
+    DecisionGraphStore, INTENT, DRAFT, REFINED, FINAL, FEATURE, normalize_text, stage_key,
+)
 from ..utils.feature_orchestrator.LLMAdapter import RunnableLLMAdapter
 
 PARSE = "parse_query"
@@ -18,39 +21,139 @@ FINALIZE = "finalize_features"
 DECIDE_AFTER_PROPOSE = "decide_after_propose"   # router
 DECIDE_AFTER_REFINE  = "decide_after_refine"    # router
 class OrchestratorGraph:
-    def __init__(self, llm: RunnableLLMAdapter, max_features: int = 5):
+    def __init__(
+        self,
+        llm: RunnableLLMAdapter,
+        max_features: int = 5,
+        decisions: Optional[DecisionGraphStore] = None,
+    ):
         self.llm = llm
         self.max_features = max_features
         self.mem = OrchestratorMemory()
+        # optional persistent decision graph; stages whose inputs match a previous run are reused
+        self.decisions = decisions
+        self.last_run_id: Optional[str] = None
         self.graph = self._build_graph()
+        self._agraph = None  # async-node graph, compiled on first arun()
+
+    # ---- decision-graph memo (no-ops without a store) ----
+    def _recall(self, state: OrchestratorState, kind: str, key: str) -> Optional[Any]:
+        if self.decisions is None:
+            return None
+        return self.decisions.lookup(kind, key, run_id=state.get("run_id"))
+
+    def _remember(self, state: OrchestratorState, kind: str, key: str, payload: Any) -> OrchestratorState:
+        if self.decisions is None:
+            return {}
+        node = self.decisions.record(kind, key, payload, [state.get("graph_node")], run_id=state.get("run_id"))
+        return {"graph_node": node}
+
+    def _parse_key(self, state: OrchestratorState) -> str:
+        return stage_key(PARSE, normalize_text(state["query"].text))
+
+    def _propose_key(self, state: OrchestratorState) -> str:
+        return stage_key(PROPOSE, normalize_text(state["intents"]), self.max_features)
+
+    def _refine_key(self, state: OrchestratorState) -> str:
+        return stage_key(REFINE, state["draft"].model_dump(), state["feedback"].model_dump(), self.max_features)
+
+    def _finalize_key(self, state: OrchestratorState) -> str:
+        return stage_key(FINALIZE, state["draft"].model_dump(), self.max_features)
+
+    def _after_finalize(self, state: OrchestratorState, key: str, final: FinalizedFeatures) -> OrchestratorState:
+        self.mem.save_final(final)
+        out = self._remember(state, FINAL, key, final.model_dump())
+        if self.decisions is not None:
+            # the feature loop records each feature's plan and preview results under these nodes
+            out["feature_nodes"] = {
+                f.name: self.decisions.record(FEATURE, stage_key(out["graph_node"], f.name), f.model_dump(),
+                                              [out["graph_node"]], run_id=state.get("run_id"))
+                for f in final.features
+            }
+        return {"finalized": final, "stage": "final", **out}
 
     # ---- node wrappers (pure functions over state) ----
     def _parse_node(self, state: OrchestratorState) -> OrchestratorState:
         query = state["query"]
         self.mem.save_query(query)
-        parsed = parse_query_node(self.llm, query)  # {"intents": str}
-        return {"intents": parsed["intents"]}
+        key = self._parse_key(state)
+        cached = self._recall(state, INTENT, key)
+        intents = cached["intents"] if cached else parse_query_node(self.llm, query)["intents"]
+        return {"intents": intents, **self._remember(state, INTENT, key, {"intents": intents})}
 
     def _propose_node(self, state: OrchestratorState) -> OrchestratorState:
-        intents = state["intents"]
-        draft = propose_features_node(self.llm, intents, max_features=self.max_features)
+        key = self._propose_key(state)
+        cached = self._recall(state, DRAFT, key)
+        if cached:
+            draft = FeatureDraft.model_validate(cached)
+        else:
+            draft = propose_features_node(self.llm, state["intents"], max_features=self.max_features)
         self.mem.save_draft(draft)
-        return {"draft": draft}
+        return {"draft": draft, **self._remember(state, DRAFT, key, draft.model_dump())}
 
     def _refine_node(self, state: OrchestratorState) -> OrchestratorState:
         draft = state["draft"]
         feedback = state.get("feedback")
         if not feedback:
             return {}
-        new_draft = refine_with_feedback_node(self.llm, draft, feedback, max_features=self.max_features)
+        key = self._refine_key(state)
+        cached = self._recall(state, REFINED, key)
+        if cached:
+            new_draft = FeatureDraft.model_validate(cached)
+        else:
+            new_draft = refine_with_feedback_node(self.llm, draft, feedback, max_features=self.max_features)
         self.mem.save_draft(new_draft)
-        return {"draft": new_draft}
+        return {"draft": new_draft, **self._remember(state, REFINED, key, new_draft.model_dump())}
 
     def _finalize_node(self, state: OrchestratorState) -> OrchestratorState:
-        draft = state["draft"]
-        final = finalize_node(self.llm, draft, max_features=self.max_features)
-        self.mem.save_final(final)
-        return {"finalized": final, "stage": "final"}
+        key = self._finalize_key(state)
+        cached = self._recall(state, FINAL, key)
+        if cached:
+            final = FinalizedFeatures.model_validate(cached)
+        else:
+            final = finalize_node(self.llm, state["draft"], max_features=self.max_features)
+        return self._after_finalize(state, key, final)
+
+    # ---- async node wrappers (same state contract, awaiting the LLM) ----
+    async def _aparse_node(self, state: OrchestratorState) -> OrchestratorState:
+        query = state["query"]
+        self.mem.save_query(query)
+        key = self._parse_key(state)
+        cached = self._recall(state, INTENT, key)
+        intents = cached["intents"] if cached else (await aparse_query_node(self.llm, query))["intents"]
+        return {"intents": intents, **self._remember(state, INTENT, key, {"intents": intents})}
+
+    async def _apropose_node(self, state: OrchestratorState) -> OrchestratorState:
+        key = self._propose_key(state)
+        cached = self._recall(state, DRAFT, key)
+        if cached:
+            draft = FeatureDraft.model_validate(cached)
+        else:
+            draft = await apropose_features_node(self.llm, state["intents"], max_features=self.max_features)
+        self.mem.save_draft(draft)
+        return {"draft": draft, **self._remember(state, DRAFT, key, draft.model_dump())}
+
+    async def _arefine_node(self, state: OrchestratorState) -> OrchestratorState:
+        feedback = state.get("feedback")
+        if not feedback:
+            return {}
+        key = self._refine_key(state)
+        cached = self._recall(state, REFINED, key)
+        if cached:
+            new_draft = FeatureDraft.model_validate(cached)
+        else:
+            new_draft = await arefine_with_feedback_node(self.llm, state["draft"], feedback, max_features=self.max_features)
+        self.mem.save_draft(new_draft)
+        return {"draft": new_draft, **self._remember(state, REFINED, key, new_draft.model_dump())}
+
+    async def _afinalize_node(self, state: OrchestratorState) -> OrchestratorState:
+        key = self._finalize_key(state)
+        cached = self._recall(state, FINAL, key)
+        if cached:
+            final = FinalizedFeatures.model_validate(cached)
+        else:
+            final = await afinalize_node(self.llm, state["draft"], max_features=self.max_features)
+        return self._after_finalize(state, key, final)
 
     
     # ---- routers (conditional edges) ----
@@ -69,14 +172,20 @@ class OrchestratorGraph:
             return FINALIZE
         return END
     
-    def _build_graph(self):
+    def _build_graph(self, use_async: bool = False):
         g = StateGraph(OrchestratorState)
 
         # register nodes
-        g.add_node(PARSE, self._parse_node)
-        g.add_node(PROPOSE, self._propose_node)
-        g.add_node(REFINE, self._refine_node)
-        g.add_node(FINALIZE, self._finalize_node)
+        if use_async:
+            g.add_node(PARSE, self._aparse_node)
+            g.add_node(PROPOSE, self._apropose_node)
+            g.add_node(REFINE, self._arefine_node)
+            g.add_node(FINALIZE, self._afinalize_node)
+        else:
+            g.add_node(PARSE, self._parse_node)
+            g.add_node(PROPOSE, self._propose_node)
+            g.add_node(REFINE, self._refine_node)
+            g.add_node(FINALIZE, self._finalize_node)
 
         g.set_entry_point(PARSE)
         g.add_edge(PARSE, PROPOSE)
@@ -117,16 +226,48 @@ class OrchestratorGraph:
             "feedback": feedback,
             "finalize_flag": finalize,
             "stage": "draft",  # default; will become 'final' if finalized
+            "run_id": self._start_run(query),
         }
         out = self.graph.invoke(initial)
+        return self._shape(out)
+
+    async def arun(
+        self,
+        query: UserQuery,
+        feedback: Optional[Feedback] = None,
+        finalize: bool = True,
+    ) -> Dict[str, Any]:
+        """Async counterpart of `run`; LLM calls are awaited instead of blocking the event loop."""
+        if self._agraph is None:
+            self._agraph = self._build_graph(use_async=True)
+        initial: OrchestratorState = {
+            "query": query,
+            "feedback": feedback,
+            "finalize_flag": finalize,
+            "stage": "draft",
+            "run_id": self._start_run(query),
+        }
+        out = await self._agraph.ainvoke(initial)
+        return self._shape(out)
+
+    def _start_run(self, query: UserQuery) -> Optional[str]:
+        self.last_run_id = self.decisions.start_run(query.text) if self.decisions is not None else None
+        return self.last_run_id
 
+    @staticmethod
+    def _shape(out: Dict[str, Any]) -> Dict[str, Any]:
         # shape response to match your previous run() contract
         if out.get("stage") == "final":
-            return {
+            shaped = {
                 "stage": "final",
                 "draft": out.get("draft").model_dump() if out.get("draft") else None,
                 "finalized": out.get("finalized").model_dump(),
             }
+            if out.get("feature_nodes"):
+                # pass feature_nodes[name] and run_id to the feature loop as feature_node / run_id
+                shaped["feature_nodes"] = out["feature_nodes"]
+                shaped["run_id"] = out.get("run_id")
+            return shaped
         return {
             "stage": "draft",
             "draft": out.get("draft").model_dump() if out.get("draft") else None,
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..contracts.planner import SingleCTETaskDefinition, SingleCTEResult
+
+
+def _failed_result(task: SingleCTETaskDefinition, reason: str) -> SingleCTEResult:
+    return SingleCTEResult(
+        task_id=task.task_id,
+        feature_name=task.feature_name,
+        status="fail",
+        sql="",
+        assumptions=[reason],
+    )
+
+
+def run_candidates(
+    tasks: List[SingleCTETaskDefinition],
+    execute: Callable[[SingleCTETaskDefinition], SingleCTEResult],
+    *,
+    accept: Optional[Callable[[SingleCTEResult], bool]] = None,
+    max_workers: int = 4,
+    engine_limits: Optional[Dict[str, int]] = None,
+    timeout_s: Optional[float] = None,
+    on_abandon: Optional[Callable[[SingleCTETaskDefinition], None]] = None,
+) -> List[SingleCTEResult]:
+    """
+    Execute candidate tasks concurrently on a bounded thread pool.
+
+    Args:
+        tasks: Candidates, in beam order.
+        execute: Runs one candidate (e.g. execute_cte_task_spark with fixed limit/seed).
+        accept: Predicate on a finished result; the first result that passes stops the stage,
+            cancelling candidates that have not started and abandoning the ones still running.
+        max_workers: Pool size.
+        engine_limits: Max concurrent candidates per `database_type` (e.g. {"snowflake": 2}).
+        timeout_s: Per-candidate wall-clock limit, measured from when it starts running.
+            A candidate over the limit is reported as a failed result.
+        on_abandon: Called for each still-running candidate that is timed out or abandoned
+            after acceptance, e.g. to cancel its Spark job group. Python threads cannot be
+            killed, so without it the work finishes in the background and is discarded.
+
+    Returns:
+        Results in the original candidate order (not completion order). Candidates abandoned
+        after acceptance are omitted; timed-out or crashed candidates appear as "fail" results.
+    """
+    if not tasks:
+        return []
+    limits = {name: threading.BoundedSemaphore(n) for name, n in (engine_limits or {}).items()}
+    started: Dict[int, float] = {}
+
+    def _run(i: int, task: SingleCTETaskDefinition) -> SingleCTEResult:
+        sem = limits.get(task.database_type)
+        if sem is not None:
+            sem.acquire()
+        try:
+            started[i] = time.monotonic()
+            return execute(task)
+        finally:
+            if sem is not None:
+                sem.release()
+
+    results: Dict[int, SingleCTEResult] = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cte-preview")
+    try:
+        futures: Dict[Future, int] = {pool.submit(_run, i, t): i for i, t in enumerate(tasks)}
+        pending = set(futures)
+        accepted = False
+        while pending and not accepted:
+            done, pending = wait(pending, timeout=0.25 if timeout_s else None, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: futures[f]):
+                i = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    res = _failed_result(tasks[i], f"Execution error: {e}")
+                results[i] = res
+                if accept is not None and res.status != "fail" and accept(res):
+                    accepted = True
+            if timeout_s:
+                now = time.monotonic()
+                for fut in list(pending):
+                    i = futures[fut]
+                    if i in started and now - started[i] > timeout_s:
+                        pending.discard(fut)
+                        results[i] = _failed_result(tasks[i], f"Preview timed out after {timeout_s:.0f}s")
+                        if on_abandon is not None:
+                            on_abandon(tasks[i])
+        for fut in pending:
+            if not fut.cancel() and on_abandon is not None:
+                on_abandon(tasks[futures[fut]])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return [results[i] for i in sorted(results)]
+
+
+async def arun_candidates(
+    tasks: List[SingleCTETaskDefinition],
+    execute: Callable[[SingleCTETaskDefinition], Awaitable[SingleCTEResult]],
+    *,
+    accept: Optional[Callable[[SingleCTEResult], bool]] = None,
+    max_workers: int = 4,
+    engine_limits: Optional[Dict[str, int]] = None,
+    timeout_s: Optional[float] = None,
+) -> List[SingleCTEResult]:
+    """
+    Asyncio counterpart of `run_candidates`, for use inside async LangGraph nodes.
+
+    `execute` is a coroutine function (wrap a blocking executor with `asyncio.to_thread`).
+    Concurrency is bounded by `max_workers` and per-engine semaphores; timeouts and
+    acceptance cancel the outstanding coroutines instead of abandoning threads.
+
+    Returns:
+        Results in the original candidate order. Candidates cancelled after acceptance are
+        omitted; timed-out or crashed candidates appear as "fail" results.
+    """
+    if not tasks:
+        return []
+    pool = asyncio.Semaphore(max_workers)
+    limits = {name: asyncio.Semaphore(n) for name, n in (engine_limits or {}).items()}
+
+    async def _run(task: SingleCTETaskDefinition) -> SingleCTEResult:
+        async with pool:
+            sem = limits.get(task.database_type)
+            if sem is not None:
+                await sem.acquire()
+            try:
+                try:
+                    return await asyncio.wait_for(execute(task), timeout_s) if timeout_s else await execute(task)
+                except asyncio.TimeoutError:
+                    return _failed_result(task, f"Preview timed out after {timeout_s:.0f}s")
+                except Exception as e:
+                    return _failed_result(task, f"Execution error: {e}")
+            finally:
+                if sem is not None:
+                    sem.release()
+
+    index: Dict[asyncio.Task, int] = {asyncio.ensure_future(_run(t)): i for i, t in enumerate(tasks)}
+    pending = set(index)
+    results: Dict[int, SingleCTEResult] = {}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            accepted = False
+            for fut in sorted(done, key=lambda f: index[f]):
+                res = fut.result()
+                results[index[fut]] = res
+                if accept is not None and res.status != "fail" and accept(res):
+                    accepted = True
+            if accepted:
+                break
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return [results[i] for i in sorted(results)]